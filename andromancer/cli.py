@@ -3,6 +3,12 @@ import logging
 from datetime import datetime
 from andromancer.core.agent import AndroMancerAgent, MissionStatus, event_bus, AgentEvent
 from andromancer.core.memory import memory_store
+from andromancer.core.fleet import FleetScheduler
+from andromancer.utils.adb_shell import shell_pool
+from andromancer.core.capabilities.ui_cache import observation_cache
+from andromancer.core.observation_encoder import observation_encoder
+from andromancer.core.llm_client import llm_transport
+from andromancer.core.decision_cache import decision_cache
 from andromancer import config as cfg
 
 logger = logging.getLogger("AndroMancer.CLI")
@@ -10,12 +16,15 @@ logger = logging.getLogger("AndroMancer.CLI")
 class AndroMancerCLI:
     def __init__(self):
         self.agent = AndroMancerAgent()
+        self.fleet: FleetScheduler = None
         self.commands = {
             "mission": self._cmd_mission,
             "status": self._cmd_status,
             "memory": self._cmd_memory,
             "stop": self._cmd_stop,
             "capabilities": self._cmd_capabilities,
+            "stats": self._cmd_stats,
+            "fleet": self._cmd_fleet,
             "help": self._cmd_help
         }
 
@@ -30,7 +39,7 @@ class AndroMancerCLI:
                 await asyncio.sleep(1)
             return
 
-        print("Commands: mission <goal>, status, memory, capabilities, stop, help")
+        print("Commands: mission <goal>, fleet [goal], status, memory, capabilities, stats, stop, help")
         print()
 
         while True:
@@ -84,7 +93,8 @@ class AndroMancerCLI:
             if not cfg.SILENT_MODE:
                 print()
                 if self.agent.mission.status == MissionStatus.COMPLETED:
-                    print(f"✅ Mission completed in {self.agent.mission.current_step} steps")
+                    print(f"✅ Mission completed in {self.agent.mission.current_step} steps "
+                          f"({self.agent.mission.llm_calls} LLM calls)")
                 elif self.agent.mission.status == MissionStatus.FAILED:
                     print(f"❌ Mission failed at step {self.agent.mission.current_step}")
 
@@ -93,6 +103,7 @@ class AndroMancerCLI:
             print(f"📋 Mission: {self.agent.mission.goal}")
             print(f"🔄 Status: {self.agent.mission.status.name}")
             print(f"📍 Step: {self.agent.mission.current_step}")
+            print(f"💬 LLM calls: {self.agent.mission.llm_calls}")
         else:
             print("ℹ️  No active mission")
 
@@ -109,9 +120,95 @@ class AndroMancerCLI:
         for cap in caps:
             print(f"  - {cap['name']}: {cap['description']}")
 
+    async def _cmd_stats(self, _):
+        pool = shell_pool.stats()
+        print(f"🔌 ADB shell pool: {pool['sessions']} sessions, "
+              f"{pool['hits']} hits / {pool['misses']} misses (hit rate {pool['hit_rate']:.0%})")
+        cache = observation_cache.stats()
+        print(f"🗂️  UI cache: {cache['hits']} hits / {cache['misses']} misses (hit ratio {cache['hit_ratio']:.0%})")
+        detector = self.agent.change_detector.stats()
+        print(f"🖼️  Screen change checks: {detector['checks']}, changed: {detector['changed']}, "
+              f"UI dumps saved: {detector['dumps_saved']}, skipped as not worth it: {detector['skipped']}")
+        encoding = observation_encoder.stats()
+        print(f"✂️  Prompt observations: {encoding['observations']}, ~{encoding['raw_tokens']} -> "
+              f"~{encoding['encoded_tokens']} tokens ({encoding['reduction']:.0%} smaller)")
+        llm = llm_transport.stats()
+        print(f"🌐 LLM transport: {llm['requests']} requests over {llm['connections_opened']} connections "
+              f"(reuse {llm['reuse_ratio']:.0%}), avg TTFB {llm['avg_ttfb_ms']:.0f} ms {llm['http_version']}")
+        providers = self.agent.reasoning.llm.providers.stats()
+        for name, p in providers["providers"].items():
+            print(f"🛰️  LLM provider {name} ({p['model']}): {p['wins']}/{p['requests']} won, {p['failures']} failed, "
+                  f"{p['rate_limited']} rate limited, p50 {p['p50_ms']:.0f} ms{'' if p['available'] else ' (cooling down)'}")
+            limit = p["rate_limit"]
+            print(f"   ⏳ queue wait avg {limit['avg_wait_ms']:.0f} ms, max {limit['max_wait_ms']:.0f} ms, "
+                  f"{limit['queued']} queued")
+        print(f"🪁 Hedged requests: {providers['hedges']}")
+        reasoning = self.agent.reasoning.llm.stats()
+        print(f"⏱️  Time to first action: {reasoning['first_action_ms']:.0f} ms full completion, "
+              f"{reasoning['streamed_first_action_ms']:.0f} ms streamed")
+        for tier, client in (("large", self.agent.reasoning.llm), ("small", self.agent.reasoning.small_llm)):
+            if client:
+                usage = client.stats()
+                print(f"🧊 Prompt prefix cache ({tier} model): {usage['cached_prompt_tokens']} of "
+                      f"{usage['prompt_tokens']} prompt tokens cached ({usage['prefix_cache_ratio']:.0%})")
+        prompt = self.agent.reasoning.prompt_sizes.stats()
+        if prompt:
+            print(f"📏 Prompt size: avg ~{prompt['avg_tokens']:.0f} tokens, max ~{prompt['max_tokens']}, "
+                  f"last ~{prompt['last_tokens']} ({prompt['truncated_sections']} sections cut, "
+                  f"{prompt['history_compressions']} steps summarized)")
+        routing = self.agent.reasoning.routing_stats()
+        escalations = ", ".join(f"{k} {v}" for k, v in routing["escalations"].items()) or "none"
+        print(f"🪜 Model tiers: {routing['small']} small / {routing['large']} large steps (escalations: {escalations})")
+        if cfg.PLAN_EXECUTE:
+            plans = self.agent.plan_stats
+            print(f"🗺️  Plans: {plans['plans']}, {plans['planned_steps']} steps run without the LLM, checks "
+                  f"{plans['checks_passed']} passed / {plans['checks_failed']} failed "
+                  f"({plans['steps_dropped']} steps dropped)")
+        phases = self.agent.timings.stats()
+        if phases:
+            print("🧵 Step phases (avg ms): " + ", ".join(f"{k} {v:.0f}" for k, v in phases.items()))
+        memories = memory_store.stats()
+        print(f"💾 Memories: {memories['memories']} (cap {memories['max_entries'] or 'none'}, {memories['policy']}), "
+              f"{memories['deduplicated']} deduplicated, {memories['evicted']} evicted ({memories['expired']} expired)")
+        decisions = decision_cache.stats()
+        print(f"🧠 Decision cache: {decisions['entries']} plans, {decisions['hits']} hits / "
+              f"{decisions['misses']} misses (hit ratio {decisions['hit_ratio']:.0%})")
+
+    async def _cmd_fleet(self, goal: str):
+        if not self.fleet:
+            self.fleet = FleetScheduler()
+            serials = await self.fleet.start()
+            print(f"🛰️  Fleet ready on {len(serials)} devices: {', '.join(serials)}")
+
+        if not goal.strip():
+            stats = self.fleet.stats()
+            print(f"🛰️  Devices: {stats['devices']} | Busy: {stats['busy']} | Pending: {stats['pending']}")
+            for serial, done in stats["completed"].items():
+                print(f"  - {serial}: {done} missions ({stats['stolen'][serial]} stolen)")
+            return
+
+        try:
+            future = await self.fleet.submit(goal)
+            print(f"📥 Queued fleet mission: {goal}")
+            future.add_done_callback(self._on_fleet_done)
+        except Exception as e:
+            print(f"❌ Failed to queue fleet mission: {e}")
+
+    def _on_fleet_done(self, future):
+        if future.cancelled():
+            return
+        if future.exception():
+            print(f"❌ Fleet mission failed: {future.exception()}")
+            return
+        mission = future.result()
+        print(f"🏁 Fleet mission {mission.id} finished: {mission.status.name} ({mission.goal})")
+
     async def _cmd_help(self, _):
-        print("Available commands: mission, status, memory, capabilities, stop, help")
+        print("Available commands: mission, fleet, status, memory, capabilities, stats, stop, help")
 
     async def _cmd_stop(self, _):
         print("🛑 Stopping agent...")
         self.agent.stop()
+        if self.fleet:
+            await self.fleet.stop()
+            self.fleet = None
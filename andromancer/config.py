@@ -33,22 +33,73 @@ STATE_DIR.mkdir(parents=True, exist_ok=True)
 
 STATE_FILE = STATE_DIR / "agent_state.json"
 VECTOR_DB_PATH = STATE_DIR / "memory.vec"
+MEMORY_LOG_PATH = STATE_DIR / "memory.jsonl"
+MEMORY_EMBEDDINGS_PATH = STATE_DIR / "memory.f32"
 LOG_FILE = STATE_DIR / "agent.log"
 
 # AI / LLM
 GROQ_API_KEY = _env("GROQ_API_KEY", "")
 MODEL_NAME = _env("MODEL_NAME", "meta-llama/llama-4-scout-17b-16e-instruct")
+SMALL_MODEL_NAME = _env("SMALL_MODEL_NAME", "llama-3.1-8b-instant")
+MODEL_ROUTING = _bool_env("MODEL_ROUTING", True)
 MAX_STEPS = int(_env("MAX_STEPS", 20))
+LLM_BASE_URL = _env("LLM_BASE_URL", "https://api.groq.com/openai/v1")
+LLM_HTTP2 = _bool_env("LLM_HTTP2", True)
+LLM_MAX_CONNECTIONS = int(_env("LLM_MAX_CONNECTIONS", 10))
+LLM_MAX_KEEPALIVE = int(_env("LLM_MAX_KEEPALIVE", 5))
+LLM_KEEPALIVE_EXPIRY = float(_env("LLM_KEEPALIVE_EXPIRY", 60.0))
+LLM_STREAMING = _bool_env("LLM_STREAMING", False)
+LLM_PROVIDERS = _env("LLM_PROVIDERS", "")
+LLM_HEDGE_PERCENTILE = float(_env("LLM_HEDGE_PERCENTILE", 0.95))
+LLM_HEDGE_DELAY = float(_env("LLM_HEDGE_DELAY", 3.0))
+LLM_RATE_LIMIT = _bool_env("LLM_RATE_LIMIT", True)
+LLM_RPM = float(_env("LLM_RPM", 30))
+LLM_TPM = float(_env("LLM_TPM", 30000))
+LLM_COMPLETION_TOKENS = int(_env("LLM_COMPLETION_TOKENS", 512))
+PROMPT_TOKEN_BUDGET = int(_env("PROMPT_TOKEN_BUDGET", 4000))
+PROMPT_BUDGET_SHARES = _env("PROMPT_BUDGET_SHARES", "")
 
 # ADB
 ADB_TIMEOUT = int(_env("ADB_TIMEOUT", 15))
 ADB_DELAY = float(_env("ADB_DELAY", 1.0))
+ADB_SHELL_POOL = _bool_env("ADB_SHELL_POOL", True)
+ADB_SHELL_POOL_SIZE = int(_env("ADB_SHELL_POOL_SIZE", 2))
+ADB_NATIVE_CLIENT = _bool_env("ADB_NATIVE_CLIENT", True)
+ADB_SERVER_HOST = _env("ADB_SERVER_HOST", "127.0.0.1")
+ADB_SERVER_PORT = int(_env("ANDROID_ADB_SERVER_PORT", 5037))
+ADB_MAX_CONNECTIONS = int(_env("ADB_MAX_CONNECTIONS", 8))
+UI_DUMP_STREAMING = _bool_env("UI_DUMP_STREAMING", True)
+UI_CACHE_TTL = float(_env("UI_CACHE_TTL", 2.0))
+APP_CATALOG_TTL = float(_env("APP_CATALOG_TTL", 600))
+SCREEN_CHANGE_DETECTION = _bool_env("SCREEN_CHANGE_DETECTION", True)
+SCREEN_HASH_SIZE = int(_env("SCREEN_HASH_SIZE", 32))
+SCREEN_HASH_THRESHOLD = int(_env("SCREEN_HASH_THRESHOLD", 0))
+SCREEN_PIXEL_TOLERANCE = float(_env("SCREEN_PIXEL_TOLERANCE", 2.0))
 
 # Autonomy
 AUTONOMY_LEVEL = _env("AUTONOMY_LEVEL", "full")
 CONFIDENCE_THRESHOLD = float(_env("CONFIDENCE_THRESHOLD", 0.75))
 PARALLEL_ACTIONS = _bool_env("PARALLEL_ACTIONS", True)
+BATCH_INPUT_ACTIONS = _bool_env("BATCH_INPUT_ACTIONS", True)
+PIPELINED_LOOP = _bool_env("PIPELINED_LOOP", False)
+PLAN_EXECUTE = _bool_env("PLAN_EXECUTE", False)
 SAFETY_CHECKPOINTS = _bool_env("SAFETY_CHECKPOINTS", True)
+DECISION_CACHE = _bool_env("DECISION_CACHE", True)
+DECISION_CACHE_SIZE = int(_env("DECISION_CACHE_SIZE", 500))
+DECISION_CACHE_MIN_CONFIDENCE = float(_env("DECISION_CACHE_MIN_CONFIDENCE", 0.8))
+DECISION_CACHE_HALF_LIFE = float(_env("DECISION_CACHE_HALF_LIFE", 7 * 24 * 3600))
+DECISION_CACHE_MIN_USES = int(_env("DECISION_CACHE_MIN_USES", 3))
+DECISION_CACHE_SAVE_EVERY = int(_env("DECISION_CACHE_SAVE_EVERY", 20))
+
+# Memory
+MEMORY_FSYNC_INTERVAL = float(_env("MEMORY_FSYNC_INTERVAL", 1.0))
+MEMORY_COMPACT_RATIO = float(_env("MEMORY_COMPACT_RATIO", 2.0))
+MEMORY_EMBEDDING_DIM = int(_env("MEMORY_EMBEDDING_DIM", 256))
+MEMORY_MAX_ENTRIES = int(_env("MEMORY_MAX_ENTRIES", 20000))
+MEMORY_EVICTION_POLICY = _env("MEMORY_EVICTION_POLICY", "lfu")
+MEMORY_HALF_LIFE = float(_env("MEMORY_HALF_LIFE", 7 * 24 * 3600))
+MEMORY_TTL = _env("MEMORY_TTL", '{"screen": 604800}')
+MEMORY_DEDUP_TYPES = [t.strip() for t in _env("MEMORY_DEDUP_TYPES", "screen").split(",") if t.strip()]
 
 # Logging
 LOG_LEVEL = _env("LOG_LEVEL", "INFO")
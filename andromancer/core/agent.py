@@ -6,13 +6,17 @@ import json
 from enum import Enum, auto
 from dataclasses import dataclass, field, asdict
 from typing import List, Dict, Any, Optional, Callable, Coroutine
-from collections import deque
+from collections import Counter, deque
 from concurrent.futures import ThreadPoolExecutor
 
 from andromancer import config as cfg
 from andromancer.core.capabilities.base import CapabilityRegistry, ExecutionResult
 from andromancer.core.reasoning import ReActEngine, Thought
 from andromancer.core.memory import memory_store
+from andromancer.core.decision_cache import decision_cache
+from andromancer.core.rate_limiter import current_mission
+from andromancer.core.postconditions import check_postcondition
+from andromancer.core.timing import LoopTimings, StepTimer, overlap
 from andromancer.skills.base import SkillRegistry, SkillResult
 from andromancer.skills.critical.app_opener import AppOpenerSkill
 from andromancer.skills.advisory.settings_escape import SettingsEscapeSkill
@@ -26,9 +30,14 @@ from andromancer.core.capabilities.interaction import TapCapability, TypeCapabil
 from andromancer.core.capabilities.observation import UIScrapeCapability
 from andromancer.core.capabilities.navigation import OpenAppCapability, WaitCapability
 from andromancer.core.capabilities.secrets import GetSecretCapability
+from andromancer.core.capabilities.screen_change import ScreenChangeDetector
+from andromancer.utils.adb import safe_serial
 
 logger = logging.getLogger("AndroMancer.Agent")
 
+# Settle time between a step's actions and the next UI dump
+STEP_DELAY = 0.5
+
 class EventType(Enum):
     THOUGHT = auto()
     ACTION = auto()
@@ -40,6 +49,8 @@ class EventType(Enum):
     SKILL_START = auto()
     SKILL_END = auto()
     REPORT = auto()
+    DECISION_CACHE = auto()
+    PLAN_CHECK = auto()
 
 @dataclass
 class AgentEvent:
@@ -82,6 +93,7 @@ class Mission:
     created_at: float
     max_steps: int = 20
     current_step: int = 0
+    llm_calls: int = 0
     context: Dict = field(default_factory=dict)
 
 class RecoverableError(Exception):
@@ -91,9 +103,14 @@ class FatalError(Exception):
     pass
 
 class AndroMancerAgent:
-    """Main autonomous agent"""
+    """Main autonomous agent.
 
-    def __init__(self):
+    `device_id` pins the agent (capabilities, skills and state file) to one
+    device serial; by default it drives the first device reported by adb.
+    """
+
+    def __init__(self, device_id: Optional[str] = None):
+        self.device_id = device_id
         self.mission: Optional[Mission] = None
         self.reasoning = ReActEngine()
         self.registry = CapabilityRegistry()
@@ -102,22 +119,37 @@ class AndroMancerAgent:
         self.skill_registry = SkillRegistry()
         self._register_default_skills()
         self.state_file = cfg.STATE_FILE
+        if device_id:
+            self.state_file = cfg.STATE_DIR / f"agent_state_{safe_serial(device_id)}.json"
         self._stop_event = asyncio.Event()
+        self._loop_task: Optional[asyncio.Task] = None
+        self.change_detector = ScreenChangeDetector(device_id)
+        self._last_observation: Optional[Dict] = None
+        self._last_decision_key: Optional[str] = None
+        self._prefetch: Optional[asyncio.Task] = None
+        self._prefetch_started = 0.0
+        self._prefetch_done_at: Optional[float] = None
+        self.timings = LoopTimings()
+        # PLAN_EXECUTE: actions still to run and the postcondition of the one that just ran
+        self._plan: deque = deque()
+        self._plan_confidence = 0.0
+        self._plan_expect: Optional[Dict] = None
+        self.plan_stats: Counter = Counter()
 
         event_bus.subscribe(self._log_events)
 
     def _register_default_capabilities(self):
-        self.registry.register(TapCapability())
-        self.registry.register(TypeCapability())
-        self.registry.register(SwipeCapability())
-        self.registry.register(BackCapability())
-        self.registry.register(UIScrapeCapability())
-        self.registry.register(OpenAppCapability())
+        self.registry.register(TapCapability(self.device_id))
+        self.registry.register(TypeCapability(self.device_id))
+        self.registry.register(SwipeCapability(self.device_id))
+        self.registry.register(BackCapability(self.device_id))
+        self.registry.register(UIScrapeCapability(self.device_id))
+        self.registry.register(OpenAppCapability(self.device_id))
         self.registry.register(GetSecretCapability())
         self.registry.register(WaitCapability())
 
     def _register_default_skills(self):
-        self.skill_registry.register(AppOpenerSkill())
+        self.skill_registry.register(AppOpenerSkill(self.device_id))
         self.skill_registry.register(SettingsEscapeSkill())
         self.skill_registry.register(SearchSkill())
         self.skill_registry.register(ScrollSkill())
@@ -127,9 +159,17 @@ class AndroMancerAgent:
 
     async def _log_events(self, event: AgentEvent):
         """Logs events and handles silent mode logic if necessary."""
+        if event.metadata.get("device", self.device_id) != self.device_id:
+            return  # Another agent in the fleet logs its own events
         logger.info(f"[{event.type.name}] {event.content}")
         # In silent mode, CLI suppresses step indicators, but core events still reach subscribers.
 
+    async def _emit(self, event_type: EventType, content: Dict[str, Any]):
+        await event_bus.emit(AgentEvent(
+            time.time(), event_type, content,
+            metadata={"device": self.device_id, "mission": self.mission.id if self.mission else None}
+        ))
+
     async def start_mission(self, goal: str, resume: bool = False) -> Mission:
         if resume and self.state_file.exists():
             self.mission = self._load_state()
@@ -144,112 +184,352 @@ class AndroMancerAgent:
             )
             logger.info(f"New mission started: {goal}")
 
-        asyncio.create_task(self._run_loop())
+        self._stop_event.clear()
+        self._last_observation = None
+        self._reset_plan()
+        self.change_detector.reset()
+        # Connect to the LLM endpoint while the first observation is taken
+        asyncio.ensure_future(self.reasoning.llm.warm_up())
+        # The loop task copies this context, so its LLM calls queue under this mission
+        current_mission.set(self.mission.id)
+        self._loop_task = asyncio.create_task(self._run_loop())
         return self.mission
 
+    async def run_mission(self, goal: str) -> Mission:
+        """Starts a mission and waits until its loop has finished"""
+        mission = await self.start_mission(goal)
+        await self._loop_task
+        return mission
+
     async def _run_loop(self):
         retry_count = 0
         max_retries = 3
 
-        while not self._stop_event.is_set() and self.mission.status == MissionStatus.RUNNING:
-            if self.mission.current_step >= self.mission.max_steps:
-                logger.info("Reached max steps, completing mission")
-                self.mission.status = MissionStatus.COMPLETED
-                break
+        try:
+            while not self._stop_event.is_set() and self.mission.status == MissionStatus.RUNNING:
+                if self.mission.current_step >= self.mission.max_steps:
+                    logger.info("Reached max steps, completing mission")
+                    self.mission.status = MissionStatus.COMPLETED
+                    break
 
-            try:
-                # 1. OBSERVE
-                ui_result = await self.registry.execute("get_ui", {})
-                if not ui_result.success:
-                    raise RecoverableError(f"Observation failed: {ui_result.error}")
-
-                observation = ui_result.data
-                memory_store.store(observation.get("summary", ""), {"type": "screen", "mission": self.mission.id})
-
-                await event_bus.emit(AgentEvent(
-                    time.time(), EventType.OBSERVATION,
-                    {"step": self.mission.current_step, "screen": observation.get("summary", "")}
-                ))
-
-                # --- SKILL CHECK ---
-                skill_override, skill_suggestions = await self.skill_registry.check_skills(
-                    self.mission.goal,
-                    observation,
-                    self.reasoning.thought_history
-                )
+                try:
+                    await self._run_step(StepTimer(self.mission.current_step))
+                    if self.mission.status != MissionStatus.RUNNING:
+                        break
+                    retry_count = 0
 
-                if skill_override:
-                    await event_bus.emit(AgentEvent(
-                        time.time(), EventType.SKILL_START,
-                        {"skill_override": True, "actions": len(skill_override.actions)}
-                    ))
-
-                    # Execute skill plan
-                    results = await self._execute_plan(skill_override.actions)
-
-                    await event_bus.emit(AgentEvent(
-                        time.time(), EventType.SKILL_END,
-                        {"success": all(r.success for r in results)}
-                    ))
-
-                    # Reflection on skill execution
-                    dummy_thought = Thought(
-                        step=self.mission.current_step,
-                        reasoning=f"Skill override executed: {skill_override.suggestion}",
-                        action_plan=skill_override.actions,
-                        confidence=skill_override.confidence,
-                        observation=observation
-                    )
-                    for action, result in zip(skill_override.actions, results):
-                        await self.reasoning.reflect(dummy_thought, result)
+                except RecoverableError as e:
+                    retry_count += 1
+                    if retry_count > max_retries:
+                        self.mission.status = MissionStatus.FAILED
+                        break
+                    await asyncio.sleep(2 ** retry_count)
+                    continue
+                except Exception as e:
+                    logger.exception(f"Unhandled exception: {e}")
+                    self.mission.status = MissionStatus.FAILED
+                    break
+        finally:
+            self._cancel_prefetch()
 
-                    self.reasoning.thought_history.append(dummy_thought)
+        await self._complete_mission()
 
-                else:
-                    # 2. REASON
+    async def _run_step(self, timer: StepTimer):
+        """One observe/reason/act/reflect iteration.
+
+        In PIPELINED_LOOP mode the next observation starts as soon as this
+        step's device actions are done (after the same settle delay as the
+        serial loop) and overlaps reflection, cache updates and state saving.
+        """
+        # 1. OBSERVE
+        # With a prefetch in flight this only waits for the rest of it
+        with timer.phase("observe" if self._prefetch is None else "observe_wait"):
+            observation, reused = await self._next_observation()
+
+        await self._emit(EventType.OBSERVATION, {"step": self.mission.current_step, "screen": observation.get("summary", ""), "reused": reused})
+
+        # --- SKILL CHECK ---
+        with timer.phase("skills"):
+            skill_override, skill_suggestions = await self.skill_registry.check_skills(
+                self.mission.goal,
+                observation,
+                self.reasoning.thought_history
+            )
+
+        if skill_override:
+            await self._emit(EventType.SKILL_START, {"skill_override": True, "actions": len(skill_override.actions)})
+            self._reset_plan()  # A skill taking over means the screen went somewhere the plan did not expect
+
+            # Execute skill plan
+            with timer.phase("act"):
+                results = await self._execute_plan(skill_override.actions)
+            self._start_prefetch()
+
+            with timer.phase("reflect"):
+                await self._emit(EventType.SKILL_END, {"success": all(r.success for r in results)})
+
+                # Reflection on skill execution
+                dummy_thought = Thought(
+                    step=self.mission.current_step,
+                    reasoning=f"Skill override executed: {skill_override.suggestion}",
+                    action_plan=skill_override.actions,
+                    confidence=skill_override.confidence,
+                    observation=observation,
+                    source="skill"
+                )
+                for action, result in zip(skill_override.actions, results):
+                    await self.reasoning.reflect(dummy_thought, result)
+
+                self.reasoning.thought_history.append(dummy_thought)
+
+        else:
+            # 2. REASON (from a plan that already worked here, or the LLM)
+            decision_key = None
+            thought = None
+            results = None
+            with timer.phase("reason"):
+                if cfg.PLAN_EXECUTE:
+                    thought = await self._planned_thought(observation)
+                if thought is None and cfg.DECISION_CACHE:
+                    thought, decision_key = await self._cached_thought(observation)
+                if thought is None and cfg.LLM_STREAMING and not cfg.PLAN_EXECUTE:
+                    thought, results = await self._reason_streaming(observation, skill_suggestions)
+                elif thought is None:
                     thought = await self.reasoning.reason(
                         self.mission.goal,
                         observation,
                         self.mission.current_step,
                         self.registry.list_capabilities(),
-                        skill_suggestions=skill_suggestions
+                        skill_suggestions=skill_suggestions,
+                        plan=cfg.PLAN_EXECUTE
                     )
+                self.mission.llm_calls += thought.llm_calls
+                if cfg.PLAN_EXECUTE:
+                    self._follow_plan(thought)
 
-                    if not thought.action_plan:
-                        logger.info("No more actions needed, completing mission")
-                        self.mission.status = MissionStatus.COMPLETED
-                        break
-
-                    # 3. ACT
-                    results = await self._execute_plan(thought.action_plan)
-
-                    # 4. REFLECT
-                    for action, result in zip(thought.action_plan, results):
-                        await self.reasoning.reflect(thought, result)
-                        if not result.success:
-                            await self._handle_failure(action, result, thought)
-                        else:
-                            # Clear previous errors if we have a success
-                            self.reasoning.working_memory.pop("last_action_error", None)
-
-                retry_count = 0
-                self.mission.current_step += 1
-                self._save_state()
-                await asyncio.sleep(0.5)
-
-            except RecoverableError as e:
-                retry_count += 1
-                if retry_count > max_retries:
-                    self.mission.status = MissionStatus.FAILED
-                    break
-                await asyncio.sleep(2 ** retry_count)
-                continue
-            except Exception as e:
-                logger.exception(f"Unhandled exception: {e}")
-                self.mission.status = MissionStatus.FAILED
-                break
-
-        await self._complete_mission()
+            if not thought.action_plan:
+                logger.info("No more actions needed, completing mission")
+                self.mission.status = MissionStatus.COMPLETED
+                return
+
+            # 3. ACT (already under way when the plan was streamed)
+            if results is None:
+                with timer.phase("act"):
+                    if cfg.PIPELINED_LOOP:
+                        # Render the next prompt's capability list while the device works
+                        results, _ = await asyncio.gather(
+                            self._execute_plan(thought.action_plan),
+                            self.reasoning.prepare_prompt(self.registry.list_capabilities())
+                        )
+                    else:
+                        results = await self._execute_plan(thought.action_plan)
+            self._start_prefetch()
+
+            # 4. REFLECT
+            with timer.phase("reflect"):
+                for action, result in zip(thought.action_plan, results):
+                    await self.reasoning.reflect(thought, result)
+                    if not result.success:
+                        self._reset_plan()
+                        await self._handle_failure(action, result, thought)
+                    else:
+                        # Clear previous errors if we have a success
+                        self.reasoning.working_memory.pop("last_action_error", None)
+
+                if decision_key and thought.source != "fallback":
+                    succeeded = len(results) == len(thought.action_plan) and all(r.success for r in results)
+                    decision_cache.record(decision_key, self.mission.goal, thought.action_plan, succeeded, thought.reasoning)
+
+        self.mission.current_step += 1
+        with timer.phase("persist"):
+            self._save_state()
+        self._finish_timer(timer)
+        if not self._prefetch:
+            await asyncio.sleep(STEP_DELAY)
+
+    # --- Observation pipeline ---
+
+    async def _observe_step(self):
+        """Observation plus its memory write; the unit the pipelined loop prefetches"""
+        observation, reused = await self._observe()
+        memory_store.store(observation.get("summary", ""), {"type": "screen", "mission": self.mission.id})
+        return observation, reused
+
+    async def _prefetched_observation(self):
+        # Same settle time the serial loop leaves between the actions and the next dump
+        await asyncio.sleep(STEP_DELAY)
+        try:
+            return await self._observe_step()
+        finally:
+            self._prefetch_done_at = time.perf_counter()
+
+    def _start_prefetch(self):
+        if cfg.PIPELINED_LOOP and not self._stop_event.is_set():
+            self._prefetch_started = time.perf_counter()
+            self._prefetch_done_at = None
+            self._prefetch = asyncio.create_task(self._prefetched_observation())
+
+    def _cancel_prefetch(self):
+        if self._prefetch:
+            self._prefetch.cancel()
+            self._prefetch = None
+
+    async def _next_observation(self):
+        if self._prefetch is None:
+            return await self._observe_step()
+        task, self._prefetch = self._prefetch, None
+        return await task
+
+    def _finish_timer(self, timer: StepTimer):
+        if self._prefetch:
+            # Post-action work that ran while the next observation was being taken
+            end = self._prefetch_done_at or time.perf_counter()
+            timer.overlap = overlap((self._prefetch_started, end), timer.window("reflect", "persist"))
+        self.timings.record(timer)
+        logger.debug(f"Step {timer.step} phases (ms): "
+                     + ", ".join(f"{k}={v:.0f}" for k, v in timer.durations_ms().items())
+                     + f", overlap={timer.overlap * 1000:.0f}")
+
+    async def _reason_streaming(self, observation: Dict, skill_suggestions: List[str]):
+        """Reasons over a streamed completion, running each plan entry in order as soon
+        as it arrives. Returns (thought, results), results being None when nothing
+        was dispatched early and the plan still has to be executed.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        dispatched: List[Dict] = []
+        halted = False
+
+        async def on_action(action: Dict):
+            dispatched.append(action)
+            await queue.put(action)
+
+        async def run_dispatched() -> List[ExecutionResult]:
+            nonlocal halted
+            results: List[ExecutionResult] = []
+            while True:
+                action = await queue.get()
+                if action is None:
+                    return results
+                if not halted:
+                    result = (await self._execute_plan([action]))[0]
+                    results.append(result)
+                    # Same rule as sequential execution: a failed critical action stops the plan
+                    halted = not result.success and action.get("critical", False)
+
+        runner = asyncio.create_task(run_dispatched())
+        try:
+            thought = await self.reasoning.reason(
+                self.mission.goal,
+                observation,
+                self.mission.current_step,
+                self.registry.list_capabilities(),
+                skill_suggestions=skill_suggestions,
+                on_action=on_action
+            )
+        finally:
+            await queue.put(None)
+        results = await runner
+
+        if not dispatched:
+            return thought, None
+        remaining = thought.action_plan[len(dispatched):]
+        if remaining and not halted:
+            results.extend(await self._execute_plan(remaining))
+        return thought, results
+
+    # --- Plan-then-execute ---
+
+    def _reset_plan(self):
+        self._plan.clear()
+        self._plan_expect = None
+
+    def _follow_plan(self, thought: Thought):
+        """Runs the first action of a new multi-step plan now and queues the rest"""
+        if thought.source != "plan" and len(thought.action_plan) > 1:
+            self._plan = deque(thought.action_plan[1:])
+            self._plan_confidence = thought.confidence
+            thought.action_plan = thought.action_plan[:1]
+            self.plan_stats["plans"] += 1
+        self._plan_expect = thought.action_plan[-1].get("expect") if thought.action_plan else None
+
+    async def _planned_thought(self, observation: Dict) -> Optional[Thought]:
+        """Next queued plan action, once the last one's postcondition holds on this screen.
+        A failed check drops the rest of the plan so the LLM replans from here.
+        """
+        if self._plan_expect is not None:
+            failure = check_postcondition(self._plan_expect, observation)
+            await self._emit(EventType.PLAN_CHECK, {"step": self.mission.current_step, "expect": self._plan_expect,
+                                                    "passed": failure is None, "reason": failure})
+            if failure:
+                self.plan_stats["checks_failed"] += 1
+                self.plan_stats["steps_dropped"] += len(self._plan)
+                self._reset_plan()
+                self.reasoning.working_memory["last_action_error"] = f"Plan check failed: {failure}. Replan from this screen."
+                return None
+            self.plan_stats["checks_passed"] += 1
+            self._plan_expect = None
+
+        if not self._plan:
+            return None
+        action = self._plan.popleft()
+        self.plan_stats["planned_steps"] += 1
+        thought = Thought(
+            step=self.mission.current_step,
+            reasoning=f"Planned step: {action.get('expected_outcome') or action.get('capability')}",
+            action_plan=[action],
+            confidence=self._plan_confidence,
+            observation=observation,
+            source="plan"
+        )
+        self.reasoning.thought_history.append(thought)
+        return thought
+
+    async def _cached_thought(self, observation: Dict):
+        """Replays a cached plan for this goal and screen; returns (thought or None, cache key)"""
+        history = self.reasoning.thought_history
+        key = decision_cache.make_key(
+            self.mission.goal, observation, self.reasoning.working_memory,
+            history[-1].action_plan if history else None
+        )
+        cached = None
+        if not (history and history[-1].source == "cache" and key == self._last_decision_key):
+            # A replayed plan that left the screen as it was goes back to the LLM
+            cached = decision_cache.lookup(key)
+        self._last_decision_key = key
+        await self._emit(EventType.DECISION_CACHE, {"step": self.mission.current_step, "hit": cached is not None})
+        if cached is None:
+            return None, key
+
+        thought = Thought(
+            step=self.mission.current_step,
+            reasoning=f"Cached decision: {cached.reasoning}",
+            action_plan=cached.action_plan,
+            confidence=cached.confidence(decision_cache.half_life),
+            observation=observation,
+            source="cache"
+        )
+        history.append(thought)
+        return thought, key
+
+    async def _observe(self):
+        """Dumps the UI unless the change detector says the last observation is still current"""
+        checked = cfg.SCREEN_CHANGE_DETECTION and self.change_detector.worthwhile()
+        if checked:
+            unchanged = await self.change_detector.check()
+            if unchanged and self._last_observation is not None:
+                return self._last_observation, True
+
+        # A screen the detector saw change must be dumped again even if the cache is fresh
+        start = time.perf_counter()
+        ui_result = await self.registry.execute("get_ui", {"use_cache": not checked})
+        if ui_result.success and not ui_result.metadata.get("cached"):
+            self.change_detector.record_dump((time.perf_counter() - start) * 1000)
+        if not ui_result.success:
+            self.change_detector.reset()
+            raise RecoverableError(f"Observation failed: {ui_result.error}")
+
+        self._last_observation = ui_result.data
+        return ui_result.data, False
 
     def _validate_action(self, action: Dict) -> Optional[str]:
         """Validates action parameters before execution"""
@@ -257,8 +537,9 @@ class AndroMancerAgent:
         params = action.get("params", {})
 
         if cap_name == "tap":
-            if not (params.get("x") is not None and params.get("y") is not None) and not params.get("element"):
-                return "Action 'tap' requires either 'x' and 'y' coordinates OR an 'element' dictionary. None provided. Check the UI observation again for coordinates."
+            has_coords = params.get("x") is not None and params.get("y") is not None
+            if not has_coords and params.get("element_id") is None and not params.get("element") and not params.get("label"):
+                return "Action 'tap' requires an 'element_id' from the observation table, a 'label' OR 'x' and 'y' coordinates. None provided. Check the UI observation again."
 
         if cap_name == "type":
             if not params.get("text"):
@@ -268,6 +549,9 @@ class AndroMancerAgent:
 
     async def _execute_plan(self, actions: List[Dict]) -> List[ExecutionResult]:
         """Execute actions, supporting parallel execution if configured"""
+        if cfg.BATCH_INPUT_ACTIONS and sum(1 for a in actions if self.registry.is_batchable(a)) > 1:
+            return await self._execute_batched(actions)
+
         if not cfg.PARALLEL_ACTIONS:
             results = []
             for action in actions:
@@ -281,10 +565,7 @@ class AndroMancerAgent:
                         {"mission": self.mission.id}
                     )
                 results.append(result)
-                await event_bus.emit(AgentEvent(
-                    time.time(), EventType.ACTION,
-                    {"capability": action["capability"], "success": result.success}
-                ))
+                await self._emit(EventType.ACTION, {"capability": action["capability"], "success": result.success})
                 if not result.success and action.get("critical", False):
                     break
             return results
@@ -309,10 +590,7 @@ class AndroMancerAgent:
             results.extend(parallel_results)
 
             for action, result in zip(independent, parallel_results):
-                await event_bus.emit(AgentEvent(
-                    time.time(), EventType.ACTION,
-                    {"capability": action["capability"], "success": result.success}
-                ))
+                await self._emit(EventType.ACTION, {"capability": action["capability"], "success": result.success})
 
         for action in dependent:
             error = self._validate_action(action)
@@ -323,18 +601,45 @@ class AndroMancerAgent:
                     action["capability"], action.get("params", {}), {"mission": self.mission.id}
                 )
             results.append(result)
-            await event_bus.emit(AgentEvent(
-                time.time(), EventType.ACTION,
-                {"capability": action["capability"], "success": result.success}
-            ))
+            await self._emit(EventType.ACTION, {"capability": action["capability"], "success": result.success})
+
+        return results
 
+    async def _execute_batched(self, actions: List[Dict]) -> List[ExecutionResult]:
+        """Sequential execution where runs of consecutive input actions share one round trip"""
+        context = {"mission": self.mission.id}
+        results: List[ExecutionResult] = []
+        i = 0
+        while i < len(actions):
+            run = []
+            while i < len(actions) and self.registry.is_batchable(actions[i]) and not self._validate_action(actions[i]):
+                run.append(actions[i])
+                i += 1
+                if run[-1].get("critical", False):
+                    break  # Later actions must wait for this one's outcome
+
+            if len(run) > 1:
+                run_results = await self.registry.execute_batch(run, context)
+            elif run:
+                run_results = [await self.registry.execute(run[0]["capability"], run[0].get("params", {}), context)]
+            else:
+                run = [actions[i]]
+                i += 1
+                error = self._validate_action(run[0])
+                if error:
+                    run_results = [ExecutionResult(False, error=error)]
+                else:
+                    run_results = [await self.registry.execute(run[0]["capability"], run[0].get("params", {}), context)]
+
+            for action, result in zip(run, run_results):
+                results.append(result)
+                await self._emit(EventType.ACTION, {"capability": action["capability"], "success": result.success})
+                if not result.success and action.get("critical", False):
+                    return results
         return results
 
     async def _check_safety(self, name: str, params: Dict, context: Dict) -> bool:
-        await event_bus.emit(AgentEvent(
-            time.time(), EventType.SAFETY_CHECK,
-            {"capability": name, "params": params}
-        ))
+        await self._emit(EventType.SAFETY_CHECK, {"capability": name, "params": params})
         # Automatic approval for now, as in original code
         return True
 
@@ -345,6 +650,7 @@ class AndroMancerAgent:
     async def _complete_mission(self):
         if self.mission and self.mission.status != MissionStatus.FAILED:
             self.mission.status = MissionStatus.COMPLETED
+        decision_cache.flush()
 
         # Generate AI Summary
         summary = "Misión finalizada."
@@ -355,15 +661,9 @@ class AndroMancerAgent:
             )
             print(f"\n🤖 {summary}\n") # Output to console for user
 
-        await event_bus.emit(AgentEvent(
-            time.time(), EventType.REPORT,
-            {"summary": summary}
-        ))
+        await self._emit(EventType.REPORT, {"summary": summary})
 
-        await event_bus.emit(AgentEvent(
-            time.time(), EventType.COMPLETION,
-            {"mission_id": self.mission.id if self.mission else None, "status": self.mission.status.name if self.mission else "UNKNOWN"}
-        ))
+        await self._emit(EventType.COMPLETION, {"mission_id": self.mission.id if self.mission else None, "status": self.mission.status.name if self.mission else "UNKNOWN"})
 
     def _save_state(self):
         try:
@@ -0,0 +1,229 @@
+import json
+import logging
+import re
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from andromancer import config as cfg
+from andromancer.core.capabilities.base import ADBCapability
+from andromancer.utils.adb import safe_serial
+from andromancer.utils.apps import APP_MAP
+from andromancer.utils.text import normalize_text
+
+logger = logging.getLogger("AndroMancer.AppCatalog")
+
+# Package segments that say nothing about the app itself
+_NOISE_SEGMENTS = {"com", "org", "net", "android", "google", "apps", "app", "mobile", "client", "www"}
+
+@dataclass
+class AppEntry:
+    package: str
+    version: str = ""
+    component: Optional[str] = None
+    label: str = ""
+    names: List[str] = field(default_factory=list)
+
+def _label_for(package: str) -> str:
+    """Best-effort user-visible label; adb has no cheap way to read app labels"""
+    for alias, pkg in APP_MAP.items():
+        if pkg == package:
+            return alias
+    segments = [s for s in package.lower().split(".") if s not in _NOISE_SEGMENTS]
+    return segments[-1] if segments else package.split(".")[-1]
+
+def _names_for(entry: AppEntry) -> List[str]:
+    names = {normalize_text(entry.label), entry.package.lower()}
+    names.update(alias for alias, pkg in APP_MAP.items() if pkg == entry.package)
+    names.update(s for s in entry.package.lower().split(".") if s not in _NOISE_SEGMENTS and len(s) > 2)
+    if entry.component:
+        activity = entry.component.split("/")[-1].split(".")[-1]
+        activity = re.sub(r"(Activity|Launcher|Main)$", "", activity)
+        if len(activity) > 2:
+            names.add(normalize_text(activity))
+    return sorted(n for n in names if n)
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _edit_distance(a: str, b: str) -> int:
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+class AppCatalog(ADBCapability):
+    """Persistent per-device catalog of installed apps.
+
+    Stores package names, versions, launcher components and searchable names
+    under STATE_DIR, refreshes only the packages whose version changed, and
+    answers fuzzy name lookups from an in-memory trigram index.
+    """
+    def __init__(self, device_id: Optional[str] = None, path: Path = None, ttl: float = None):
+        super().__init__(device_id)
+        self.path = path or cfg.STATE_DIR / f"apps_{safe_serial(device_id)}.json"
+        self.ttl = cfg.APP_CATALOG_TTL if ttl is None else ttl
+        self.entries: Dict[str, AppEntry] = {}
+        self.refreshed_at = 0.0
+        self._index: Dict[str, Set[str]] = defaultdict(set)
+        self._load()
+
+    # --- Persistence ---
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            self.entries = {e["package"]: AppEntry(**e) for e in data.get("apps", [])}
+            self.refreshed_at = data.get("refreshed_at", 0.0)
+            self._rebuild_index()
+        except Exception as e:
+            logger.error(f"App catalog load error: {e}")
+
+    def _save(self):
+        try:
+            with open(self.path, "w") as f:
+                json.dump({"refreshed_at": self.refreshed_at, "apps": [asdict(e) for e in self.entries.values()]}, f)
+        except Exception as e:
+            logger.error(f"App catalog save error: {e}")
+
+    # --- Refresh ---
+
+    @property
+    def stale(self) -> bool:
+        return not self.entries or time.time() - self.refreshed_at > self.ttl
+
+    async def _installed_versions(self) -> Dict[str, str]:
+        result = await self._shell("pm list packages --show-versioncode")
+        versions = {}
+        for line in result.stdout.splitlines():
+            match = re.match(r"package:(\S+)(?:\s+versionCode:(\S+))?", line.strip())
+            if match:
+                versions[match.group(1)] = match.group(2) or ""
+        return versions
+
+    async def _launcher_components(self, packages: List[str]) -> Dict[str, str]:
+        if len(packages) > 10:
+            # One query for every launcher activity beats one round trip per package
+            result = await self._shell(
+                "cmd package query-activities --brief -a android.intent.action.MAIN -c android.intent.category.LAUNCHER"
+            )
+            lines = result.stdout.splitlines()
+        else:
+            lines = []
+            for package in packages:
+                result = await self._shell(
+                    f"cmd package resolve-activity --brief -a android.intent.action.MAIN "
+                    f"-c android.intent.category.LAUNCHER {package}"
+                )
+                lines.extend(result.stdout.splitlines()[-1:])
+
+        components = {}
+        for line in lines:
+            line = line.strip()
+            if "/" in line and " " not in line:
+                package, activity = line.split("/", 1)
+                if activity.startswith("."):
+                    activity = package + activity
+                components.setdefault(package, f"{package}/{activity}")
+        return components
+
+    async def refresh(self, force: bool = False) -> int:
+        """Syncs with the device; returns how many packages were added, updated or removed"""
+        if not force and not self.stale:
+            return 0
+
+        versions = await self._installed_versions()
+        if not versions:
+            raise RuntimeError("Device returned no packages")
+
+        changed = [p for p, v in versions.items() if p not in self.entries or self.entries[p].version != v]
+        removed = [p for p in self.entries if p not in versions]
+
+        if changed:
+            components = await self._launcher_components(changed)
+            for package in changed:
+                entry = AppEntry(package=package, version=versions[package], component=components.get(package))
+                entry.label = _label_for(package)
+                entry.names = _names_for(entry)
+                self.entries[package] = entry
+        for package in removed:
+            del self.entries[package]
+
+        if changed or removed:
+            self._rebuild_index()
+            logger.info(f"App catalog refreshed: {len(changed)} changed, {len(removed)} removed")
+        self.refreshed_at = time.time()
+        self._save()
+        return len(changed) + len(removed)
+
+    # --- Fuzzy index ---
+
+    def _rebuild_index(self):
+        self._index = defaultdict(set)
+        for package, entry in self.entries.items():
+            for name in entry.names:
+                for gram in _trigrams(name):
+                    self._index[gram].add(package)
+
+    def search(self, query: str, limit: int = 5) -> List[Tuple[float, AppEntry]]:
+        query = normalize_text(query).strip()
+        if not query:
+            return []
+        grams = _trigrams(query)
+        candidates: Set[str] = set()
+        for gram in grams:
+            candidates |= self._index.get(gram, set())
+
+        scored = []
+        for package in candidates:
+            entry = self.entries[package]
+            best = 0.0
+            for name in entry.names:
+                if name == query:
+                    best = 1.0
+                    break
+                name_grams = _trigrams(name)
+                jaccard = len(grams & name_grams) / len(grams | name_grams)
+                similarity = 1 - _edit_distance(query, name) / max(len(query), len(name))
+                best = max(best, (jaccard + similarity) / 2)
+            # Launchable apps are what users mean by an app name
+            if entry.component:
+                best += 0.01
+            scored.append((best, entry))
+
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return scored[:limit]
+
+    def resolve(self, name: str, min_score: float = 0.6) -> Optional[AppEntry]:
+        results = self.search(name, limit=1)
+        if results and results[0][0] >= min_score:
+            return results[0][1]
+        return None
+
+    def component_for(self, package: str) -> Optional[str]:
+        entry = self.entries.get(package)
+        return entry.component if entry else None
+
+_catalogs: Dict[Optional[str], AppCatalog] = {}
+
+async def get_app_catalog(device_id: Optional[str] = None) -> AppCatalog:
+    """Shared catalog for a device, refreshed when older than APP_CATALOG_TTL"""
+    catalog = _catalogs.get(device_id)
+    if catalog is None:
+        serial = device_id or await ADBCapability(device_id)._serial()
+        catalog = _catalogs[device_id] = AppCatalog(serial)
+    if catalog.stale:
+        try:
+            await catalog.refresh()
+        except Exception as e:
+            logger.warning(f"App catalog refresh failed: {e}")
+    return catalog
@@ -6,9 +6,13 @@ from abc import ABC, abstractmethod
 import time
 import logging
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Protocol, runtime_checkable, Callable
+from typing import Any, Dict, List, Optional, Protocol, Tuple, runtime_checkable, Callable
 from concurrent.futures import ThreadPoolExecutor
 from andromancer.utils.adb import adb_manager
+from andromancer.utils.adb_shell import shell_pool, ADBSessionError
+from andromancer.utils.adb_protocol import adb_client, ADBProtocolError
+from andromancer.core.capabilities.ui_cache import observation_cache
+from andromancer import config as cfg
 
 logger = logging.getLogger("AndroMancer.Capabilities")
 
@@ -30,44 +34,109 @@ class Capability(Protocol):
         ...
 
 class ADBCapability:
-    """Base class for ADB-based capabilities"""
-    async def _adb(self, cmd: List[str], timeout: int = 15) -> subprocess.CompletedProcess:
+    """Base class for ADB-based capabilities.
+
+    `device_id` pins the capability to one serial; when unset it targets the
+    default device picked by `adb_manager`.
+    """
+    def __init__(self, device_id: Optional[str] = None):
+        self.device_id = device_id
+
+    async def _serial(self) -> Optional[str]:
+        if getattr(self, "device_id", None):
+            return self.device_id
         await adb_manager.ensure_connected()
+        return adb_manager.device_id
+
+    async def _adb(self, cmd: List[str], timeout: int = 15) -> subprocess.CompletedProcess:
+        serial = await self._serial()
         loop = asyncio.get_event_loop()
         with ThreadPoolExecutor() as pool:
             return await loop.run_in_executor(
                 pool,
                 lambda: subprocess.run(
-                    ["adb"] + cmd,
+                    ["adb", "-s", serial] + cmd,
                     capture_output=True,
                     text=True,
                     timeout=timeout
                 )
             )
 
+    async def _shell(self, command: str, timeout: int = 15) -> subprocess.CompletedProcess:
+        """Runs a shell command on the device without forking `adb` when possible.
+
+        Tries the persistent session pool first, then the native server protocol
+        client, and finally a one-off `adb shell` subprocess. A path is only left
+        for the next one if the command never reached the device; a timeout or an
+        ADBCommandLostError is raised, since running an input command twice would
+        repeat the tap or the typed text.
+        """
+        serial = await self._serial()
+        if cfg.ADB_SHELL_POOL:
+            try:
+                return await shell_pool.run(serial, command, timeout=timeout)
+            except (ADBSessionError, OSError) as e:
+                logger.warning(f"Shell session unavailable: {e}")
+        if cfg.ADB_NATIVE_CLIENT:
+            try:
+                return await adb_client.shell(serial, command, timeout=timeout)
+            except (ADBProtocolError, OSError) as e:
+                logger.warning(f"Native adb client unavailable: {e}")
+        return await self._adb(["shell", command], timeout=timeout)
+
+    async def _exec_out(self, command: str, timeout: int = 15) -> bytes:
+        """Raw binary stdout of a device command, streamed straight to the host"""
+        serial = await self._serial()
+        if cfg.ADB_NATIVE_CLIENT:
+            try:
+                return await adb_client.exec_out(serial, command, timeout=timeout)
+            except (ADBProtocolError, OSError) as e:
+                logger.warning(f"Native adb client unavailable: {e}")
+        loop = asyncio.get_event_loop()
+        with ThreadPoolExecutor() as pool:
+            result = await loop.run_in_executor(
+                pool,
+                lambda: subprocess.run(
+                    ["adb", "-s", serial, "exec-out", command],
+                    capture_output=True,
+                    timeout=timeout
+                )
+            )
+        return result.stdout
+
 class CapabilityRegistry:
     """Registry for capabilities"""
     def __init__(self):
         self._capabilities: Dict[str, Capability] = {}
         self.safety_check_callback: Optional[Callable[[str, Dict, Dict], Coroutine]] = None
+        # Bumped on every registration; the schema below is rebuilt lazily after that
+        self.version = 0
+        self._schema: Optional[List[Dict]] = None
 
     def register(self, capability: Capability):
         self._capabilities[capability.name] = capability
+        self.version += 1
+        self._schema = None
         logger.info(f"Capability registered: {capability.name}")
 
     def get(self, name: str) -> Optional[Capability]:
         return self._capabilities.get(name)
 
     def list_capabilities(self) -> List[Dict]:
-        return [
-            {
-                "name": cap.name,
-                "description": cap.description,
-                "risk": cap.risk_level,
-                "parameters": self._get_cap_params(cap)
-            }
-            for cap in self._capabilities.values()
-        ]
+        """Capability schema for the prompt. The same list is returned until the next
+        `register`, so callers can compare by identity and must not modify it.
+        """
+        if self._schema is None:
+            self._schema = [
+                {
+                    "name": cap.name,
+                    "description": cap.description,
+                    "risk": cap.risk_level,
+                    "parameters": self._get_cap_params(cap)
+                }
+                for cap in self._capabilities.values()
+            ]
+        return self._schema
 
     def _get_cap_params(self, cap: Capability) -> Dict[str, str]:
         sig = inspect.signature(cap.execute)
@@ -102,6 +171,7 @@ class CapabilityRegistry:
             if not approved:
                 return ExecutionResult(False, error="Safety check failed or rejected")
 
+        self._invalidate_observation(cap)
         start = time.time()
         try:
             result = await cap.execute(**params)
@@ -109,3 +179,76 @@ class CapabilityRegistry:
             return result
         except Exception as e:
             return ExecutionResult(False, error=str(e), execution_time=time.time()-start)
+        finally:
+            self._invalidate_observation(cap)
+
+    def _invalidate_observation(self, cap: Capability):
+        # Invalidate before and after, so a dump racing with the action is never reused
+        if getattr(cap, "mutates_ui", False):
+            observation_cache.invalidate(getattr(cap, "device_id", None))
+
+    def is_batchable(self, action: Dict) -> bool:
+        cap = self._capabilities.get(action.get("capability"))
+        return bool(cap and getattr(cap, "batchable", False) and cap.risk_level not in ["high", "critical"])
+
+    async def execute_batch(self, actions: List[Dict], context: Dict = None) -> List[ExecutionResult]:
+        """Runs consecutive input actions as a single shell script in one round trip.
+
+        Commands keep their order on the device and each one echoes its own exit
+        status, so every action still gets its own ExecutionResult.
+        """
+        results: List[Optional[ExecutionResult]] = [None] * len(actions)
+        script, pending = [], []
+        for i, action in enumerate(actions):
+            cap = self._capabilities[action["capability"]]
+            try:
+                command, data = cap.build_command(**action.get("params", {}))
+            except (TypeError, ValueError) as e:
+                results[i] = ExecutionResult(False, error=str(e))
+                continue
+            script.append(f"{command}; echo \"{BATCH_MARKER}{i}:$?\"")
+            pending.append((i, data))
+
+        if pending:
+            runner = self._capabilities[actions[pending[0][0]]["capability"]]
+            self._invalidate_observation(runner)
+            start = time.time()
+            try:
+                output = await runner._shell("\n".join(script))
+                statuses = _parse_batch_output(output.stdout)
+            except Exception as e:
+                statuses = {}
+                for i, _ in pending:
+                    results[i] = ExecutionResult(False, error=f"Batch failed: {e}")
+            self._invalidate_observation(runner)
+            elapsed = (time.time() - start) / len(pending)
+
+            for i, data in pending:
+                if results[i] is not None:
+                    continue
+                returncode, out = statuses.get(i, (None, ""))
+                if returncode is None:
+                    results[i] = ExecutionResult(False, data=data, error="No exit status reported for batched action", execution_time=elapsed)
+                else:
+                    success = returncode == 0
+                    results[i] = ExecutionResult(
+                        success, data=data, error=None if success else (out or f"exit status {returncode}"),
+                        metadata={"batched": True, "batch_size": len(pending)},
+                        execution_time=elapsed
+                    )
+        return results
+
+BATCH_MARKER = "__AM_RC_"
+
+def _parse_batch_output(output: str) -> Dict[int, Tuple[int, str]]:
+    """Maps action index to (exit status, output printed before its marker)"""
+    statuses: Dict[int, Tuple[int, str]] = {}
+    buffer: List[str] = []
+    for line in output.splitlines():
+        if line.startswith(BATCH_MARKER):
+            index, _, code = line[len(BATCH_MARKER):].partition(":")
+            statuses[int(index)] = (int(code), "\n".join(buffer))
+            buffer = []
+        else:
+            buffer.append(line)
+    return statuses
@@ -1,54 +1,117 @@
-import re
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 from andromancer.core.capabilities.base import ADBCapability, Capability, ExecutionResult
+from andromancer.core.capabilities.ui_cache import observation_cache
+from andromancer.core.capabilities.ui_element import UIElement, parse_bounds
 
 class TapCapability(ADBCapability, Capability):
     name = "tap"
-    description = "Toca en coordenadas (x, y) o en elemento UI"
+    description = "Toca en coordenadas (x, y), en el elemento UI con id `element_id` de la última observación, en el elemento cuyo texto es `label` o en `element`"
     risk_level = "low"
+    batchable = True
+    mutates_ui = True
 
-    async def execute(self, x: Optional[int] = None, y: Optional[int] = None,
-                     element: Optional[Dict] = None) -> ExecutionResult:
-        if element:
-            bounds = element.get('bounds', '')
-            nums = [int(n) for n in re.findall(r"-?\d+", bounds)]
-            if len(nums) >= 4:
-                x, y = (nums[0] + nums[2]) // 2, (nums[1] + nums[3]) // 2
+    def build_command(self, x: Optional[int] = None, y: Optional[int] = None,
+                      element: Optional[Dict] = None, element_id: Optional[int] = None,
+                      label: Optional[str] = None) -> Tuple[str, Dict]:
+        if element_id is not None:
+            element = self._element_by_id(element_id)
+        elif label:
+            element = self._element_by_label(label)
+
+        if isinstance(element, UIElement):
+            x, y = element.cx, element.cy
+        elif element:
+            # Elements echoed back by the LLM arrive as plain dicts
+            bounds = parse_bounds(element.get('bounds', ''))
+            if bounds:
+                x, y = (bounds[0] + bounds[2]) // 2, (bounds[1] + bounds[3]) // 2
 
         if x is None or y is None:
-            return ExecutionResult(False, error="Coordinates required")
+            raise ValueError("Coordinates required")
+
+        return f"input tap {x} {y}", {"x": x, "y": y}
+
+    def _element_by_id(self, element_id) -> UIElement:
+        """Resolves an index from the prompt's element table against the last dump"""
+        observation = observation_cache.latest(self.device_id)
+        elements = observation.get("elements", []) if observation else []
+        try:
+            index = int(element_id)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid element_id: {element_id!r}")
+        if not 0 <= index < len(elements):
+            raise ValueError(f"Unknown element_id {index}: the current screen has {len(elements)} elements")
+        return elements[index]
+
+    def _element_by_label(self, label: str) -> UIElement:
+        """First element of the last dump whose label is `label`, else one containing it"""
+        observation = observation_cache.latest(self.device_id)
+        elements = observation.get("elements", []) if observation else []
+        wanted = label.strip().lower()
+        labelled = [e for e in elements if e.label]
+        match = next((e for e in labelled if e.label.lower() == wanted), None) \
+            or next((e for e in labelled if wanted in e.label.lower()), None)
+        if match is None:
+            raise ValueError(f"No element labelled {label!r} on the current screen")
+        return match
+
+    async def execute(self, x: Optional[int] = None, y: Optional[int] = None,
+                     element: Optional[Dict] = None, element_id: Optional[int] = None,
+                     label: Optional[str] = None) -> ExecutionResult:
+        try:
+            command, data = self.build_command(x, y, element, element_id, label)
+        except ValueError as e:
+            return ExecutionResult(False, error=str(e))
 
-        result = await self._adb(["shell", "input", "tap", str(x), str(y)])
+        result = await self._shell(command)
         success = result.returncode == 0
-        return ExecutionResult(success, data={"x": x, "y": y}, error=None if success else result.stderr)
+        return ExecutionResult(success, data=data, error=None if success else result.stderr)
 
 class TypeCapability(ADBCapability, Capability):
     name = "type"
     description = "Escribe texto en campo focalizado"
     risk_level = "medium"
+    batchable = True
+    mutates_ui = True
 
-    async def execute(self, text: str) -> ExecutionResult:
+    def build_command(self, text: str) -> Tuple[str, Dict]:
         safe_text = text.replace("'", "\\'").replace('"', '\\"').replace(" ", "%s")
-        result = await self._adb(["shell", "input", "text", safe_text])
+        return f"input text {safe_text}", {"text": text}
+
+    async def execute(self, text: str) -> ExecutionResult:
+        command, data = self.build_command(text)
+        result = await self._shell(command)
         success = result.returncode == 0
-        return ExecutionResult(success, data={"text": text}, error=None if success else result.stderr)
+        return ExecutionResult(success, data=data, error=None if success else result.stderr)
 
 class SwipeCapability(ADBCapability, Capability):
     name = "swipe"
     description = "Desliza desde (x1,y1) hasta (x2,y2) con duración en ms"
     risk_level = "low"
+    batchable = True
+    mutates_ui = True
+
+    def build_command(self, x1: int, y1: int, x2: int, y2: int, duration: int = 300) -> Tuple[str, Dict]:
+        return f"input swipe {x1} {y1} {x2} {y2} {duration}", {"x1": x1, "y1": y1, "x2": x2, "y2": y2}
 
     async def execute(self, x1: int, y1: int, x2: int, y2: int, duration: int = 300) -> ExecutionResult:
-        result = await self._adb(["shell", "input", "swipe", str(x1), str(y1), str(x2), str(y2), str(duration)])
+        command, data = self.build_command(x1, y1, x2, y2, duration)
+        result = await self._shell(command)
         success = result.returncode == 0
-        return ExecutionResult(success, data={"x1": x1, "y1": y1, "x2": x2, "y2": y2}, error=None if success else result.stderr)
+        return ExecutionResult(success, data=data, error=None if success else result.stderr)
 
 class BackCapability(ADBCapability, Capability):
     name = "back"
     description = "Presiona el botón de retroceso"
     risk_level = "low"
+    batchable = True
+    mutates_ui = True
+
+    def build_command(self) -> Tuple[str, Dict]:
+        return "input keyevent 4", {"action": "back"}
 
     async def execute(self) -> ExecutionResult:
-        result = await self._adb(["shell", "input", "keyevent", "4"])
+        command, data = self.build_command()
+        result = await self._shell(command)
         success = result.returncode == 0
-        return ExecutionResult(success, data={"action": "back"}, error=None if success else result.stderr)
+        return ExecutionResult(success, data=data, error=None if success else result.stderr)
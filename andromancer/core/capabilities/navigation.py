@@ -1,23 +1,33 @@
 import asyncio
 from andromancer.core.capabilities.base import ADBCapability, Capability, ExecutionResult
 from andromancer.utils.apps import get_package_name
+from andromancer.core.app_catalog import get_app_catalog
 
 class OpenAppCapability(ADBCapability, Capability):
     name = "open_app"
     description = "Abre aplicación por nombre o package"
     risk_level = "low"
+    mutates_ui = True
 
     async def execute(self, app_name: str = None, package: str = None) -> ExecutionResult:
         identifier = package or app_name
         if not identifier:
             return ExecutionResult(False, error="app_name or package is required")
 
-        target_package = get_package_name(identifier)
+        catalog = await get_app_catalog(self.device_id)
+        target_package = get_package_name(identifier, catalog)
 
         if target_package == "HOME":
-            await self._adb(["shell", "input", "keyevent", "3"])
+            await self._shell("input keyevent 3")
         else:
-            result = await self._adb(["shell", "monkey", "-p", target_package, "1"])
+            component = catalog.component_for(target_package)
+            if component:
+                # -W returns once the activity is displayed, so no fixed sleep is needed
+                result = await self._shell(f"am start -W -n {component}")
+                if result.returncode == 0 and "Error" not in result.stdout:
+                    return ExecutionResult(True, data={"package": target_package, "component": component})
+
+            result = await self._shell(f"monkey -p {target_package} 1")
             if result.returncode != 0:
                 return ExecutionResult(False, error=f"Failed to open {target_package}: {result.stderr}")
 
@@ -28,6 +38,8 @@ class WaitCapability(Capability):
     name = "wait"
     description = "Espera una cantidad determinada de segundos (útil para pantallas de carga)"
     risk_level = "low"
+    # The screen keeps loading while we wait
+    mutates_ui = True
 
     async def execute(self, seconds: float = 2.0) -> ExecutionResult:
         await asyncio.sleep(seconds)
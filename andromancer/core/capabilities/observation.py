@@ -1,11 +1,17 @@
 import os
-import re
 import asyncio
+import logging
 import tempfile
 import xml.etree.ElementTree as ET
 from pathlib import Path
 from typing import List, Dict
 from andromancer.core.capabilities.base import ADBCapability, Capability, ExecutionResult
+from andromancer.core.capabilities.ui_cache import observation_cache
+from andromancer.core.capabilities.ui_element import UIElement
+from andromancer import config as cfg
+from andromancer.utils.adb import safe_serial
+
+logger = logging.getLogger("AndroMancer.Observation")
 
 class UIScrapeCapability(ADBCapability, Capability):
     name = "get_ui"
@@ -13,75 +19,95 @@ class UIScrapeCapability(ADBCapability, Capability):
     risk_level = "low"
 
     async def execute(self, use_cache: bool = False) -> ExecutionResult:
-        try:
-            temp_dir = Path(tempfile.gettempdir())
-
-            if not os.access("/tmp", os.W_OK):
-                temp_dir = Path.home() / ".cache" / "andromancer"
+        if use_cache:
+            cached = observation_cache.get(self.device_id)
+            if cached is not None:
+                return ExecutionResult(True, data=cached, metadata={"cached": True})
 
-            temp_dir.mkdir(parents=True, exist_ok=True)
-            local_ui_path = temp_dir / "ui.xml"
-
-            await self._adb(["shell", "uiautomator", "dump", "/sdcard/ui.xml"])
-            await asyncio.sleep(0.3)
+        # An action that lands while the dump runs makes this observation stale
+        generation = observation_cache.generation(self.device_id)
+        try:
+            xml_content = None
+            if cfg.UI_DUMP_STREAMING:
+                try:
+                    xml_content = await self._dump_streaming()
+                except Exception as e:
+                    logger.debug(f"Streaming UI dump failed, using file dump: {e}")
 
-            result = await self._adb(["pull", "/sdcard/ui.xml", str(local_ui_path)])
-            if result.returncode != 0:
-                return ExecutionResult(False, error="Failed to pull UI: " + (result.stderr or ""))
+            if xml_content is None:
+                xml_content = await self._dump_via_file()
 
             try:
-                with open(local_ui_path, "r", encoding="utf-8") as f:
-                    xml_content = f.read()
-
-                root = ET.fromstring(xml_content)
-                elements = self._parse_nodes(root)
-
-                # Identify current package
-                current_package = "unknown"
-                if elements:
-                    # Try to find the most common package or just the first one
-                    current_package = elements[0].get('package', 'unknown')
-
-                screen_summary = self._summarize_screen(elements, current_package)
-
-                return ExecutionResult(True, data={
-                    "xml": xml_content,
-                    "elements": elements,
-                    "summary": screen_summary,
-                    "current_package": current_package
-                })
+                observation = self._build_observation(xml_content)
             except Exception as e:
                 return ExecutionResult(False, error=f"XML parse error: {str(e)}")
+            observation_cache.put(self.device_id, observation, generation)
+            return ExecutionResult(True, data=observation)
         except Exception as e:
             return ExecutionResult(False, error=f"UI scrape error: {str(e)}")
 
-    def _parse_nodes(self, root) -> List[Dict]:
-        elements = []
-        for node in root.iter('node'):
-            if node.get('clickable') == 'true':
-                elements.append({
-                    "text": node.get('text', ''),
-                    "content_desc": node.get('content-desc', ''),
-                    "resource_id": node.get('resource-id', ''),
-                    "class": node.get('class', ''),
-                    "bounds": node.get('bounds', ''),
-                    "package": node.get('package', '')
-                })
-        return elements
-
-    def _summarize_screen(self, elements: List[Dict], package: str = "unknown") -> str:
+    async def _dump_streaming(self) -> str:
+        """Pipes the dump to the host through exec-out, no sleep and no temp files"""
+        raw = await self._exec_out("uiautomator dump /dev/tty")
+        # uiautomator appends "UI hierchary dumped to: /dev/tty" after the document
+        start = raw.find(b"<?xml")
+        if start < 0:
+            start = raw.find(b"<hierarchy")
+        end = raw.rfind(b"</hierarchy>")
+        if start < 0 or end < 0:
+            raise ValueError(f"No UI hierarchy in dump output: {raw[:200]!r}")
+        return raw[start:end + len(b"</hierarchy>")].decode("utf-8", errors="replace")
+
+    async def _dump_via_file(self) -> str:
+        """Legacy path: dump to /sdcard, pull into the temp dir and read it back"""
+        temp_dir = Path(tempfile.gettempdir())
+
+        if not os.access("/tmp", os.W_OK):
+            temp_dir = Path.home() / ".cache" / "andromancer"
+
+        temp_dir.mkdir(parents=True, exist_ok=True)
+        # One file per device so concurrent agents never read each other's dump
+        serial = await self._serial()
+        local_ui_path = temp_dir / f"ui_{safe_serial(serial)}.xml"
+
+        await self._adb(["shell", "uiautomator", "dump", "/sdcard/ui.xml"])
+        await asyncio.sleep(0.3)
+
+        result = await self._adb(["pull", "/sdcard/ui.xml", str(local_ui_path)])
+        if result.returncode != 0:
+            raise RuntimeError("Failed to pull UI: " + (result.stderr or ""))
+
+        with open(local_ui_path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def _build_observation(self, xml_content: str) -> Dict:
+        root = ET.fromstring(xml_content)
+        elements = self._parse_nodes(root)
+
+        # Identify current package
+        current_package = "unknown"
+        if elements:
+            # Try to find the most common package or just the first one
+            current_package = elements[0].package or 'unknown'
+
+        screen_summary = self._summarize_screen(elements, current_package)
+
+        return {
+            "xml": xml_content,
+            "elements": elements,
+            "summary": screen_summary,
+            "current_package": current_package
+        }
+
+    def _parse_nodes(self, root) -> List[UIElement]:
+        return [UIElement.from_node(node) for node in root.iter('node') if node.get('clickable') == 'true']
+
+    def _summarize_screen(self, elements: List[UIElement], package: str = "unknown") -> str:
         summary_items = []
         for e in elements[:25]:
-            text = e['text'] or e['content_desc']
+            text = e.label
             if text:
-                # Extract center from bounds "[x1,y1][x2,y2]"
-                bounds = e.get('bounds', '')
-                nums = [int(n) for n in re.findall(r"-?\d+", bounds)]
-                if len(nums) >= 4:
-                    x, y = (nums[0] + nums[2]) // 2, (nums[1] + nums[3]) // 2
-                    summary_items.append(f"'{text}' at ({x},{y})")
-                else:
-                    summary_items.append(f"'{text}'")
+                summary_items.append(f"'{text}' at ({e.cx},{e.cy})")
 
         base = f"App: {package} | "
         if summary_items:
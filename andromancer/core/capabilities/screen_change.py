@@ -0,0 +1,176 @@
+import asyncio
+import hashlib
+import logging
+import struct
+import time
+import zlib
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+import numpy as np
+from andromancer.core.capabilities.base import ADBCapability
+from andromancer import config as cfg
+
+logger = logging.getLogger("AndroMancer.ScreenChange")
+
+_GZIP_MAGIC = b"\x1f\x8b"
+# Recent checks and dumps weighed against each other, and how many checks are needed first
+_COST_WINDOW = 20
+_MIN_SAMPLES = 10
+# Observations taken without checking before the cost is measured again
+_REPROBE_AFTER = 50
+
+@dataclass
+class ScreenSignature:
+    focus: str
+    phash: int
+    thumbnail: Optional[np.ndarray] = None
+
+class ScreenChangeDetector(ADBCapability):
+    """Cheap check for whether the screen changed since the last UI dump.
+
+    Combines the focused window reported by `dumpsys window` with a difference
+    hash of a downscaled raw `screencap`. Both are far cheaper than a full
+    uiautomator dump, so the agent can reuse its last observation when neither
+    signal moved. The block thumbnail behind the hash is compared as well, since
+    dHash alone can miss a few typed characters.
+
+    A raw frame is width x height x 4 bytes (~10 MB at 1080x2400), so it is
+    gzipped on the device when toybox has gzip; UI frames are mostly flat
+    color and shrink to a few hundred KB. The detector also times itself:
+    once checks cost more than the dumps they save (check time above hit
+    rate x dump time, e.g. over slow wireless adb), `worthwhile` turns it off
+    and measures again after `_REPROBE_AFTER` observations.
+    """
+    def __init__(self, device_id: Optional[str] = None, hash_size: int = None, threshold: int = None,
+                 tolerance: float = None):
+        super().__init__(device_id)
+        self.hash_size = hash_size or cfg.SCREEN_HASH_SIZE
+        self.threshold = cfg.SCREEN_HASH_THRESHOLD if threshold is None else threshold
+        self.tolerance = cfg.SCREEN_PIXEL_TOLERANCE if tolerance is None else tolerance
+        self._baseline: Optional[ScreenSignature] = None
+        self.checks = 0
+        self.changed = 0
+        self.dumps_saved = 0
+        self.skipped = 0
+        self._gzip: Optional[bool] = None
+        self._check_ms: deque = deque(maxlen=_COST_WINDOW)
+        self._dump_ms: deque = deque(maxlen=_COST_WINDOW)
+        self._hits: deque = deque(maxlen=_COST_WINDOW)
+        self._skipped_in_row = 0
+
+    async def _focus(self) -> str:
+        result = await self._shell("dumpsys window | grep -E 'mCurrentFocus|mFocusedApp'")
+        return " ".join(line.strip() for line in result.stdout.splitlines())
+
+    async def _frame(self) -> bytes:
+        """Raw screencap bytes, gzipped in transit when the device can"""
+        if self._gzip is not False:
+            data = await self._exec_out("screencap | gzip -1")
+            if data[:2] == _GZIP_MAGIC:
+                self._gzip = True
+                return zlib.decompress(data, 16 + zlib.MAX_WBITS)
+            logger.debug("Device screencap not gzipped, pulling raw frames")
+            self._gzip = False
+        return await self._exec_out("screencap")
+
+    async def _screen_hash(self) -> Tuple[int, Optional[np.ndarray]]:
+        raw = await self._frame()
+        width, height = struct.unpack("<II", raw[:8])
+        # Header is width, height, format and (Android 12+) a colorspace field
+        header = len(raw) - width * height * 4
+        if width == 0 or height == 0 or header not in (12, 16):
+            # Unknown pixel format, fall back to an exact content hash
+            return int(hashlib.md5(raw).hexdigest(), 16), None
+
+        pixels = np.frombuffer(raw, dtype=np.uint8, offset=header).reshape(height, width, 4)
+        # Skip the status bar so the clock and notification icons don't count as changes,
+        # and subsample before averaging; blocks are far larger than 2px anyway
+        pixels = pixels[height // 20::2, ::2]
+        gray = pixels[..., :3].mean(axis=2, dtype=np.float32)
+        blocks = self.downscale(gray, self.hash_size, self.hash_size + 1)
+        return self.difference_hash(blocks), blocks
+
+    @staticmethod
+    def downscale(gray: np.ndarray, rows: int, cols: int) -> np.ndarray:
+        h, w = gray.shape
+        cropped = gray[:h - h % rows, :w - w % cols]
+        return cropped.reshape(rows, cropped.shape[0] // rows, cols, cropped.shape[1] // cols).mean(axis=(1, 3))
+
+    @staticmethod
+    def difference_hash(blocks: np.ndarray) -> int:
+        """dHash: one bit per pair of horizontally adjacent blocks"""
+        bits = (blocks[:, 1:] > blocks[:, :-1]).flatten()
+        return int("".join("1" if b else "0" for b in bits), 2)
+
+    async def signature(self) -> ScreenSignature:
+        focus, (phash, thumbnail) = await asyncio.gather(self._focus(), self._screen_hash())
+        return ScreenSignature(focus, phash, thumbnail)
+
+    def _same(self, a: ScreenSignature, b: ScreenSignature) -> bool:
+        if a.focus != b.focus or bin(a.phash ^ b.phash).count("1") > self.threshold:
+            return False
+        if a.thumbnail is None or b.thumbnail is None:
+            return True
+        return float(np.abs(a.thumbnail - b.thumbnail).max()) <= self.tolerance
+
+    def worthwhile(self) -> bool:
+        """Whether checking this step can pay off; call `check` only when it is True"""
+        if len(self._check_ms) < _MIN_SAMPLES or not self._dump_ms:
+            return True
+        saved_ms = np.mean(self._hits) * np.mean(self._dump_ms)
+        if np.mean(self._check_ms) < saved_ms:
+            return True
+        if self._skipped_in_row == 0:
+            logger.info(f"Screen change checks cost {np.mean(self._check_ms):.0f} ms and save "
+                        f"{saved_ms:.0f} ms of dumps on average; dumping every step for now")
+        self._skipped_in_row += 1
+        self.skipped += 1
+        # The next check needs a baseline taken right after a dump
+        self._baseline = None
+        if self._skipped_in_row >= _REPROBE_AFTER:
+            self._skipped_in_row = 0
+            self._check_ms.clear()
+            self._hits.clear()
+        return False
+
+    def record_dump(self, elapsed_ms: float):
+        self._dump_ms.append(elapsed_ms)
+
+    async def check(self) -> bool:
+        """True when the screen matches the baseline taken at the last dump.
+
+        The signature taken here becomes the new baseline whenever the screen
+        changed, since the caller is about to dump that screen.
+        """
+        self.checks += 1
+        start = time.perf_counter()
+        try:
+            current = await self.signature()
+        except Exception as e:
+            logger.debug(f"Change detection failed, forcing dump: {e}")
+            self._baseline = None
+            return False
+        finally:
+            self._check_ms.append((time.perf_counter() - start) * 1000)
+
+        hit = self._baseline is not None and self._same(self._baseline, current)
+        self._hits.append(hit)
+        if hit:
+            self.dumps_saved += 1
+            return True
+
+        self.changed += 1
+        self._baseline = current
+        return False
+
+    def reset(self):
+        self._baseline = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "checks": self.checks,
+            "changed": self.changed,
+            "dumps_saved": self.dumps_saved,
+            "skipped": self.skipped
+        }
@@ -0,0 +1,53 @@
+import time
+from typing import Dict, Optional, Tuple
+from andromancer import config as cfg
+
+class ObservationCache:
+    """Last parsed UI observation per device.
+
+    An entry is served while it is younger than the TTL and no state-changing
+    capability (tap, type, swipe, back, open_app, wait...) ran on that device
+    since it was stored. Each invalidation bumps the device's generation; a
+    dump stamped with the generation read when it started is only served if
+    nothing invalidated the cache while it ran.
+    """
+    def __init__(self, ttl: float = None):
+        self.ttl = cfg.UI_CACHE_TTL if ttl is None else ttl
+        self._entries: Dict[Optional[str], Tuple[float, Dict, int]] = {}
+        self._generations: Dict[Optional[str], int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, device_id: Optional[str]) -> Optional[Dict]:
+        entry = self._entries.get(device_id)
+        if entry and entry[2] == self.generation(device_id) and time.time() - entry[0] <= self.ttl:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def generation(self, device_id: Optional[str]) -> int:
+        return self._generations.get(device_id, 0)
+
+    def put(self, device_id: Optional[str], observation: Dict, generation: int = None):
+        """Stores a dump that started at `generation` (default: now); stale ones are kept for `latest` only"""
+        self._entries[device_id] = (time.time(), observation,
+                                    self.generation(device_id) if generation is None else generation)
+
+    def latest(self, device_id: Optional[str]) -> Optional[Dict]:
+        """Most recent observation even if it is no longer valid for reuse"""
+        entry = self._entries.get(device_id)
+        return entry[1] if entry else None
+
+    def invalidate(self, device_id: Optional[str]):
+        self._generations[device_id] = self.generation(device_id) + 1
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0
+        }
+
+observation_cache = ObservationCache()
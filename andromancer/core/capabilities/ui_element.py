@@ -0,0 +1,129 @@
+import re
+import sys
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+FLAG_CLICKABLE = 1
+FLAG_SCROLLABLE = 2
+FLAG_FOCUSED = 4
+FLAG_ENABLED = 8
+FLAG_CHECKED = 16
+FLAG_SELECTED = 32
+
+_BOUNDS_RE = re.compile(r"-?\d+")
+
+def parse_bounds(bounds: str) -> Optional[Tuple[int, int, int, int]]:
+    """"[x1,y1][x2,y2]" -> (x1, y1, x2, y2)"""
+    try:
+        # Fast path for the exact format uiautomator emits
+        x1, y1, x2, y2 = map(int, bounds[1:-1].replace("][", ",").split(","))
+        return x1, y1, x2, y2
+    except (ValueError, TypeError, AttributeError):
+        nums = _BOUNDS_RE.findall(bounds or "")
+        if len(nums) < 4:
+            return None
+        return int(nums[0]), int(nums[1]), int(nums[2]), int(nums[3])
+
+@lru_cache(maxsize=8192)
+def _geometry(bounds: str) -> Tuple[int, int, int, int, int, int, int]:
+    """(x1, y1, x2, y2, cx, cy, area) of a bounds string.
+
+    Cached, as consecutive dumps of a screen repeat nearly all of their bounds.
+    """
+    x1, y1, x2, y2 = parse_bounds(bounds) or (0, 0, 0, 0)
+    return x1, y1, x2, y2, (x1 + x2) // 2, (y1 + y2) // 2, max(0, x2 - x1) * max(0, y2 - y1)
+
+def _intern(value: Optional[str]) -> str:
+    return sys.intern(value) if value else ""
+
+class UIElement:
+    """Compact UI node with bounds, center and area parsed once at dump time.
+
+    Keeps the read-only mapping interface of the old per-node dicts
+    (`e["text"]`, `e.get("bounds")`) so skills and prompts keep working.
+    """
+    __slots__ = ("text", "content_desc", "resource_id", "cls", "package",
+                 "x1", "y1", "x2", "y2", "cx", "cy", "area", "flags")
+
+    _KEYS = {
+        "text": "text",
+        "content_desc": "content_desc",
+        "resource_id": "resource_id",
+        "class": "cls",
+        "package": "package",
+    }
+
+    def __init__(self, text: str, content_desc: str, resource_id: str, cls: str, package: str,
+                 x1: int, y1: int, x2: int, y2: int, flags: int = FLAG_CLICKABLE):
+        self.text = text or ""
+        self.content_desc = content_desc or ""
+        # Few distinct values per screen, so these share one string across elements
+        self.resource_id = _intern(resource_id)
+        self.cls = _intern(cls)
+        self.package = _intern(package)
+        self.x1, self.y1, self.x2, self.y2 = x1, y1, x2, y2
+        self.cx = (x1 + x2) // 2
+        self.cy = (y1 + y2) // 2
+        self.area = max(0, x2 - x1) * max(0, y2 - y1)
+        self.flags = flags
+
+    @classmethod
+    def from_node(cls, node) -> "UIElement":
+        # Runs for every clickable node of every dump, so it fills the slots
+        # directly instead of going through __init__
+        get = node.attrib.get
+        self = cls.__new__(cls)
+        self.text = get("text", "")
+        self.content_desc = get("content-desc", "")
+        self.resource_id = _intern(get("resource-id"))
+        self.cls = _intern(get("class"))
+        self.package = _intern(get("package"))
+        self.x1, self.y1, self.x2, self.y2, self.cx, self.cy, self.area = _geometry(get("bounds", ""))
+        self.flags = ((get("clickable") == "true") * FLAG_CLICKABLE | (get("scrollable") == "true") * FLAG_SCROLLABLE
+                      | (get("focused") == "true") * FLAG_FOCUSED | (get("enabled") == "true") * FLAG_ENABLED
+                      | (get("checked") == "true") * FLAG_CHECKED | (get("selected") == "true") * FLAG_SELECTED)
+        return self
+
+    @property
+    def bounds(self) -> str:
+        return f"[{self.x1},{self.y1}][{self.x2},{self.y2}]"
+
+    @property
+    def center(self) -> Tuple[int, int]:
+        return self.cx, self.cy
+
+    @property
+    def label(self) -> str:
+        return self.text or self.content_desc
+
+    def has(self, flag: int) -> bool:
+        return bool(self.flags & flag)
+
+    # --- Mapping compatibility ---
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "bounds":
+            return self.bounds
+        try:
+            return getattr(self, self._KEYS[key])
+        except KeyError:
+            raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "text": self.text,
+            "content_desc": self.content_desc,
+            "resource_id": self.resource_id,
+            "class": self.cls,
+            "bounds": self.bounds,
+            "package": self.package
+        }
+
+    def __repr__(self) -> str:
+        return f"UIElement({self.label!r} at ({self.cx},{self.cy}))"
@@ -0,0 +1,179 @@
+import copy
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from andromancer import config as cfg
+from andromancer.utils.text import normalize_text
+
+logger = logging.getLogger("AndroMancer.DecisionCache")
+
+# Working memory keys that change what the right next action is
+_RELEVANT_MEMORY_KEYS = ("last_action_error",)
+
+def normalize_goal(goal: str) -> str:
+    text = re.sub(r"[^\w\s]", " ", normalize_text(goal))
+    return " ".join(text.split())
+
+def screen_fingerprint(observation: Dict) -> str:
+    """Structural hash of a screen: package plus each element's class, view id,
+    coarse position and label with digits stripped, so clocks, counters and
+    timestamps don't split otherwise identical screens.
+    """
+    parts = [observation.get("current_package", "unknown")]
+    for e in observation.get("elements") or []:
+        label = re.sub(r"\d+", "#", normalize_text(e.get("text") or e.get("content_desc") or ""))
+        center = getattr(e, "center", None)
+        bucket = f"{center[0] // 60},{center[1] // 60}" if center else e.get("bounds", "")
+        parts.append(f"{e.get('class', '')}|{e.get('resource_id', '')}|{bucket}|{label}")
+    return hashlib.sha1("\n".join(parts).encode()).hexdigest()
+
+def _plan_signature(action_plan: List[Dict]) -> str:
+    return json.dumps([(a.get("capability"), a.get("params")) for a in action_plan or []], sort_keys=True, default=str)
+
+@dataclass
+class CachedDecision:
+    key: str
+    goal: str
+    action_plan: List[Dict]
+    reasoning: str = ""
+    successes: int = 0
+    failures: int = 0
+    hits: int = 0
+    created_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.time)
+
+    def confidence(self, half_life: float) -> float:
+        """Success rate, decayed by the time since the plan last ran"""
+        total = self.successes + self.failures
+        if not total:
+            return 0.0
+        age = time.time() - self.last_used
+        return self.successes / total * 0.5 ** (age / half_life)
+
+class DecisionCache:
+    """Persistent cache of action plans that worked, keyed by goal and screen.
+
+    The key combines the normalized goal, a structural screen fingerprint,
+    the relevant working memory and the previous action plan. Plans are
+    stored once they were reflected as successful and served without an LLM
+    call while their decayed success rate stays above `min_confidence`.
+    Least recently used entries are evicted past `max_entries`.
+
+    A plan is only served once it succeeded `min_uses` times, so one lucky
+    step doesn't skip the LLM on that screen for good. Changes are written
+    every `save_every` records and on `flush()`, at the end of a mission.
+    """
+    def __init__(self, path: Path = None, max_entries: int = None, min_confidence: float = None,
+                 half_life: float = None, min_uses: int = None, save_every: int = None):
+        self.path = path or cfg.STATE_DIR / "decision_cache.json"
+        self.max_entries = max_entries or cfg.DECISION_CACHE_SIZE
+        self.min_confidence = cfg.DECISION_CACHE_MIN_CONFIDENCE if min_confidence is None else min_confidence
+        self.half_life = half_life or cfg.DECISION_CACHE_HALF_LIFE
+        self.min_uses = max(1, cfg.DECISION_CACHE_MIN_USES if min_uses is None else min_uses)
+        self.save_every = max(1, save_every or cfg.DECISION_CACHE_SAVE_EVERY)
+        self._entries: "OrderedDict[str, CachedDecision]" = OrderedDict()
+        self._unsaved = 0
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    # --- Persistence ---
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            entries = sorted((CachedDecision(**e) for e in data), key=lambda e: e.last_used)
+            self._entries = OrderedDict((e.key, e) for e in entries)
+        except Exception as e:
+            logger.error(f"Decision cache load error: {e}")
+
+    def _save(self):
+        try:
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump([asdict(e) for e in self._entries.values()], f)
+            tmp_path.replace(self.path)
+        except Exception as e:
+            logger.error(f"Decision cache save error: {e}")
+
+    def flush(self):
+        """Writes the cache if records arrived since the last save"""
+        if self._unsaved:
+            self._save()
+            self._unsaved = 0
+
+    # --- Lookup ---
+
+    def make_key(self, goal: str, observation: Dict, working_memory: Dict,
+                 previous_plan: Optional[List[Dict]] = None) -> str:
+        memory = {k: working_memory[k] for k in _RELEVANT_MEMORY_KEYS if k in working_memory}
+        previous = [(a.get("capability"), a.get("params")) for a in previous_plan or []]
+        material = json.dumps(
+            [normalize_goal(goal), screen_fingerprint(observation), memory, previous],
+            sort_keys=True, default=str
+        )
+        return hashlib.sha1(material.encode()).hexdigest()
+
+    def lookup(self, key: str) -> Optional[CachedDecision]:
+        entry = self._entries.get(key)
+        if entry is None or entry.successes < self.min_uses or entry.confidence(self.half_life) < self.min_confidence:
+            self.misses += 1
+            return None
+        self.hits += 1
+        entry.hits += 1
+        entry.last_used = time.time()
+        self._entries.move_to_end(key)
+        return CachedDecision(**copy.deepcopy(asdict(entry)))
+
+    # --- Feedback ---
+
+    def record(self, key: str, goal: str, action_plan: List[Dict], success: bool, reasoning: str = ""):
+        """Stores a plan after its reflection, or updates the outcome of a cached one"""
+        entry = self._entries.get(key)
+        if entry is not None and _plan_signature(entry.action_plan) != _plan_signature(action_plan):
+            # Another plan for the same key says nothing about the stored one
+            if not success:
+                return
+            entry = None
+        if entry is None:
+            if not success or not action_plan:
+                return  # Only plans that worked are worth replaying
+            entry = self._entries[key] = CachedDecision(key, normalize_goal(goal), copy.deepcopy(action_plan), reasoning)
+        if success:
+            entry.successes += 1
+        else:
+            entry.failures += 1
+        entry.last_used = time.time()
+        self._entries.move_to_end(key)
+        self._evict()
+        self._unsaved += 1
+        if self._unsaved >= self.save_every:
+            self.flush()
+
+    def _evict(self):
+        # Plans that keep failing are dropped first, then the least recently used ones
+        for key in [k for k, e in self._entries.items() if e.failures and e.confidence(self.half_life) < 0.5]:
+            del self._entries[key]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0
+        }
+
+decision_cache = DecisionCache()
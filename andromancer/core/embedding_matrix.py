@@ -0,0 +1,158 @@
+import logging
+import zlib
+from pathlib import Path
+from typing import List, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger("AndroMancer.EmbeddingMatrix")
+
+# Header: magic, format version, dim, rows (uint32 each), then `capacity` rows of
+# `dim` float32 values followed by the row's uint32 key
+_MAGIC = 0x424D4541  # "AEMB"
+_VERSION = 2
+_HEADER_FLOATS = 4
+_MIN_CAPACITY = 1024
+
+def embed_text(text: str, dim: int) -> np.ndarray:
+    """Unit-length signed feature hash of the text's character trigrams.
+
+    Texts sharing n-grams get a high cosine, which the md5 "embedding" this
+    replaces did not; no model, so it is cheap enough to compute per store.
+    """
+    data = np.frombuffer(f" {text.lower()} ".encode("utf-8"), dtype=np.uint8).astype(np.uint32)
+    vec = np.zeros(dim, dtype=np.float32)
+    if data.shape[0] < 3:
+        return vec
+    h = (data[:-2] * np.uint32(0x9E3779B1)) ^ (data[1:-1] * np.uint32(0x85EBCA77)) ^ (data[2:] * np.uint32(0xC2B2AE3D))
+    h ^= h >> np.uint32(15)
+    h *= np.uint32(0x2C1B3C6D)
+    h ^= h >> np.uint32(12)
+    signs = np.where(h & np.uint32(0x80000000), -1.0, 1.0)
+    vec += np.bincount(h % np.uint32(dim), weights=signs, minlength=dim).astype(np.float32)
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm else vec
+
+def row_key(memory_id: str) -> int:
+    """Key stored with a memory's row; 30 bits, so the float32 slot holding it is never NaN"""
+    return zlib.crc32(memory_id.encode()) & 0x3FFFFFFF
+
+class EmbeddingMatrix:
+    """Contiguous float32 embedding rows in a memory-mapped file.
+
+    Rows are stored L2-normalized, so their norms are precomputed and a search
+    is a single matrix-vector product. Opening maps the file and reads the
+    16-byte header; nothing is parsed or copied until rows are touched. The
+    file grows by doubling, and the row count in the header is bumped only
+    after a row's data is written. Each row also carries a key (`row_key` of
+    its memory's id) so the owner can check the rows still line up with its
+    records after a crash.
+    """
+    def __init__(self, path: Path, dim: int):
+        self.path = path
+        self.dim = dim
+        self._width = dim + 1
+        self._map: Optional[np.memmap] = None
+
+    def _open(self) -> np.memmap:
+        if self._map is None:
+            if self.path.exists() and self.path.stat().st_size >= _HEADER_FLOATS * 4:
+                self._map = np.memmap(self.path, dtype=np.float32, mode="r+")
+                magic, version, dim, _ = self._header
+                if (magic, version, dim) != (_MAGIC, _VERSION, self.dim):
+                    logger.warning(f"{self.path.name} has another format or dim; starting it over")
+                    self.reset()
+            else:
+                self.reset()
+        return self._map
+
+    @property
+    def _header(self) -> np.ndarray:
+        return self._map[:_HEADER_FLOATS].view(np.uint32)
+
+    @property
+    def capacity(self) -> int:
+        return (self._open().shape[0] - _HEADER_FLOATS) // self._width
+
+    def __len__(self) -> int:
+        self._open()
+        return int(self._header[3])
+
+    def _block(self) -> np.ndarray:
+        mapped = self._open()
+        return mapped[_HEADER_FLOATS:_HEADER_FLOATS + len(self) * self._width].reshape(-1, self._width)
+
+    @property
+    def rows(self) -> np.ndarray:
+        """View of the stored rows; valid until the next append, truncate, keep or reset"""
+        return self._block()[:, :self.dim]
+
+    @property
+    def keys(self) -> np.ndarray:
+        return self._block()[:, self.dim].view(np.uint32)
+
+    def _resize(self, capacity: int):
+        if self._map is not None:
+            self._map.flush()
+            self._map = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "ab") as f:
+            f.truncate((_HEADER_FLOATS + capacity * self._width) * 4)
+        self._map = np.memmap(self.path, dtype=np.float32, mode="r+")
+
+    def reset(self):
+        """Empties the file, shrinking it back to the minimum capacity"""
+        if self._map is not None:
+            self._map = None
+        self.path.unlink(missing_ok=True)
+        self._resize(_MIN_CAPACITY)
+        self._header[:] = (_MAGIC, _VERSION, self.dim, 0)
+
+    def append(self, vectors: np.ndarray, keys: np.ndarray):
+        """Adds unit-length rows (an n x dim array) and their keys after the last row"""
+        if not vectors.shape[0]:
+            return
+        count = len(self)
+        if count + vectors.shape[0] > self.capacity:
+            capacity = self.capacity
+            while capacity < count + vectors.shape[0]:
+                capacity *= 2
+            self._resize(capacity)
+        start = _HEADER_FLOATS + count * self._width
+        block = self._map[start:start + vectors.shape[0] * self._width].reshape(-1, self._width)
+        block[:, :self.dim] = vectors
+        block[:, self.dim] = np.asarray(keys, dtype=np.uint32).view(np.float32)
+        self._header[3] = count + vectors.shape[0]
+
+    def truncate(self, rows: int):
+        self._open()
+        self._header[3] = min(rows, len(self))
+
+    def keep(self, mask: np.ndarray):
+        """Drops the rows where `mask` is False, moving the rest up in order"""
+        block = self._block()
+        kept = block[mask]
+        # Rows moved along with their keys, so a crash mid-copy shows up as a key mismatch
+        block[:kept.shape[0]] = kept
+        self._header[3] = kept.shape[0]
+
+    def search(self, query: np.ndarray, top_k: int) -> List[Tuple[int, float]]:
+        """(row, cosine) of the best `top_k` rows with a positive score, best first"""
+        rows = self.rows
+        if not rows.shape[0] or top_k <= 0:
+            return []
+        norm = float(np.linalg.norm(query))
+        if not norm:
+            return []
+        scores = rows @ (query.astype(np.float32, copy=False) / norm)
+        k = min(top_k, scores.shape[0])
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(int(i), float(scores[i])) for i in best if scores[i] > 0]
+
+    def flush(self):
+        if self._map is not None:
+            self._map.flush()
+
+    def close(self):
+        self.flush()
+        self._map = None
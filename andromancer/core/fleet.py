@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+from andromancer.core.agent import AndroMancerAgent, Mission
+from andromancer.core.reasoning import ReActEngine
+from andromancer.utils.adb import adb_manager
+
+logger = logging.getLogger("AndroMancer.Fleet")
+
+@dataclass
+class DeviceInfo:
+    serial: str
+    online: bool = True
+    busy: bool = False
+    missions_completed: int = 0
+    missions_stolen: int = 0
+    last_seen: float = field(default_factory=time.time)
+
+class DeviceRegistry:
+    """Tracks the devices that adb currently reports as ready"""
+    def __init__(self):
+        self.devices: Dict[str, DeviceInfo] = {}
+
+    async def refresh(self) -> List[str]:
+        serials = await adb_manager.list_devices()
+        for serial in serials:
+            info = self.devices.setdefault(serial, DeviceInfo(serial))
+            info.online = True
+            info.last_seen = time.time()
+        for serial, info in self.devices.items():
+            if serial not in serials:
+                info.online = False
+        return serials
+
+    def online(self) -> List[str]:
+        return [s for s, info in self.devices.items() if info.online]
+
+Ticket = Tuple[str, asyncio.Future]
+
+class MissionQueue:
+    """Shared mission queue with one deque per device and work stealing.
+
+    Submissions go to the shortest local deque. A worker pops from the head of
+    its own deque and, when that is empty, steals from the tail of the longest
+    other deque so no device sits idle while work is queued elsewhere.
+    """
+    def __init__(self):
+        self._local: Dict[str, Deque[Ticket]] = {}
+        self._available: Optional[asyncio.Condition] = None
+
+    def _condition(self) -> asyncio.Condition:
+        if self._available is None:
+            self._available = asyncio.Condition()
+        return self._available
+
+    def add_worker(self, serial: str):
+        self._local.setdefault(serial, deque())
+
+    def remove_worker(self, serial: str) -> List[Ticket]:
+        return list(self._local.pop(serial, deque()))
+
+    async def submit(self, goal: str) -> asyncio.Future:
+        if not self._local:
+            raise RuntimeError("No fleet workers registered")
+        future = asyncio.get_event_loop().create_future()
+        target = min(self._local.values(), key=len)
+        target.append((goal, future))
+        async with self._condition():
+            self._condition().notify_all()
+        return future
+
+    def _take(self, serial: str) -> Tuple[Optional[Ticket], bool]:
+        own = self._local.get(serial)
+        if own:
+            return own.popleft(), False
+        victims = [q for s, q in self._local.items() if s != serial and q]
+        if victims:
+            return max(victims, key=len).pop(), True
+        return None, False
+
+    async def next(self, serial: str) -> Tuple[Ticket, bool]:
+        """Waits for the next ticket; the flag tells whether it was stolen"""
+        condition = self._condition()
+        async with condition:
+            while True:
+                ticket, stolen = self._take(serial)
+                if ticket:
+                    return ticket, stolen
+                await condition.wait()
+
+    def pending(self) -> int:
+        return sum(len(q) for q in self._local.values())
+
+class FleetScheduler:
+    """Runs missions in parallel, one agent worker per connected device"""
+    def __init__(self, registry: DeviceRegistry = None):
+        self.registry = registry or DeviceRegistry()
+        self.queue = MissionQueue()
+        self.agents: Dict[str, AndroMancerAgent] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+
+    async def start(self) -> List[str]:
+        serials = await self.registry.refresh()
+        for serial in serials:
+            if serial not in self._workers:
+                self.agents[serial] = AndroMancerAgent(device_id=serial)
+                self.queue.add_worker(serial)
+                self._workers[serial] = asyncio.create_task(self._worker(serial))
+        logger.info(f"Fleet started with {len(self._workers)} devices: {serials}")
+        return serials
+
+    async def submit(self, goal: str) -> asyncio.Future:
+        """Queues a goal; the returned future resolves to the finished Mission"""
+        return await self.queue.submit(goal)
+
+    async def run_all(self, goals: List[str]) -> List[Mission]:
+        futures = [await self.submit(goal) for goal in goals]
+        return await asyncio.gather(*futures)
+
+    async def _worker(self, serial: str):
+        agent = self.agents[serial]
+        info = self.registry.devices[serial]
+        while True:
+            (goal, future), stolen = await self.queue.next(serial)
+            if future.cancelled():
+                continue
+            info.busy = True
+            if stolen:
+                info.missions_stolen += 1
+            try:
+                # Each mission starts from a clean reasoning state on this device
+                agent.reasoning = ReActEngine(llm_client=agent.reasoning.llm, small_llm_client=agent.reasoning.small_llm)
+                mission = await agent.run_mission(goal)
+                info.missions_completed += 1
+                if not future.done():
+                    future.set_result(mission)
+            except Exception as e:
+                logger.exception(f"Fleet worker {serial} failed on '{goal}': {e}")
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                info.busy = False
+
+    def stats(self) -> Dict:
+        return {
+            "devices": len(self._workers),
+            "busy": sum(1 for s in self._workers if self.registry.devices[s].busy),
+            "pending": self.queue.pending(),
+            "completed": {s: self.registry.devices[s].missions_completed for s in self._workers},
+            "stolen": {s: self.registry.devices[s].missions_stolen for s in self._workers}
+        }
+
+    async def stop(self):
+        for agent in self.agents.values():
+            agent.stop()
+        for task in self._workers.values():
+            task.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+        self._workers.clear()
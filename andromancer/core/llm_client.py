@@ -1,74 +1,77 @@
 import asyncio
 import json
 import logging
-import re
+import time
+from collections import deque
 import httpx
-from typing import Dict, Optional, Any
+from typing import Awaitable, Callable, Dict, Optional, Any
 from andromancer import config as cfg
+from andromancer.utils.json_stream import IncrementalPlanParser
+
+from andromancer.core.llm_transport import LLMTransport, llm_transport
+from andromancer.core.llm_providers import Provider, ProviderError, ProviderPool
 
 logger = logging.getLogger("AndroMancer.LLM")
 
 class LLMError(Exception):
     pass
 
-class AsyncLLMClient:
-    """Async client for LLM (GROQ/OpenAI) with retry logic"""
-    def __init__(self, api_key: str = None, model: str = None):
-        self.api_key = api_key or cfg.GROQ_API_KEY
-        self.model = model or cfg.MODEL_NAME
+_default_pool: Optional[ProviderPool] = None
 
-    async def _request_with_retry(self, payload: Dict[str, Any], timeout: float = 30.0, max_retries: int = 3) -> httpx.Response:
-        async with httpx.AsyncClient() as client:
-            for attempt in range(max_retries):
-                try:
-                    resp = await client.post(
-                        "https://api.groq.com/openai/v1/chat/completions",
-                        headers={"Authorization": f"Bearer {self.api_key}"},
-                        json=payload,
-                        timeout=timeout
-                    )
-
-                    if resp.status_code == 429:
-                        wait_time = 2 ** (attempt + 1)
-                        try:
-                            error_msg = resp.json().get("error", {}).get("message", "")
-                            match = re.search(r"try again in ([\d\.]+)s", error_msg)
-                            if match:
-                                wait_time = float(match.group(1)) + 0.1
-                        except:
-                            pass
-
-                        logger.warning(f"Rate limit reached. Retrying in {wait_time:.2f}s... (Attempt {attempt+1}/{max_retries})")
-                        await asyncio.sleep(wait_time)
-                        continue
+def default_provider_pool() -> ProviderPool:
+    """Provider pool shared by every client built from the configuration"""
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = ProviderPool()
+    return _default_pool
 
-                    if resp.status_code >= 500:
-                        wait_time = 2 ** (attempt + 1)
-                        logger.warning(f"Server error {resp.status_code}. Retrying in {wait_time}s... (Attempt {attempt+1}/{max_retries})")
-                        await asyncio.sleep(wait_time)
-                        continue
+_small_pool: Optional[ProviderPool] = None
 
-                    return resp
-                except (httpx.RequestError, asyncio.TimeoutError) as e:
-                    if attempt == max_retries - 1:
-                        raise e
-                    wait_time = 2 ** (attempt + 1)
-                    logger.warning(f"Network error: {e}. Retrying in {wait_time}s...")
-                    await asyncio.sleep(wait_time)
-
-            # Final attempt if loop finished without returning
-            return await client.post(
-                "https://api.groq.com/openai/v1/chat/completions",
-                headers={"Authorization": f"Bearer {self.api_key}"},
-                json=payload,
-                timeout=timeout
-            )
+def small_provider_pool() -> Optional[ProviderPool]:
+    """Pool of the providers' small models, sharing their connections; None if none has one"""
+    global _small_pool
+    if _small_pool is None:
+        small = [Provider(f"{p.name}/small", p.base_url, p.small_model, p.api_key, p.transport)
+                 for p in default_provider_pool().providers if p.small_model]
+        if not small:
+            return None
+        _small_pool = ProviderPool(small)
+    return _small_pool
 
-    async def complete_chat(self, system_prompt: str, user_prompt: str, timeout: float = 30.0) -> dict:
-        if not self.api_key:
-            raise LLMError("API Key not found. Please set it in .env or settings.py")
+class AsyncLLMClient:
+    """Async client for OpenAI-compatible LLMs with hedging and provider failover.
+
+    Without `providers`, an explicit `api_key`/`model`/`transport` builds a
+    single-provider pool; otherwise the shared pool from LLM_PROVIDERS is used.
+    """
+    def __init__(self, api_key: str = None, model: str = None, transport: LLMTransport = None,
+                 providers: ProviderPool = None):
+        if providers is None and (api_key or model or transport):
+            transport = transport or llm_transport
+            providers = ProviderPool([Provider(
+                "default", transport.base_url, model or cfg.MODEL_NAME, api_key or cfg.GROQ_API_KEY, transport
+            )])
+        self.providers = providers or default_provider_pool()
+        self.api_key = self.providers.primary.api_key
+        self.model = self.providers.primary.model
+        # Time from sending a chat request until its first action was known
+        self.first_action_ms: deque = deque(maxlen=100)
+        self.streamed_first_action_ms: deque = deque(maxlen=100)
+        # Prompt tokens billed vs served from the provider's prefix cache
+        self.prompt_tokens = 0
+        self.cached_prompt_tokens = 0
+
+    async def warm_up(self):
+        await self.providers.warm_up()
 
-        payload = {
+    async def _request_with_retry(self, payload: Dict[str, Any], timeout: float = 30.0, max_retries: int = 3) -> httpx.Response:
+        try:
+            return await self.providers.post(payload, timeout=timeout, max_rounds=max_retries)
+        except ProviderError as e:
+            raise LLMError(str(e))
+
+    def _chat_payload(self, system_prompt: str, user_prompt: str) -> Dict[str, Any]:
+        return {
             "model": self.model,
             "messages": [
                 {"role": "system", "content": system_prompt},
@@ -78,6 +81,13 @@ class AsyncLLMClient:
             "response_format": {"type": "json_object"}
         }
 
+    async def complete_chat(self, system_prompt: str, user_prompt: str, timeout: float = 30.0) -> dict:
+        if not self.api_key:
+            raise LLMError("API Key not found. Please set it in .env or settings.py")
+
+        payload = self._chat_payload(system_prompt, user_prompt)
+        start = time.perf_counter()
+
         try:
             resp = await self._request_with_retry(payload, timeout=timeout)
 
@@ -86,6 +96,8 @@ class AsyncLLMClient:
 
             body = resp.json()
             content = body["choices"][0]["message"]["content"]
+            self.first_action_ms.append((time.perf_counter() - start) * 1000)
+            self._record_usage(body.get("usage"))
 
             if isinstance(content, str):
                 return json.loads(content)
@@ -98,6 +110,77 @@ class AsyncLLMClient:
             logger.error(f"LLM call failed after retries: {e}")
             raise LLMError(f"Failed to call LLM: {str(e)}")
 
+    async def stream_chat(self, system_prompt: str, user_prompt: str,
+                          on_action: Callable[[Dict], Awaitable[None]], timeout: float = 30.0) -> dict:
+        """Streams a JSON chat completion (SSE) and hands over each `action_plan`
+        entry as soon as it closes, while the model is still writing the rest.
+
+        Falls back to `complete_chat` if the stream fails before any action was
+        handed over; returns the complete decoded object either way.
+        """
+        if not self.api_key:
+            raise LLMError("API Key not found. Please set it in .env or settings.py")
+
+        payload = self._chat_payload(system_prompt, user_prompt)
+        payload["stream"] = True
+        parser = IncrementalPlanParser()
+        start = time.perf_counter()
+
+        try:
+            async with self.providers.stream(payload, timeout=timeout) as stream:
+                resp = stream.response
+                if resp.status_code >= 400:
+                    await resp.aread()
+                    raise LLMError(f"LLM stream failed: {resp.status_code} {resp.text}")
+
+                async for line in resp.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    # Usage arrives on the last chunk (Groq nests it under x_groq)
+                    usage = chunk.get("usage") or chunk.get("x_groq", {}).get("usage")
+                    self._record_usage(usage)
+                    if usage:
+                        stream.usage_tokens = usage.get("total_tokens")
+                    choices = chunk.get("choices")
+                    delta = choices[0].get("delta", {}).get("content") if choices else None
+                    if not delta:
+                        continue
+                    for action in parser.feed(delta):
+                        if len(parser.items) == 1:
+                            self.streamed_first_action_ms.append((time.perf_counter() - start) * 1000)
+                        await on_action(action)
+            return parser.result()
+        except Exception as e:
+            if parser.items:
+                # Those actions are already running; report them as the plan
+                logger.warning(f"LLM stream broke after {len(parser.items)} actions: {e}")
+                return {"reasoning": f"Stream interrupted: {e}", "action_plan": list(parser.items), "confidence": 0.0}
+            logger.warning(f"LLM streaming failed, retrying without streaming: {e}")
+            return await self.complete_chat(system_prompt, user_prompt, timeout=timeout)
+
+    def _record_usage(self, usage: Optional[Dict[str, Any]]):
+        if not usage:
+            return
+        self.prompt_tokens += usage.get("prompt_tokens", 0)
+        details = usage.get("prompt_tokens_details") or {}
+        # OpenAI/Groq report `cached_tokens`; DeepSeek-style APIs `prompt_cache_hit_tokens`
+        self.cached_prompt_tokens += details.get("cached_tokens") or usage.get("prompt_cache_hit_tokens", 0)
+
+    def stats(self) -> Dict[str, float]:
+        def _avg(values):
+            return sum(values) / len(values) if values else 0.0
+        return {
+            "first_action_ms": _avg(self.first_action_ms),
+            "streamed_first_action_ms": _avg(self.streamed_first_action_ms),
+            "prompt_tokens": self.prompt_tokens,
+            "cached_prompt_tokens": self.cached_prompt_tokens,
+            "prefix_cache_ratio": self.cached_prompt_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+        }
+
     async def complete_text(self, system_prompt: str, user_prompt: str, timeout: float = 30.0) -> str:
         """Simple text completion without JSON format enforcement"""
         if not self.api_key:
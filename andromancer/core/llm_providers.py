@@ -0,0 +1,310 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+import httpx
+from andromancer import config as cfg
+from andromancer.core.llm_transport import LLMTransport, llm_transport
+from andromancer.core.observation_encoder import estimate_tokens
+from andromancer.core.rate_limiter import RateLimiter
+
+logger = logging.getLogger("AndroMancer.LLMProviders")
+
+class ProviderError(Exception):
+    pass
+
+@dataclass
+class Provider:
+    """One OpenAI-compatible endpoint/model pair and its recent health"""
+    name: str
+    base_url: str
+    model: str
+    api_key: str = ""
+    transport: Optional[LLMTransport] = None
+    small_model: str = ""
+    limiter: Optional[RateLimiter] = None
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=100))
+    consecutive_failures: int = 0
+    cooldown_until: float = 0.0
+    requests: int = 0
+    wins: int = 0
+    failures: int = 0
+    rate_limited: int = 0
+
+    def __post_init__(self):
+        if self.transport is None:
+            self.transport = LLMTransport(base_url=self.base_url)
+        if self.limiter is None:
+            self.limiter = RateLimiter()
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.api_key}"}
+
+    @property
+    def available(self) -> bool:
+        return time.time() >= self.cooldown_until
+
+    def latency_percentile(self, pct: float) -> Optional[float]:
+        if len(self.latencies) < 10:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "requests": self.requests,
+            "wins": self.wins,
+            "failures": self.failures,
+            "rate_limited": self.rate_limited,
+            "p50_ms": (self.latency_percentile(0.5) or 0.0) * 1000,
+            "available": self.available,
+            "rate_limit": self.limiter.stats()
+        }
+
+@dataclass
+class StreamHandle:
+    """A streamed completion a provider accepted; set `usage_tokens` once the stream reports usage"""
+    provider: Provider
+    response: httpx.Response
+    usage_tokens: Optional[int] = None
+
+def _retry_after(resp: httpx.Response) -> float:
+    header = resp.headers.get("retry-after")
+    if header:
+        try:
+            return float(header)
+        except ValueError:
+            pass
+    try:
+        message = resp.json().get("error", {}).get("message", "")
+        match = re.search(r"try again in ([\d\.]+)s", message)
+        if match:
+            return float(match.group(1)) + 0.1
+    except Exception:
+        pass
+    return 2.0
+
+def estimate_request_tokens(payload: Dict[str, Any]) -> int:
+    """Prompt estimate plus the completion budget the request may use"""
+    return estimate_prompt_tokens(payload) + payload.get("max_tokens", cfg.LLM_COMPLETION_TOKENS)
+
+def estimate_prompt_tokens(payload: Dict[str, Any]) -> int:
+    return sum(estimate_tokens(m.get("content") or "") for m in payload.get("messages", []))
+
+def _usage_tokens(resp: httpx.Response) -> Optional[int]:
+    try:
+        return int(resp.json()["usage"]["total_tokens"])
+    except Exception:
+        return None
+
+def load_providers() -> List[Provider]:
+    """Providers from LLM_PROVIDERS (a JSON list), or the single configured endpoint.
+
+    Each entry takes `name`, `base_url`, `model` and either `api_key` or
+    `api_key_env`, the name of the environment variable holding the key.
+    An optional `small_model` on the same endpoint serves routine steps.
+    """
+    if cfg.LLM_PROVIDERS:
+        try:
+            providers = []
+            for entry in json.loads(cfg.LLM_PROVIDERS):
+                api_key = entry.get("api_key") or os.getenv(entry.get("api_key_env", ""), "")
+                providers.append(Provider(entry.get("name", entry["base_url"]), entry["base_url"], entry["model"], api_key,
+                                          small_model=entry.get("small_model", "")))
+            if providers:
+                return providers
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"Invalid LLM_PROVIDERS, using LLM_BASE_URL: {e}")
+    return [Provider("default", cfg.LLM_BASE_URL, cfg.MODEL_NAME, cfg.GROQ_API_KEY, llm_transport,
+                     small_model=cfg.SMALL_MODEL_NAME)]
+
+class ProviderPool:
+    """Routes chat completions over an ordered list of providers.
+
+    A request goes to the first healthy provider. If it has not answered
+    within that provider's p`LLM_HEDGE_PERCENTILE` latency, the next provider
+    gets the same request and whichever answers first wins; the other is
+    cancelled. Failures fail over immediately. Rate-limited or repeatedly
+    failing providers are skipped until their cooldown ends.
+    """
+    def __init__(self, providers: List[Provider] = None, hedge_percentile: float = None,
+                 hedge_delay: float = None):
+        self.providers = providers or load_providers()
+        self.hedge_percentile = hedge_percentile or cfg.LLM_HEDGE_PERCENTILE
+        self.hedge_delay = cfg.LLM_HEDGE_DELAY if hedge_delay is None else hedge_delay
+        self.hedges = 0
+
+    @property
+    def primary(self) -> Provider:
+        return self.candidates()[0]
+
+    def candidates(self) -> List[Provider]:
+        healthy = [p for p in self.providers if p.available]
+        # Everyone cooling down: the one that recovers first is the best bet
+        return healthy or sorted(self.providers, key=lambda p: p.cooldown_until)
+
+    def _delay_for(self, provider: Provider) -> float:
+        observed = provider.latency_percentile(self.hedge_percentile)
+        return observed if observed is not None else self.hedge_delay
+
+    async def _attempt(self, provider: Provider, payload: Dict[str, Any], timeout: float) -> httpx.Response:
+        estimated = estimate_request_tokens(payload)
+        if cfg.LLM_RATE_LIMIT:
+            await provider.limiter.acquire(estimated)
+        provider.requests += 1
+        start = time.perf_counter()
+        try:
+            resp = await provider.transport.post(
+                "/chat/completions",
+                headers=provider.headers,
+                json={**payload, "model": provider.model},
+                timeout=timeout
+            )
+        except (httpx.RequestError, asyncio.TimeoutError) as e:
+            self._failed(provider, 2 ** min(provider.consecutive_failures, 5))
+            raise ProviderError(f"{provider.name}: {e}")
+        except asyncio.CancelledError:
+            # A hedge that lost: count the prompt it sent, return the completion budget
+            provider.limiter.settle(estimated, estimate_prompt_tokens(payload))
+            raise
+
+        provider.limiter.update(resp.headers)
+        error = self._rejected(provider, resp)
+        if error is not None:
+            raise error
+        provider.limiter.settle(estimated, _usage_tokens(resp))
+        self._succeeded(provider, start)
+        return resp
+
+    def _rejected(self, provider: Provider, resp: httpx.Response) -> Optional[ProviderError]:
+        """Backs off a provider that answered 429 or 5xx; returns the error to fail over with"""
+        if resp.status_code == 429:
+            provider.rate_limited += 1
+            wait = _retry_after(resp)
+            provider.limiter.block(wait)
+            self._failed(provider, wait, rate_limited=True)
+            return ProviderError(f"{provider.name}: rate limited for {wait:.1f}s")
+        if resp.status_code >= 500:
+            self._failed(provider, 2 ** min(provider.consecutive_failures, 5))
+            return ProviderError(f"{provider.name}: server error {resp.status_code}")
+        return None
+
+    def _succeeded(self, provider: Provider, start: float):
+        provider.latencies.append(time.perf_counter() - start)
+        provider.consecutive_failures = 0
+
+    def _failed(self, provider: Provider, cooldown: float, rate_limited: bool = False):
+        provider.failures += 1
+        provider.consecutive_failures += 1
+        # A single transient error doesn't take a provider out of rotation; a 429 does
+        if rate_limited or provider.consecutive_failures >= 2:
+            provider.cooldown_until = time.time() + cooldown
+            logger.warning(f"LLM provider {provider.name} cooling down for {cooldown:.1f}s")
+
+    async def post(self, payload: Dict[str, Any], timeout: float = 30.0, max_rounds: int = 3) -> httpx.Response:
+        last_error: Optional[Exception] = None
+        for round_ in range(max_rounds):
+            try:
+                return await self._hedged(self.candidates(), payload, timeout)
+            except ProviderError as e:
+                last_error = e
+                # Every provider failed this round; wait for the first one to cool down
+                wait = min(max(0.0, min(p.cooldown_until for p in self.providers) - time.time()), 30.0) or 2 ** round_
+                if round_ < max_rounds - 1:
+                    logger.warning(f"All LLM providers failed ({e}). Retrying in {wait:.1f}s...")
+                    await asyncio.sleep(wait)
+        raise ProviderError(f"All LLM providers failed: {last_error}")
+
+    async def _hedged(self, candidates: List[Provider], payload: Dict[str, Any], timeout: float) -> httpx.Response:
+        pending: Dict[asyncio.Task, Provider] = {}
+        queue = list(candidates)
+        hedged = False
+        last_error: Optional[Exception] = None
+
+        def launch():
+            provider = queue.pop(0)
+            pending[asyncio.ensure_future(self._attempt(provider, payload, timeout))] = provider
+
+        launch()
+        try:
+            while pending:
+                # Only the first request is hedged on a timer; failures fail over right away
+                delay = self._delay_for(candidates[0]) if queue and not hedged else None
+                done, _ = await asyncio.wait(pending, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    self.hedges += 1
+                    launch()
+                    continue
+                for task in done:
+                    provider = pending.pop(task)
+                    try:
+                        resp = task.result()
+                    except ProviderError as e:
+                        last_error = e
+                        if queue and len(pending) == 0:
+                            launch()
+                        continue
+                    provider.wins += 1
+                    return resp
+            raise last_error or ProviderError("No LLM provider available")
+        finally:
+            for task in pending:
+                task.cancel()
+
+    @asynccontextmanager
+    async def stream(self, payload: Dict[str, Any], timeout: float = 30.0) -> AsyncIterator[StreamHandle]:
+        """Opens a streamed completion on the first provider that accepts it.
+
+        Same rate limiting, 429 back-off and cooldowns as `post`: a provider
+        that is rate limited, down or answers 5xx is skipped for the next one
+        before any token is read. Streams are not hedged, since the caller
+        acts on tokens as they arrive and two streams would act twice.
+        """
+        last_error: Optional[ProviderError] = None
+        for provider in self.candidates():
+            estimated = estimate_request_tokens(payload)
+            if cfg.LLM_RATE_LIMIT:
+                await provider.limiter.acquire(estimated)
+            provider.requests += 1
+            start = time.perf_counter()
+            handle: Optional[StreamHandle] = None
+            try:
+                async with provider.transport.stream("POST", "/chat/completions", headers=provider.headers,
+                                                     json={**payload, "model": provider.model},
+                                                     timeout=timeout) as resp:
+                    provider.limiter.update(resp.headers)
+                    if resp.status_code == 429 or resp.status_code >= 500:
+                        await resp.aread()
+                        last_error = self._rejected(provider, resp)
+                        continue
+                    handle = StreamHandle(provider, resp)
+                    yield handle
+            except (httpx.RequestError, asyncio.TimeoutError) as e:
+                self._failed(provider, 2 ** min(provider.consecutive_failures, 5))
+                if handle is not None:
+                    raise  # Tokens were already handed over; too late to switch providers
+                last_error = ProviderError(f"{provider.name}: {e}")
+                continue
+            finally:
+                if handle is not None:
+                    provider.limiter.settle(estimated, handle.usage_tokens)
+            self._succeeded(provider, start)
+            provider.wins += 1
+            return
+        raise last_error or ProviderError("No LLM provider available")
+
+    async def warm_up(self):
+        await asyncio.gather(*(p.transport.warm_up(p.headers) for p in self.providers if p.api_key))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hedges": self.hedges, "providers": {p.name: p.stats() for p in self.providers}}
@@ -0,0 +1,96 @@
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+import httpx
+from andromancer import config as cfg
+
+try:
+    import h2  # noqa: F401
+    HAS_HTTP2 = True
+except ImportError:
+    HAS_HTTP2 = False
+
+logger = logging.getLogger("AndroMancer.LLM")
+
+class LLMTransport:
+    """Long-lived HTTP connection pool shared by every LLM call.
+
+    Keeps connections alive between reasoning steps (HTTP/2 when the `h2`
+    package is installed) so only the first request pays DNS, TCP and TLS
+    setup. Request tracing counts new connections and time to first byte.
+    """
+    def __init__(self, base_url: str = None, http2: bool = None, max_connections: int = None,
+                 max_keepalive: int = None, keepalive_expiry: float = None):
+        self.base_url = (base_url or cfg.LLM_BASE_URL).rstrip("/")
+        self.http2 = (cfg.LLM_HTTP2 if http2 is None else http2) and HAS_HTTP2
+        self.limits = httpx.Limits(
+            max_connections=max_connections or cfg.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=max_keepalive or cfg.LLM_MAX_KEEPALIVE,
+            keepalive_expiry=cfg.LLM_KEEPALIVE_EXPIRY if keepalive_expiry is None else keepalive_expiry
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self.requests = 0
+        self.connections_opened = 0
+        self.ttfb_total = 0.0
+        self.ttfb_samples = 0
+        self.http_version = ""
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(base_url=self.base_url, http2=self.http2, limits=self.limits)
+        return self._client
+
+    def _trace(self):
+        sent_at = None
+
+        async def trace(event_name: str, info: Dict):
+            nonlocal sent_at
+            if event_name == "connection.connect_tcp.complete":
+                self.connections_opened += 1
+            elif event_name.endswith("send_request_headers.started"):
+                sent_at = time.perf_counter()
+            elif event_name.endswith("receive_response_headers.complete") and sent_at is not None:
+                self.ttfb_total += time.perf_counter() - sent_at
+                self.ttfb_samples += 1
+        return trace
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        self.requests += 1
+        resp = await self._get_client().request(method, path, extensions={"trace": self._trace()}, **kwargs)
+        self.http_version = resp.http_version
+        return resp
+
+    @asynccontextmanager
+    async def stream(self, method: str, path: str, **kwargs):
+        """Like `request`, but the body is left unread for incremental consumption"""
+        self.requests += 1
+        async with self._get_client().stream(method, path, extensions={"trace": self._trace()}, **kwargs) as resp:
+            self.http_version = resp.http_version
+            yield resp
+
+    async def post(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", path, **kwargs)
+
+    async def warm_up(self, headers: Dict[str, str] = None):
+        """Opens a pooled connection ahead of the first completion"""
+        try:
+            await self.request("GET", "/models", headers=headers, timeout=10.0)
+        except httpx.HTTPError as e:
+            logger.debug(f"LLM transport warm-up failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "reuse_ratio": 1 - self.connections_opened / self.requests if self.requests else 0.0,
+            "avg_ttfb_ms": self.ttfb_total / self.ttfb_samples * 1000 if self.ttfb_samples else 0.0,
+            "http_version": self.http_version
+        }
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+llm_transport = LLMTransport()
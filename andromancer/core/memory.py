@@ -1,128 +1,357 @@
+import atexit
 import json
 import hashlib
+import threading
 import time
 import logging
 import numpy as np
 from dataclasses import dataclass, field, asdict
+from itertools import compress
 from pathlib import Path
 from typing import List, Optional, Dict, Any
 from andromancer import config as cfg
-
-try:
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.metrics.pairwise import cosine_similarity
-    HAS_SKLEARN = True
-except ImportError:
-    HAS_SKLEARN = False
+from andromancer.core.embedding_matrix import EmbeddingMatrix, embed_text, row_key
+from andromancer.core.memory_index import HAS_SKLEARN, HashedTfidfIndex
+from andromancer.core.memory_log import MemoryLog
+from andromancer.core.memory_retention import RetentionPolicy
 
 logger = logging.getLogger("AndroMancer.Memory")
 
+# Missions a deduplicated memory remembers, most recent last
+_MAX_MISSION_REFS = 20
+# Stores up to this size index their memories inline on the first retrieve
+_INLINE_INDEX_BUILD = 2000
+
 @dataclass
 class Memory:
     id: str
     content: str
-    embedding: Optional[List[float]] = None
     metadata: Dict[str, Any] = field(default_factory=dict)
     timestamp: float = field(default_factory=time.time)
     access_count: int = 0
     last_access: float = field(default_factory=time.time)
+    occurrences: int = 1
+    missions: List[str] = field(default_factory=list)
+
+    def add_mission(self, mission: Optional[str]):
+        if not mission:
+            return
+        if mission in self.missions:
+            self.missions.remove(mission)
+        self.missions.append(mission)
+        del self.missions[:-_MAX_MISSION_REFS]
 
 class MemoryStore:
-    """Semantic memory with TF-IDF vectors for local semantic search"""
-    def __init__(self, storage_path: Path):
+    """Semantic memory with TF-IDF vectors for local semantic search.
+
+    Persisted as an append-only log (see MemoryLog): `store` appends one
+    record and retrieval appends the access stats it changed. The log is
+    replayed on first use rather than at import, and compacted in the
+    background once it holds MEMORY_COMPACT_RATIO times more records than
+    there are memories. A `legacy_path` JSON store is imported once.
+
+    Embeddings are not in the log: row i of the memory-mapped `embeddings_path`
+    matrix is self.memories[i]. Rows missing after a crash are recomputed from
+    the content when the log is replayed.
+
+    Memories of a type in MEMORY_DEDUP_TYPES are content-addressed: storing
+    the same content again bumps `occurrences`, records the mission and
+    appends a "seen" record instead of a new row. Duplicates written before
+    deduplication are folded together when the log is loaded.
+
+    A RetentionPolicy sweep runs after loading and every `sweep_every`
+    stores; evicted memories are logged as "remove" records and their rows
+    dropped from the matrix and the index, so the store stays near
+    MEMORY_MAX_ENTRIES however long the agent runs.
+    """
+    def __init__(self, storage_path: Path, legacy_path: Optional[Path] = None,
+                 embeddings_path: Optional[Path] = None):
         self.storage_path = storage_path
-        self.memories: List[Memory] = []
-        self._load()
+        self.legacy_path = legacy_path
+        self._log = MemoryLog(storage_path, cfg.MEMORY_FSYNC_INTERVAL)
+        self._embeddings = EmbeddingMatrix(embeddings_path or storage_path.with_suffix(".f32"),
+                                           cfg.MEMORY_EMBEDDING_DIM)
+        self._memories: Optional[List[Memory]] = None
+        # Row i is self.memories[i]; built on the first retrieve, then kept up to date by store
+        self._index: Optional[HashedTfidfIndex] = None
+        self._index_builder: Optional[threading.Thread] = None
+        self._built_index = None
+        self._by_content: Dict[str, Memory] = {}
+        self.deduplicated = 0
+        self.retention = RetentionPolicy.from_config()
+        self.evicted = 0
+        self.expired = 0
+        self._stores_since_sweep = 0
+        atexit.register(self.close)
 
-    def _hash_embedding(self, text: str) -> List[float]:
-        """Legacy hash-based 'embedding' for backward compatibility"""
-        hash_obj = hashlib.md5(text.encode())
-        hash_int = int(hash_obj.hexdigest(), 16)
-        vec = [((hash_int >> (i * 4)) & 0xF) / 16.0 for i in range(16)]
-        return vec
+    @property
+    def memories(self) -> List[Memory]:
+        if self._memories is None:
+            self._load()
+        return self._memories
+
+    @staticmethod
+    def _content_key(content: str, metadata: Dict) -> Optional[str]:
+        kind = metadata.get("type")
+        if kind not in cfg.MEMORY_DEDUP_TYPES:
+            return None
+        return hashlib.sha1(f"{kind}\0{content}".encode()).hexdigest()[:12]
 
     def store(self, content: str, metadata: Dict = None) -> Memory:
-        # We store the hash embedding for compatibility but we will use TF-IDF for retrieval
+        metadata = metadata or {}
+        memories = self.memories
+        key = self._content_key(content, metadata)
+        existing = self._by_content.get(key) if key else None
+        if existing is not None:
+            self._seen(existing, metadata.get("mission"))
+            return existing
+
         mem = Memory(
-            id=hashlib.md5(f"{content}{time.time()}".encode()).hexdigest()[:12],
+            id=key or hashlib.md5(f"{content}{time.time()}".encode()).hexdigest()[:12],
             content=content,
-            embedding=self._hash_embedding(content),
-            metadata=metadata or {}
+            metadata=metadata
         )
-        self.memories.append(mem)
-        self._save()
+        mem.add_mission(metadata.get("mission"))
+        memories.append(mem)
+        if key:
+            self._by_content[key] = mem
+        if self._index is not None:
+            self._index.add([content])
+        self._log.append({"op": "add", **asdict(mem)})
+        self._embeddings.append(embed_text(content, self._embeddings.dim)[None], [row_key(mem.id)])
+        self._stores_since_sweep += 1
+        if self._stores_since_sweep >= self.retention.sweep_every:
+            self.evict()
+        self._maybe_compact()
         return mem
 
+    def _seen(self, mem: Memory, mission: Optional[str]):
+        now = time.time()
+        mem.occurrences += 1
+        # Seeing a screen again keeps it from expiring, like retrieving it would
+        mem.last_access = now
+        mem.add_mission(mission)
+        self.deduplicated += 1
+        # Absolute values, like access records: replaying one twice (a carried-over
+        # record on top of a compaction snapshot that already has it) is harmless
+        self._log.append({"op": "seen", "id": mem.id, "occurrences": mem.occurrences,
+                          "missions": list(mem.missions), "last_access": now})
+        self._maybe_compact()
+
+    def evict(self) -> int:
+        """Applies the retention policy now; returns how many memories it evicted"""
+        self._stores_since_sweep = 0
+        memories = self.memories
+        if not memories:
+            return 0
+        keep, expired, over = self.retention.select(memories, time.time())
+        removed = [memories[i] for i in np.flatnonzero(~keep)]
+        if not removed:
+            return 0
+        self._log.extend({"op": "remove", "id": m.id} for m in removed)
+        for m in removed:
+            key = self._content_key(m.content, m.metadata)
+            if self._by_content.get(key) is m:
+                del self._by_content[key]
+        self._memories = list(compress(memories, keep.tolist()))
+        self._embeddings.keep(keep)
+        if self._index is not None:
+            self._index.keep(keep)
+        self.evicted += len(removed)
+        self.expired += expired
+        logger.info(f"Evicted {len(removed)} memories ({self.retention.policy}: {expired} expired, "
+                    f"{over} over the cap of {self.retention.max_entries}); {len(self._memories)} left")
+        self._maybe_compact()
+        return len(removed)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"memories": len(self.memories), "deduplicated": self.deduplicated, "evicted": self.evicted,
+                "expired": self.expired, "policy": self.retention.policy, "max_entries": self.retention.max_entries}
+
+    def _get_index(self) -> Optional[HashedTfidfIndex]:
+        """The TF-IDF index, or None while a background thread builds it.
+
+        Large stores are indexed off the event loop from a snapshot of the
+        memories; once the thread is done, rows evicted meanwhile are dropped
+        and memories stored meanwhile (always at the end) are added.
+        """
+        if self._index is not None:
+            return self._index
+        if self._index_builder is None:
+            snapshot = list(self.memories)
+            if len(snapshot) <= _INLINE_INDEX_BUILD:
+                self._build_index(snapshot)
+            else:
+                self._index_builder = threading.Thread(target=self._build_index, args=(snapshot,),
+                                                       name="memory-index", daemon=True)
+                self._index_builder.start()
+                logger.info(f"Indexing {len(snapshot)} memories in the background")
+        elif self._index_builder.is_alive():
+            return None
+        if self._built_index is None:
+            return None
+
+        index, snapshot = self._built_index
+        self._built_index = None
+        live = {id(m) for m in self.memories}
+        mask = np.fromiter((id(m) in live for m in snapshot), dtype=bool, count=len(snapshot))
+        if not mask.all():
+            index.keep(mask)
+        index.add([m.content for m in self.memories[int(mask.sum()):]])
+        # From now on its merges (after evictions and growth) run off the event loop
+        index.background = True
+        self._index = index
+        return index
+
+    def _build_index(self, snapshot: List[Memory]):
+        start = time.perf_counter()
+        try:
+            index = HashedTfidfIndex()
+            index.add([m.content for m in snapshot])
+        except Exception as e:
+            # Retrieval keeps using the embedding matrix
+            logger.error(f"Building the memory index failed: {e}")
+            return
+        self._built_index = (index, snapshot)
+        logger.info(f"Indexed {len(snapshot)} memories in {time.perf_counter() - start:.1f} s")
+
     def retrieve(self, query: str, top_k: int = 5) -> List[Memory]:
         if not self.memories:
             return []
 
-        if HAS_SKLEARN and len(self.memories) > 1:
+        index = self._get_index() if HAS_SKLEARN and len(self.memories) > 1 else None
+        if index is not None:
             try:
                 # Local semantic search using TF-IDF with character n-grams for fuzzy matching
-                documents = [m.content for m in self.memories]
-                vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=(3, 5))
-                tfidf_matrix = vectorizer.fit_transform(documents)
-                query_vec = vectorizer.transform([query])
-
-                similarities = cosine_similarity(query_vec, tfidf_matrix).flatten()
-
-                # Get top_k indices
-                related_docs_indices = similarities.argsort()[::-1][:top_k]
-
-                results = []
-                for idx in related_docs_indices:
-                    if similarities[idx] > 0: # Only return somewhat relevant memories
-                        mem = self.memories[idx]
-                        results.append(mem)
+                results = [self.memories[idx] for idx, _ in index.search(query, top_k)]
 
                 # Update access stats
-                for m in results:
-                    m.access_count += 1
-                    m.last_access = time.time()
-
+                self._touch(results)
                 return results
             except Exception as e:
-                logger.error(f"TF-IDF retrieval failed, falling back to hash: {e}")
+                logger.error(f"TF-IDF retrieval failed, falling back to embeddings: {e}")
 
-        # Fallback to legacy hash-based retrieval
-        query_vec = self._hash_embedding(query)
-        scored = []
-        for mem in self.memories:
-            # Simple cosine similarity on hash vectors
-            sim = self._legacy_cosine_similarity(query_vec, mem.embedding)
-            scored.append((sim, mem))
+        # Fallback: one matmul over the memory-mapped embedding matrix
+        query_vec = embed_text(query, self._embeddings.dim)
+        results = [self.memories[idx] for idx, _ in self._embeddings.search(query_vec, top_k)]
 
-        scored.sort(key=lambda x: x[0], reverse=True)
-        results = [m for _, m in scored[:top_k]]
+        self._touch(results)
+        return results
 
-        for m in results:
+    def _touch(self, memories: List[Memory]):
+        now = time.time()
+        for m in memories:
             m.access_count += 1
-            m.last_access = time.time()
-        return results
+            m.last_access = now
+            self._log.append({"op": "access", "id": m.id, "access_count": m.access_count, "last_access": now})
+
+    def _maybe_compact(self):
+        # The slack keeps small stores from compacting on every few writes
+        if self._log.records > cfg.MEMORY_COMPACT_RATIO * len(self.memories) + 1000:
+            snapshot = list(self.memories)
+            self._log.compact(lambda: ({"op": "add", **asdict(m)} for m in snapshot))
 
-    def _legacy_cosine_similarity(self, a: List[float], b: List[float]) -> float:
-        if not a or not b: return 0
-        dot = sum(x*y for x,y in zip(a,b))
-        norm_a = sum(x*x for x in a) ** 0.5
-        norm_b = sum(x*x for x in b) ** 0.5
-        return dot / (norm_a * norm_b) if norm_a * norm_b else 0
+    def _load(self):
+        self._memories = []
+        if not self.storage_path.exists():
+            # Rows left over from a deleted log belong to memories that are gone
+            self._embeddings.reset()
+            if self.legacy_path and self.legacy_path.exists():
+                self._import_legacy()
+            return
 
-    def _save(self):
+        # Insertion order is row order; an id removed and added again moves to the end
+        by_id: Dict[str, Memory] = {}
+        start = time.perf_counter()
+        for record in self._log.replay():
+            try:
+                self._apply(by_id, record)
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Skipping malformed memory log record {record}: {e}")
+        self._memories = list(by_id.values())
+        logger.info(f"Loaded {len(self._memories)} memories from {self._log.records} log records "
+                    f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+        self._sync_embeddings()
+        self._fold_duplicates()
+        self.evict()
+
+    @staticmethod
+    def _apply(by_id: Dict[str, Memory], record: Dict):
+        op = record.pop("op", None)
+        if op == "add":
+            mem = Memory(**record)
+            by_id.pop(mem.id, None)
+            by_id[mem.id] = mem
+        elif op == "access" and record.get("id") in by_id:
+            mem = by_id[record["id"]]
+            mem.access_count, mem.last_access = record["access_count"], record["last_access"]
+        elif op == "seen" and record.get("id") in by_id:
+            mem = by_id[record["id"]]
+            mem.occurrences, mem.missions = record["occurrences"], list(record["missions"])
+            mem.last_access = record["last_access"]
+        elif op == "remove":
+            # Only the copy added before this record; the id may be stored again later
+            by_id.pop(record.get("id"), None)
+
+    def _sync_embeddings(self):
+        """Keeps the matrix rows that still line up with the memories and re-embeds the rest"""
+        matrix = self._embeddings
+        keys = np.fromiter((row_key(m.id) for m in self._memories), dtype=np.uint32, count=len(self._memories))
+        stored = matrix.keys
+        shared = min(len(stored), len(keys))
+        mismatch = np.flatnonzero(stored[:shared] != keys[:shared])
+        matrix.truncate(int(mismatch[0]) if mismatch.size else shared)
+        missing = self._memories[len(matrix):]
+        if missing:
+            matrix.append(np.stack([embed_text(m.content, matrix.dim) for m in missing]), keys[len(matrix):])
+            logger.info(f"Embedded {len(missing)} memories missing from {matrix.path.name}")
+
+    def _fold_duplicates(self):
+        """Merges memories sharing a content key into the first of them, keeping its row"""
+        self._by_content = {}
+        keep = []
+        for m in self._memories:
+            key = self._content_key(m.content, m.metadata)
+            first = self._by_content.get(key) if key else None
+            if first is None:
+                if key:
+                    self._by_content[key] = m
+                    m.add_mission(None if m.missions else m.metadata.get("mission"))
+                keep.append(True)
+                continue
+            first.occurrences += m.occurrences
+            first.access_count += m.access_count
+            first.last_access = max(first.last_access, m.last_access)
+            for mission in m.missions or [m.metadata.get("mission")]:
+                first.add_mission(mission)
+            keep.append(False)
+
+        folded = len(keep) - sum(keep)
+        if not folded:
+            return
+        self._memories = [m for m, kept in zip(self._memories, keep) if kept]
+        self._embeddings.keep(np.array(keep))
+        snapshot = list(self._memories)
+        self._log.compact(lambda: ({"op": "add", **asdict(m)} for m in snapshot), background=False)
+        logger.info(f"Folded {folded} duplicate memories; {len(snapshot)} left")
+
+    def _import_legacy(self):
         try:
-            self.storage_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.storage_path, 'w') as f:
-                json.dump([asdict(m) for m in self.memories], f)
+            with open(self.legacy_path) as f:
+                self._memories = [Memory(**{k: v for k, v in m.items() if k != "embedding"}) for m in json.load(f)]
         except Exception as e:
-            logger.error(f"Memory save error: {e}")
+            logger.error(f"Memory load error: {e}")
+            return
+        memories = list(self._memories)
+        self._log.compact(lambda: ({"op": "add", **asdict(m)} for m in memories), background=False)
+        self._sync_embeddings()
+        self._fold_duplicates()
+        self.evict()
+        logger.info(f"Imported {len(memories)} memories from {self.legacy_path.name} into {self.storage_path.name}")
 
-    def _load(self):
-        if self.storage_path.exists():
-            try:
-                with open(self.storage_path) as f:
-                    data = json.load(f)
-                    self.memories = [Memory(**m) for m in data]
-            except Exception as e:
-                logger.error(f"Memory load error: {e}")
+    def close(self):
+        self._log.close()
+        self._embeddings.close()
 
-memory_store = MemoryStore(cfg.VECTOR_DB_PATH)
+memory_store = MemoryStore(cfg.MEMORY_LOG_PATH, legacy_path=cfg.VECTOR_DB_PATH,
+                           embeddings_path=cfg.MEMORY_EMBEDDINGS_PATH)
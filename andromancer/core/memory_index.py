@@ -0,0 +1,171 @@
+import logging
+import threading
+from typing import List, Optional, Tuple
+import numpy as np
+
+try:
+    import scipy.sparse as sp
+    from sklearn.feature_extraction.text import HashingVectorizer
+    HAS_SKLEARN = True
+except ImportError:
+    HAS_SKLEARN = False
+
+logger = logging.getLogger("AndroMancer.MemoryIndex")
+
+# Tail parts are stacked together once there are this many
+_MAX_TAIL_PARTS = 32
+
+class HashedTfidfIndex:
+    """Incremental TF-IDF over hashed character n-grams.
+
+    Same analyzer, smoothed IDF and cosine scoring as a `TfidfVectorizer(
+    analyzer='char_wb', ngram_range=(3, 5))` refitted on every document, but
+    nothing is refitted: n-grams are hashed into a fixed feature space and
+    document frequencies are counted as rows are added.
+
+    The bulk of the rows live in a column-major (inverted) matrix, so a query
+    only reads the columns of its own n-grams. New rows go to a small row-major
+    tail that is merged in once it reaches 1/8 of the main matrix, which keeps
+    adding O(1) amortized. Row norms use the IDF from when the row was added
+    and are refreshed for every row on merge.
+
+    Dropped rows are tombstoned: masked out of the scores at once, and only
+    removed (with their n-grams' document counts) by the next merge. With
+    `background`, merges run on a thread and the index keeps answering from
+    the old matrix and the tail until the new matrix is swapped in.
+    """
+    def __init__(self, n_features: int = 2 ** 20, background: bool = False):
+        self.n_features = n_features
+        self.background = background
+        self.vectorizer = HashingVectorizer(analyzer="char_wb", ngram_range=(3, 5), n_features=n_features,
+                                            alternate_sign=False, norm=None, dtype=np.float32)
+        # Document counts over every stored row, tombstoned ones included until they are merged away
+        self.df = np.zeros(n_features, dtype=np.int64)
+        self.n_docs = 0
+        self._main: Optional["sp.csc_matrix"] = None
+        self._main_norms = np.zeros(0, dtype=np.float32)
+        self._tail: List[Tuple["sp.csr_matrix", np.ndarray]] = []
+        self._tail_rows = 0
+        # One flag per stored row, main then tail
+        self._alive = np.zeros(0, dtype=bool)
+        self._dead = 0
+        self._merger: Optional[threading.Thread] = None
+        self._merged = None
+
+    def __len__(self) -> int:
+        return self._alive.shape[0] - self._dead
+
+    @staticmethod
+    def _idf_of(features: np.ndarray, df: np.ndarray, n_docs: int) -> np.ndarray:
+        return (np.log((1 + n_docs) / (1 + df[features])) + 1).astype(np.float32)
+
+    def _idf(self, features: np.ndarray) -> np.ndarray:
+        return self._idf_of(features, self.df, self.n_docs)
+
+    def _row_norms(self, rows: "sp.csr_matrix", df: np.ndarray = None, n_docs: int = None) -> np.ndarray:
+        idf = self._idf(rows.indices) if df is None else self._idf_of(rows.indices, df, n_docs)
+        weighted = rows.data * idf
+        squares = sp.csr_matrix((weighted * weighted, rows.indices, rows.indptr), shape=rows.shape)
+        # Rows without any n-gram score 0 anyway; keep them from dividing by zero
+        return np.maximum(np.sqrt(np.asarray(squares.sum(axis=1)).ravel()), 1e-12).astype(np.float32)
+
+    def add(self, texts: List[str]):
+        if not texts:
+            return
+        self._finish_merge()
+        rows = self.vectorizer.transform(texts).tocsr()
+        np.add.at(self.df, rows.indices, 1)
+        self.n_docs += rows.shape[0]
+        self._tail.append((rows, self._row_norms(rows)))
+        self._tail_rows += rows.shape[0]
+        self._alive = np.concatenate([self._alive, np.ones(rows.shape[0], dtype=bool)])
+        if self._tail_rows >= max(1024, self._main_norms.shape[0] // 8):
+            self._start_merge()
+        elif len(self._tail) > _MAX_TAIL_PARTS and self._merger is None:
+            self._tail = [(sp.vstack([m for m, _ in self._tail], format="csr"),
+                           np.concatenate([n for _, n in self._tail]))]
+
+    def keep(self, mask: np.ndarray):
+        """Drops the rows where `mask` (one flag per row, in order) is False"""
+        self._finish_merge()
+        live = np.flatnonzero(self._alive)
+        dropped = live[~mask]
+        self._alive[dropped] = False
+        self._dead += dropped.shape[0]
+        # Mostly tombstones: not worth scanning them on every query
+        if self._dead > len(self):
+            self._start_merge()
+
+    # --- Merging ---
+
+    def _start_merge(self):
+        if self._merger is not None:
+            return
+        snapshot = (self._main, [m for m, _ in self._tail], self._alive.copy(), self.df.copy(), self.n_docs)
+        if not self.background:
+            self._merge(*snapshot)
+            self._finish_merge()
+            return
+        self._merger = threading.Thread(target=self._merge, args=snapshot, name="memory-index-merge", daemon=True)
+        self._merger.start()
+
+    def _merge(self, main, tail: List["sp.csr_matrix"], alive: np.ndarray, df: np.ndarray, n_docs: int):
+        """Stacks a snapshot into a new column-major matrix without its tombstones; touches no live state"""
+        parts = ([main.tocsr()] if main is not None else []) + tail
+        rows = sp.vstack(parts, format="csr") if parts else sp.csr_matrix((0, self.n_features), dtype=np.float32)
+        gone = np.zeros(self.n_features, dtype=np.int64)
+        dead = alive.shape[0] - int(alive.sum())
+        if dead:
+            gone = np.bincount(rows[~alive].indices, minlength=self.n_features).astype(np.int64)
+            rows = rows[alive]
+        norms = self._row_norms(rows, df - gone, n_docs - dead)
+        self._merged = (len(tail), alive, gone, dead, rows.tocsc(), norms)
+
+    def _finish_merge(self):
+        """Swaps in a finished merge, carrying over rows added or dropped meanwhile"""
+        if self._merger is not None:
+            if self._merger.is_alive():
+                return
+            self._merger = None
+        if self._merged is None:
+            return
+        tail_parts, alive, gone, dead, main, norms = self._merged
+        self._merged = None
+        self.df -= gone
+        self.n_docs -= dead
+        now = self._alive
+        self._alive = np.concatenate([now[:alive.shape[0]][alive], now[alive.shape[0]:]])
+        self._dead = self._alive.shape[0] - int(self._alive.sum())
+        self._main, self._main_norms = main, norms
+        self._tail = self._tail[tail_parts:]
+        self._tail_rows = sum(m.shape[0] for m, _ in self._tail)
+
+    def scores(self, query: str) -> np.ndarray:
+        """Cosine similarity of the query with every row, in insertion order"""
+        self._finish_merge()
+        q = self.vectorizer.transform([query]).tocsr()
+        if q.nnz == 0 or not len(self):
+            return np.zeros(len(self), dtype=np.float32)
+        idf = self._idf(q.indices)
+        weighted = q.data * idf
+        q_norm = float(np.sqrt(np.dot(weighted, weighted)))
+
+        parts = []
+        if self._main is not None:
+            parts.append(self._main[:, q.indices] @ (weighted * idf) / self._main_norms)
+        if self._tail:
+            dense = np.zeros(self.n_features, dtype=np.float32)
+            dense[q.indices] = weighted * idf
+            parts.extend(matrix @ dense / norms for matrix, norms in self._tail)
+        scores = np.concatenate(parts) / q_norm
+        return scores[self._alive] if self._dead else scores
+
+    def search(self, query: str, top_k: int) -> List[Tuple[int, float]]:
+        """(row, score) of the best `top_k` rows with a positive score, best first"""
+        scores = self.scores(query)
+        if not scores.shape[0]:
+            return []
+        k = min(top_k, scores.shape[0])
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(int(i), float(scores[i])) for i in best if scores[i] > 0]
@@ -0,0 +1,159 @@
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger("AndroMancer.MemoryLog")
+
+class MemoryLog:
+    """Append-only JSONL record log with batched fsync and background compaction.
+
+    Every append is flushed to the OS right away, so a crashed process loses
+    nothing; `fsync` runs at most every `fsync_interval` seconds, bounding
+    what a power loss can take. An append that skips it schedules a deferred
+    fsync, so records written just before the agent goes idle are synced too. A torn last line (a crash mid-write) is cut off
+    on replay. `compact` rewrites the log from a snapshot in a background
+    thread; records appended meanwhile are carried over before the swap.
+    """
+    def __init__(self, path: Path, fsync_interval: float = 1.0):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.records = 0
+        self._file = None
+        self._last_sync = 0.0
+        self._unsynced = False
+        self._sync_timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        self._carry_over: Optional[List[str]] = None
+        self._compactor: Optional[threading.Thread] = None
+
+    def replay(self) -> Iterator[Dict]:
+        """Yields every record in order, dropping a torn tail from the file"""
+        if not self.path.exists():
+            return
+        good_end = 0
+        with open(self.path, "rb") as f:
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # Torn write: the rest of this line never made it to disk
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    logger.warning(f"Skipping corrupt memory log record at byte {good_end}")
+                    good_end += len(raw)
+                    continue
+                good_end += len(raw)
+                self.records += 1
+                yield record
+        if good_end < self.path.stat().st_size:
+            logger.warning(f"Memory log ends in a torn record; truncating {self.path.name} to {good_end} bytes")
+            with open(self.path, "r+b") as f:
+                f.truncate(good_end)
+
+    def _open(self):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        return self._file
+
+    def append(self, record: Dict):
+        self.extend([record])
+
+    def extend(self, records: Iterable[Dict]):
+        """Appends several records with a single write"""
+        lines = [json.dumps(record, separators=(",", ":")) + "\n" for record in records]
+        if not lines:
+            return
+        with self._lock:
+            f = self._open()
+            f.write("".join(lines))
+            f.flush()
+            self.records += len(lines)
+            if self._carry_over is not None:
+                self._carry_over.extend(lines)
+            now = time.monotonic()
+            if now - self._last_sync >= self.fsync_interval:
+                self._fsync()
+            else:
+                self._unsynced = True
+                if self._sync_timer is None:
+                    self._sync_timer = threading.Timer(self._last_sync + self.fsync_interval - now, self._deferred_sync)
+                    self._sync_timer.daemon = True
+                    self._sync_timer.start()
+
+    def _fsync(self):
+        # Called with the lock held
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._last_sync = time.monotonic()
+        self._unsynced = False
+
+    def _deferred_sync(self):
+        with self._lock:
+            self._sync_timer = None
+            if self._unsynced:
+                self._fsync()
+
+    def sync(self):
+        with self._lock:
+            self._fsync()
+
+    @property
+    def compacting(self) -> bool:
+        return self._compactor is not None and self._compactor.is_alive()
+
+    def compact(self, snapshot: Callable[[], Iterable[Dict]], background: bool = True):
+        """Replaces the log with the records `snapshot` yields plus anything appended meanwhile"""
+        if self.compacting:
+            return
+        with self._lock:
+            self._carry_over = []
+        if background:
+            self._compactor = threading.Thread(target=self._compact, args=(snapshot,), name="memory-compaction", daemon=True)
+            self._compactor.start()
+        else:
+            self._compact(snapshot)
+
+    def _compact(self, snapshot: Callable[[], Iterable[Dict]]):
+        tmp = self.path.with_name(self.path.name + ".compact")
+        try:
+            written = 0
+            with open(tmp, "w", encoding="utf-8") as out:
+                for record in snapshot():
+                    out.write(json.dumps(record, separators=(",", ":")) + "\n")
+                    written += 1
+                with self._lock:
+                    out.writelines(self._carry_over)
+                    written += len(self._carry_over)
+                    out.flush()
+                    os.fsync(out.fileno())
+                    if self._file is not None:
+                        self._file.close()
+                        self._file = None
+                    # Everything the old file held is in the fsynced new one
+                    self._unsynced = False
+                    os.replace(tmp, self.path)
+                    before, self.records = self.records, written
+                    self._carry_over = None
+            logger.info(f"Memory log compacted: {before} -> {written} records")
+        except Exception as e:
+            logger.error(f"Memory log compaction failed: {e}")
+            with self._lock:
+                self._carry_over = None
+            tmp.unlink(missing_ok=True)
+
+    def close(self):
+        if self._compactor is not None:
+            self._compactor.join()
+        self.sync()
+        with self._lock:
+            if self._sync_timer is not None:
+                self._sync_timer.cancel()
+                self._sync_timer = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,76 @@
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Tuple
+import numpy as np
+from andromancer import config as cfg
+
+if TYPE_CHECKING:
+    from andromancer.core.memory import Memory
+
+logger = logging.getLogger("AndroMancer.MemoryRetention")
+
+POLICIES = ("lru", "lfu")
+
+def load_ttls() -> Dict[str, float]:
+    """Seconds without access after which a memory of a given `type` expires, from MEMORY_TTL (a JSON object)"""
+    if not cfg.MEMORY_TTL:
+        return {}
+    try:
+        return {k: float(v) for k, v in json.loads(cfg.MEMORY_TTL).items() if float(v) > 0}
+    except (ValueError, TypeError, AttributeError) as e:
+        logger.error(f"Invalid MEMORY_TTL, no memory expires: {e}")
+        return {}
+
+@dataclass
+class RetentionPolicy:
+    """Which memories a MemoryStore sweep drops.
+
+    Memories whose type has a TTL expire once they went that long without
+    being retrieved or stored again. If more than `max_entries` (0: unbounded)
+    remain, the lowest ranked go: "lru" ranks by last access, "lfu" by
+    retrievals plus times stored (at least 1, so new memories are not the
+    first to go) halved every `half_life` seconds since the last access.
+    """
+    max_entries: int = 0
+    policy: str = "lfu"
+    half_life: float = 7 * 24 * 3600
+    ttl: Dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def from_config(cls) -> "RetentionPolicy":
+        policy = cfg.MEMORY_EVICTION_POLICY.lower()
+        if policy not in POLICIES:
+            logger.error(f"Unknown MEMORY_EVICTION_POLICY '{policy}', using lfu")
+            policy = "lfu"
+        return cls(max(0, cfg.MEMORY_MAX_ENTRIES), policy, cfg.MEMORY_HALF_LIFE, load_ttls())
+
+    @property
+    def sweep_every(self) -> int:
+        """Stores between sweeps; the store overshoots `max_entries` by at most this much"""
+        return max(64, self.max_entries // 16) if self.max_entries else 1024
+
+    def _rank(self, memories: List["Memory"], last_access: np.ndarray, now: float) -> np.ndarray:
+        if self.policy == "lru":
+            return last_access
+        counts = np.fromiter((m.access_count + m.occurrences for m in memories), dtype=np.float64,
+                             count=len(memories))
+        return counts * 0.5 ** ((now - last_access) / self.half_life)
+
+    def select(self, memories: List["Memory"], now: float) -> Tuple[np.ndarray, int, int]:
+        """Mask of the memories to keep, how many expired and how many were over capacity"""
+        n = len(memories)
+        keep = np.ones(n, dtype=bool)
+        last_access = np.fromiter((m.last_access for m in memories), dtype=np.float64, count=n)
+        if self.ttl:
+            limits = np.fromiter((self.ttl.get(m.metadata.get("type"), np.inf) for m in memories),
+                                 dtype=np.float64, count=n)
+            keep &= now - last_access <= limits
+        expired = n - int(keep.sum())
+
+        over = n - expired - self.max_entries if self.max_entries else 0
+        if over > 0:
+            rank = self._rank(memories, last_access, now)
+            rank[~keep] = np.inf
+            keep[np.argpartition(rank, over - 1)[:over]] = False
+        return keep, expired, max(over, 0)
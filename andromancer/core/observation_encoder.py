@@ -0,0 +1,135 @@
+import json
+import logging
+from typing import Any, Dict, List
+from andromancer.core.capabilities.ui_element import UIElement, parse_bounds
+
+logger = logging.getLogger("AndroMancer.ObservationEncoder")
+
+# Short names for the widget classes that make up most screens
+_CLASS_ABBREVIATIONS = {
+    "Button": "btn",
+    "ImageButton": "ibtn",
+    "TextView": "txt",
+    "EditText": "edit",
+    "ImageView": "img",
+    "CheckBox": "chk",
+    "Switch": "sw",
+    "RadioButton": "radio",
+    "ToggleButton": "toggle",
+    "FrameLayout": "frame",
+    "LinearLayout": "row",
+    "RelativeLayout": "box",
+    "ViewGroup": "group",
+    "View": "view",
+    "RecyclerView": "list",
+    "ListView": "list",
+    "ScrollView": "scroll",
+    "Spinner": "spin",
+    "SeekBar": "seek",
+}
+
+# Keys already represented by the element table or too large for a prompt
+_SKIPPED_KEYS = {"xml", "elements", "summary", "current_package"}
+
+MAX_LABEL_CHARS = 40
+
+# Keys, quotes and indentation of one element in an indent=2 JSON dump of an observation
+_ELEMENT_DUMP_OVERHEAD = 140
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 chars per token), good enough to compare prompt sizes"""
+    return (len(text) + 3) // 4
+
+def abbreviate_class(cls: str) -> str:
+    short = cls.rsplit(".", 1)[-1]
+    return _CLASS_ABBREVIATIONS.get(short, short)
+
+def _element_label(element: UIElement) -> str:
+    label = element.label
+    if not label and element.resource_id:
+        # Unlabelled icons are still recognisable by their view id
+        label = "#" + element.resource_id.rsplit("/", 1)[-1]
+    label = " ".join(label.split()).replace("|", "/")
+    if len(label) > MAX_LABEL_CHARS:
+        label = label[:MAX_LABEL_CHARS - 1] + "…"
+    return label
+
+def _json_default(obj):
+    if isinstance(obj, UIElement):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _dump_chars(observation: Dict) -> int:
+    """Length of `json.dumps(observation, indent=2)` without building it; XML quotes get escaped"""
+    xml = observation.get("xml") or ""
+    chars = len(xml) + xml.count('"') + len(str(observation.get("summary", "")))
+    for element in observation.get("elements") or []:
+        if isinstance(element, UIElement):
+            chars += (len(element.text) + len(element.content_desc) + len(element.resource_id)
+                      + len(element.cls) + len(element.bounds) + len(element.package))
+        else:
+            chars += sum(len(str(v)) for v in element.values())
+    return chars + _ELEMENT_DUMP_OVERHEAD * len(observation.get("elements") or [])
+
+class ObservationEncoder:
+    """Serializes UI observations for LLM prompts.
+
+    Drops the raw XML and renders the parsed elements as an indexed table
+    (`id|label|x,y|class`), so the model can answer with `element_id` instead
+    of echoing bounds back. Keeps running totals of the estimated prompt tokens
+    before and after encoding.
+    """
+    def __init__(self):
+        self.encoded = 0
+        self.raw_tokens = 0
+        self.encoded_tokens = 0
+
+    def encode_elements(self, elements: List[Any]) -> str:
+        rows = ["id|label|x,y|class"]
+        for i, element in enumerate(elements):
+            if not isinstance(element, UIElement):
+                # Plain dicts from skills or restored state
+                element = UIElement(
+                    element.get("text", ""), element.get("content_desc", ""), element.get("resource_id", ""),
+                    element.get("class", ""), element.get("package", ""),
+                    *(parse_bounds(element.get("bounds", "")) or (0, 0, 0, 0))
+                )
+            rows.append(f"{i}|{_element_label(element)}|{element.cx},{element.cy}|{abbreviate_class(element.cls)}")
+        return "\n".join(rows)
+
+    def encode(self, observation: Dict) -> str:
+        lines = [f"App: {observation.get('current_package', 'unknown')}"]
+        elements = observation.get("elements") or []
+        if elements:
+            lines.append("Elements:")
+            lines.append(self.encode_elements(elements))
+        else:
+            lines.append("No clickable elements on screen")
+
+        extra = {k: v for k, v in observation.items() if k not in _SKIPPED_KEYS}
+        if extra:
+            lines.append(json.dumps(extra, separators=(",", ":"), ensure_ascii=False, default=_json_default))
+
+        encoded = "\n".join(lines)
+        self._record(observation, encoded)
+        return encoded
+
+    def _record(self, observation: Dict, encoded: str):
+        # Size of what the prompt used to carry, the indented JSON dump of everything,
+        # estimated rather than serialized: the dump cost more than the encoding itself
+        raw = (_dump_chars(observation) + 3) // 4
+        compact = estimate_tokens(encoded)
+        self.encoded += 1
+        self.raw_tokens += raw
+        self.encoded_tokens += compact
+        logger.debug(f"Observation encoded: ~{raw} -> ~{compact} tokens")
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "observations": self.encoded,
+            "raw_tokens": self.raw_tokens,
+            "encoded_tokens": self.encoded_tokens,
+            "reduction": 1 - self.encoded_tokens / self.raw_tokens if self.raw_tokens else 0.0
+        }
+
+observation_encoder = ObservationEncoder()
@@ -0,0 +1,37 @@
+import re
+from html import unescape
+from typing import Any, Dict, Optional
+
+# Every text and content-desc in a dump, clickable or not (titles are rarely clickable)
+_TEXT_ATTR_RE = re.compile(r'(?:text|content-desc)="([^"]+)"')
+
+def screen_text(observation: Dict[str, Any]) -> str:
+    """Lower-cased visible text of an observation, for substring checks"""
+    xml = observation.get("xml") or ""
+    parts = [unescape(t) for t in _TEXT_ATTR_RE.findall(xml)]
+    parts.extend(e.label for e in observation.get("elements", []) if getattr(e, "label", None))
+    return "\n".join(parts).lower()
+
+def check_postcondition(expect: Optional[Dict[str, Any]], observation: Dict[str, Any]) -> Optional[str]:
+    """Checks a plan step's `expect` against the screen after it ran.
+
+    Supported keys: `package` (foreground package), `text` (visible
+    somewhere on screen) and `text_absent`. Returns None when every given key
+    holds, else a description of what did not. Unknown keys are ignored.
+    """
+    if not expect or not isinstance(expect, dict):
+        return None
+
+    package = expect.get("package")
+    current = observation.get("current_package", "unknown")
+    if package and current != package:
+        return f"expected app {package}, found {current}"
+
+    text, absent = expect.get("text"), expect.get("text_absent")
+    if text or absent:
+        visible = screen_text(observation)
+        if text and str(text).lower() not in visible:
+            return f"expected text '{text}' on screen"
+        if absent and str(absent).lower() in visible:
+            return f"expected text '{absent}' to be gone"
+    return None
@@ -0,0 +1,103 @@
+import json
+import logging
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from andromancer import config as cfg
+from andromancer.core.observation_encoder import estimate_tokens
+
+logger = logging.getLogger("AndroMancer.PromptBudget")
+
+# Share of the user-prompt budget each section may use before it is cut
+DEFAULT_SHARES = {
+    "observation": 0.45,
+    "history": 0.2,
+    "memories": 0.15,
+    "working_memory": 0.1,
+    "skills": 0.1,
+}
+
+TRUNCATION_MARK = "…"
+
+def fit_lines(text: str, max_tokens: int) -> str:
+    """Keeps whole leading lines of `text` within `max_tokens`, marking the cut"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    kept, used = [], estimate_tokens(TRUNCATION_MARK)
+    for line in text.splitlines():
+        cost = estimate_tokens(line + "\n")
+        if used + cost > max_tokens:
+            break
+        kept.append(line)
+        used += cost
+    if not kept:
+        # A single long line: cut it instead of dropping it
+        return text[:max(0, max_tokens * 4 - len(TRUNCATION_MARK))] + TRUNCATION_MARK
+    return "\n".join(kept + [TRUNCATION_MARK])
+
+def load_shares() -> Dict[str, float]:
+    """DEFAULT_SHARES, overridden per section by PROMPT_BUDGET_SHARES (a JSON object)"""
+    shares = dict(DEFAULT_SHARES)
+    if cfg.PROMPT_BUDGET_SHARES:
+        try:
+            shares.update({k: float(v) for k, v in json.loads(cfg.PROMPT_BUDGET_SHARES).items()})
+        except (ValueError, AttributeError, TypeError) as e:
+            logger.error(f"Invalid PROMPT_BUDGET_SHARES, using defaults: {e}")
+    return shares
+
+class PromptBudget:
+    """Splits a token budget between prompt sections.
+
+    Each section is guaranteed its share of `total`. Budget a section does not
+    need goes to the sections that want more, in proportion to their shares,
+    so a short observation leaves room for a longer history and vice versa.
+    """
+    def __init__(self, total: int = None, shares: Dict[str, float] = None):
+        self.total = total or cfg.PROMPT_TOKEN_BUDGET
+        self.shares = shares or load_shares()
+
+    def allocate(self, wanted: Dict[str, int]) -> Dict[str, int]:
+        """Token limit per section, given the tokens each section would use uncut"""
+        granted = {k: min(n, int(self.total * self.shares.get(k, 0.0))) for k, n in wanted.items()}
+        spare = self.total - sum(granted.values())
+        hungry = [k for k in wanted if wanted[k] > granted[k]]
+        while spare > 0 and hungry:
+            weight = sum(self.shares.get(k, 0.0) for k in hungry) or len(hungry)
+            given = 0
+            for k in hungry:
+                extra = int(spare * (self.shares.get(k, 0.0) or 1.0) / weight) or 1
+                extra = min(extra, wanted[k] - granted[k], spare - given)
+                granted[k] += extra
+                given += extra
+            spare -= given
+            hungry = [k for k in hungry if wanted[k] > granted[k]]
+            if not given:
+                break
+        return granted
+
+class PromptSizes:
+    """Tokens per prompt section for recent steps"""
+    def __init__(self, maxlen: int = 200):
+        self.steps: Deque[Dict[str, int]] = deque(maxlen=maxlen)
+        self.truncated = 0
+        self.compressed = 0
+
+    def record(self, sizes: Dict[str, int]):
+        self.steps.append(sizes)
+
+    @property
+    def last(self) -> Optional[Dict[str, int]]:
+        return self.steps[-1] if self.steps else None
+
+    def stats(self) -> Dict[str, float]:
+        if not self.steps:
+            return {}
+        totals = [s["total"] for s in self.steps]
+        return {
+            "steps": len(self.steps),
+            "avg_tokens": sum(totals) / len(totals),
+            "max_tokens": max(totals),
+            "last_tokens": totals[-1],
+            "truncated_sections": self.truncated,
+            "history_compressions": self.compressed
+        }
@@ -0,0 +1,163 @@
+import asyncio
+import contextvars
+import logging
+import re
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Mapping, Optional, Tuple
+
+from andromancer import config as cfg
+
+logger = logging.getLogger("AndroMancer.RateLimiter")
+
+# Mission on whose behalf the current task calls the LLM; set by the agent loop
+current_mission: contextvars.ContextVar[str] = contextvars.ContextVar("current_mission", default="")
+
+_DURATION_RE = re.compile(r"([\d.]+)(ms|s|m|h)")
+_UNIT_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+def parse_reset(value: str) -> Optional[float]:
+    """'1m30.5s' / '7.66s' / '120ms' / '2' -> seconds"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(n) * _UNIT_SECONDS[unit] for n, unit in parts)
+
+class TokenBucket:
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.rate = refill_per_second
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        self._refill()
+        # A request larger than the whole bucket only waits for a full bucket
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate if self.rate > 0 else 60.0
+
+    def take(self, amount: float):
+        self._refill()
+        self.tokens -= amount
+
+    def sync(self, limit: Optional[float], remaining: Optional[float], reset: Optional[float]):
+        """Aligns the bucket with what the provider reported"""
+        self._refill()
+        if limit:
+            self.capacity = limit
+        if remaining is not None:
+            self.tokens = min(self.tokens, remaining)
+        if limit and remaining is not None and reset and limit > remaining:
+            # The provider refills the missing part within `reset` seconds
+            self.rate = (limit - remaining) / reset
+
+class RateLimiter:
+    """Client-side request and token budget for one API key.
+
+    Requests wait in one queue per mission and are granted round-robin across
+    missions as the request and token buckets refill, so missions sharing a
+    key take turns instead of all hitting a 429 together. Bucket sizes start
+    from LLM_RPM / LLM_TPM and follow the provider's `x-ratelimit-*` headers.
+    """
+    def __init__(self, requests_per_minute: float = None, tokens_per_minute: float = None):
+        rpm = requests_per_minute or cfg.LLM_RPM
+        tpm = tokens_per_minute or cfg.LLM_TPM
+        self.requests = TokenBucket(rpm, rpm / 60)
+        self.tokens = TokenBucket(tpm, tpm / 60)
+        self._queues: "OrderedDict[str, Deque[Tuple[asyncio.Future, int, float]]]" = OrderedDict()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._blocked_until = 0.0
+        self.granted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def acquire(self, tokens: int, mission: str = None):
+        mission = current_mission.get() if mission is None else mission
+        future = asyncio.get_event_loop().create_future()
+        self._queues.setdefault(mission, deque()).append((future, tokens, time.monotonic()))
+        self._schedule()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as the caller gave up; hand the budget back
+                self.requests.tokens += 1
+                self.tokens.tokens += tokens
+            raise
+
+    def _schedule(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._queues:
+            mission, queue = next(iter(self._queues.items()))
+            while queue and queue[0][0].done():
+                queue.popleft()  # Cancelled while waiting
+            if not queue:
+                del self._queues[mission]
+                continue
+
+            future, tokens, queued_at = queue[0]
+            wait = max(
+                self._blocked_until - time.monotonic(),
+                self.requests.wait_time(1),
+                self.tokens.wait_time(tokens)
+            )
+            if wait > 0:
+                self._timer = asyncio.get_event_loop().call_later(wait, self._schedule)
+                return
+
+            queue.popleft()
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            waited = time.monotonic() - queued_at
+            self.granted += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            future.set_result(None)
+            # Round robin: this mission goes to the back of the line
+            self._queues.move_to_end(mission)
+            if not queue:
+                del self._queues[mission]
+
+    def settle(self, estimated: int, actual: Optional[int]):
+        """Corrects the token bucket once the real usage is known"""
+        if actual is not None:
+            self.tokens.tokens = min(self.tokens.capacity, self.tokens.tokens + estimated - actual)
+
+    def update(self, headers: Mapping[str, str]):
+        def number(name: str) -> Optional[float]:
+            try:
+                return float(headers[name])
+            except (KeyError, ValueError):
+                return None
+
+        self.requests.sync(number("x-ratelimit-limit-requests"), number("x-ratelimit-remaining-requests"),
+                           parse_reset(headers.get("x-ratelimit-reset-requests", "")))
+        self.tokens.sync(number("x-ratelimit-limit-tokens"), number("x-ratelimit-remaining-tokens"),
+                         parse_reset(headers.get("x-ratelimit-reset-tokens", "")))
+
+    def block(self, seconds: float):
+        """Holds every queued request back, e.g. after a 429 with Retry-After"""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "granted": self.granted,
+            "queued": sum(len(q) for q in self._queues.values()),
+            "avg_wait_ms": self.total_wait / self.granted * 1000 if self.granted else 0.0,
+            "max_wait_ms": self.max_wait * 1000
+        }
@@ -1,10 +1,14 @@
+import asyncio
 import json
 import time
 import logging
+from collections import Counter
 from dataclasses import dataclass
-from typing import List, Optional, Dict, Any
-from andromancer.core.llm_client import AsyncLLMClient
+from typing import List, Optional, Dict, Any, Awaitable, Callable
+from andromancer.core.llm_client import AsyncLLMClient, LLMError, small_provider_pool
 from andromancer.core.memory import memory_store
+from andromancer.core.observation_encoder import estimate_tokens, observation_encoder
+from andromancer.core.prompt_budget import PromptBudget, PromptSizes, fit_lines
 from andromancer import config as cfg
 
 logger = logging.getLogger("AndroMancer.Reasoning")
@@ -41,8 +45,8 @@ For each step, think in this format:
 
 ## Rules
 1. ALWAYS analyze UI state before acting.
-2. If `working_memory` contains `last_action_error`, prioritize fixing that error. If a `tap` failed due to missing coordinates, extract them from the UI summary and try again.
-3. Use the coordinates (x, y) provided in the UI summary for `tap` actions. DO NOT emit a `tap` without `x` and `y` or a valid `element`.
+2. If `working_memory` contains `last_action_error`, prioritize fixing that error. If a `tap` failed due to missing coordinates, pick the element id from the observation and try again.
+3. The observation lists clickable elements as `id|label|x,y|class`. Tap them with `{{"element_id": id}}` (preferred) or their `x` and `y`. DO NOT emit a `tap` without `element_id` or `x` and `y`.
 4. If an action fails, analyze WHY and try an alternative approach.
 5. Use memory of past experiences to avoid repeating mistakes.
 6. For complex goals, decompose them into sub-tasks (e.g., 'Open WhatsApp', 'Send Message', 'Open YouTube').
@@ -52,13 +56,33 @@ For each step, think in this format:
 10. NEVER execute high-risk actions without confirmation.
 11. Consider suggestions from specialized skills if provided.
 12. Use ONLY the parameters defined in the capability definition.
+13. The goal, step, previous actions, memories and current screen are in the user message.
+"""
 
-## Current Context
-Goal: {goal}
+# Per-step context; kept out of the system prompt so its prefix stays byte-identical
+REACT_USER_PROMPT = """Goal: {goal}
 Step: {step}/{max_steps}
-Previous actions: {action_history}
-Relevant memories: {memories}
+Previous actions:
+{action_history}
+Working memory: {working_memory}
+
+Recent memories:
+{memories}
 {skill_context}
+Current observation:
+{observation}
+
+Analyze the current state and decide next actions.
+"""
+
+# Appended to the user message in PLAN_EXECUTE mode
+PLAN_MODE_PROMPT = """
+## Plan mode
+Return in `action_plan` every action needed to reach the goal from this screen, in order, as far as you can predict it.
+The actions run one per step without asking you again. Give each one an `expect` postcondition that must hold on the
+screen right after it, using any of: {"package": "com.whatsapp"}, {"text": "Chats"} (visible on screen),
+{"text_absent": "Loading"}. You are asked again only when a check fails or the plan runs out.
+Element ids are only valid on the current screen: on later screens tap with {"label": "visible text"} instead.
 """
 
 @dataclass
@@ -69,54 +93,104 @@ class Thought:
     confidence: float
     observation: Optional[Dict] = None
     reflection: Optional[str] = None
+    source: str = "llm"
+    tier: str = ""
+    # Completions requested to produce it: 2 when the small model was escalated
+    llm_calls: int = 0
 
 class ReActEngine:
-    """Reasoning + Acting implementation"""
-    def __init__(self, llm_client: Optional[AsyncLLMClient] = None):
+    """Reasoning + Acting implementation.
+
+    With MODEL_ROUTING, each step first goes to the small model. The large
+    model (`llm`) takes over when the last action failed, the screen has not
+    changed for the last steps, or the small model reports a confidence below
+    CONFIDENCE_THRESHOLD, answers with an empty plan (mission done) or fails.
+    """
+    def __init__(self, llm_client: Optional[AsyncLLMClient] = None, small_llm_client: Optional[AsyncLLMClient] = None):
         self.llm = llm_client or AsyncLLMClient()
+        # An explicit large client without a small one means no routing
+        if small_llm_client is None and cfg.MODEL_ROUTING and llm_client is None:
+            small_pool = small_provider_pool()
+            small_llm_client = AsyncLLMClient(providers=small_pool) if small_pool else None
+        self.small_llm = small_llm_client
         self.thought_history: List[Thought] = []
         self.working_memory: Dict = {}
+        # (capability list it was built from, rendered system prompt)
+        self._system_prefix: Optional[tuple] = None
+        self.tier_counts: Counter = Counter()
+        self.escalations: Counter = Counter()
+        self.completions = 0
+        self.budget = PromptBudget()
+        self.prompt_sizes = PromptSizes()
+        # Rolling summary of thought_history[:_summarized], folded in oldest first
+        self._summarized = 0
+        self._summary_actions: Counter = Counter()
+        self._summary_outcomes: Counter = Counter()
 
-    async def reason(self, goal: str, observation: Dict, step: int, capabilities: List[Dict], skill_suggestions: List[str] = None) -> Thought:
-        relevant_memories = memory_store.retrieve(f"{goal} {str(observation)}", top_k=3)
-        memory_context = "\n".join([m.content for m in relevant_memories])
+    async def prepare_prompt(self, capabilities: List[Dict]):
+        """Builds the system prompt ahead of time, e.g. while actions run"""
+        if not self._prefix_current(capabilities):
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, self.system_prompt, capabilities)
 
-        skill_context = ""
-        if skill_suggestions:
-            skill_context = "\n## Skill Suggestions\n" + "\n".join([f"- {s}" for s in skill_suggestions])
+    def _prefix_current(self, capabilities: List[Dict]) -> bool:
+        return self._system_prefix is not None and self._system_prefix[0] is capabilities
 
-        user_prompt = f"""Goal: {goal}
-Step: {step}
-Working memory: {self.working_memory}
-
-Recent memories:
-{memory_context}
+    def system_prompt(self, capabilities: List[Dict]) -> str:
+        """The static system prompt. It only changes when the registry hands out a new
+        capability list, so provider-side prompt caching can reuse it across steps.
+        """
+        if not self._prefix_current(capabilities):
+            rendered = REACT_SYSTEM_PROMPT.format(capabilities_json=json.dumps(capabilities, indent=2))
+            self._system_prefix = (capabilities, rendered)
+            logger.debug(f"System prompt rebuilt ({len(rendered)} chars)")
+        return self._system_prefix[1]
 
-Current observation:
-{json.dumps(observation, indent=2)}
+    async def reason(self, goal: str, observation: Dict, step: int, capabilities: List[Dict], skill_suggestions: List[str] = None,
+                     on_action: Optional[Callable[[Dict], Awaitable[None]]] = None, plan: bool = False) -> Thought:
+        """Asks the LLM for the next plan. With `on_action` and LLM_STREAMING set,
+        plan entries are handed to the callback while the response streams in.
+        With `plan`, it asks for the whole remaining plan with a postcondition per action.
+        """
+        # The summary (app plus labelled elements) is what stored screen memories hold; the raw XML is noise
+        relevant_memories = memory_store.retrieve(f"{goal} {observation.get('summary', '')}", top_k=3)
+        memory_context = "\n".join([m.content for m in relevant_memories])
 
-Analyze the current state and decide next actions.
-"""
+        skill_context = ""
+        if skill_suggestions:
+            skill_context = "\n".join([f"- {s}" for s in skill_suggestions])
 
+        completions = self.completions
         try:
-            system_prompt = REACT_SYSTEM_PROMPT.format(
-                capabilities_json=json.dumps(capabilities, indent=2),
+            system_prompt = self.system_prompt(capabilities)
+            sections = self._fit_sections(system_prompt, {
+                "observation": observation_encoder.encode(observation),
+                "history": None,
+                "memories": memory_context,
+                "working_memory": str(self.working_memory),
+                "skills": skill_context
+            })
+            user_prompt = REACT_USER_PROMPT.format(
                 goal=goal,
                 step=step,
                 max_steps=cfg.MAX_STEPS,
-                action_history=[t.action_plan for t in self.thought_history[-10:]],
-                memories=memory_context,
-                skill_context=skill_context
-            )
+                action_history=sections["history"] or "none",
+                working_memory=sections["working_memory"],
+                memories=sections["memories"],
+                skill_context=f"\n## Skill Suggestions\n{sections['skills']}\n" if sections["skills"] else "",
+                observation=sections["observation"]
+            ) + (PLAN_MODE_PROMPT if plan else "")
+            self._record_prompt_size(step, system_prompt, user_prompt, sections)
 
-            thought_data = await self.llm.complete_chat(system_prompt, user_prompt)
+            thought_data, tier = await self._routed_chat(system_prompt, user_prompt, observation, step, on_action)
 
             thought = Thought(
                 step=step,
                 reasoning=thought_data.get("reasoning", "No reasoning provided"),
                 action_plan=thought_data.get("action_plan", []),
                 confidence=float(thought_data.get("confidence", 0.0)),
-                observation=observation
+                observation=observation,
+                tier=tier
             )
 
         except Exception as e:
@@ -124,14 +198,123 @@ Analyze the current state and decide next actions.
             thought = Thought(
                 step=step,
                 reasoning=f"Error in reasoning: {e}. Falling back to basic observation.",
-                action_plan=[{"capability": "get_ui", "params": {}}],
+                action_plan=[{"capability": "get_ui", "params": {"use_cache": True}}],
                 confidence=0.5,
-                observation=observation
+                observation=observation,
+                source="fallback"
             )
 
+        thought.llm_calls = self.completions - completions
         self.thought_history.append(thought)
         return thought
 
+    # --- Prompt budget ---
+
+    def _fit_sections(self, system_prompt: str, sections: Dict[str, Optional[str]]) -> Dict[str, str]:
+        """Cuts each section to its share of PROMPT_TOKEN_BUDGET; the action history
+        (passed as None) is compressed into the rolling summary instead of cut.
+        """
+        history_lines = [self._history_line(t) for t in self.thought_history[self._summarized:]]
+        wanted = {k: estimate_tokens(v) for k, v in sections.items() if v is not None}
+        wanted["history"] = estimate_tokens("\n".join([self._history_summary()] + history_lines))
+        limits = self.budget.allocate(wanted)
+
+        fitted = {}
+        for name, text in sections.items():
+            if name == "history":
+                fitted[name] = self._fit_history(history_lines, limits[name])
+            elif wanted[name] > limits[name]:
+                fitted[name] = fit_lines(text, limits[name])
+                self.prompt_sizes.truncated += 1
+            else:
+                fitted[name] = text
+        return fitted
+
+    @staticmethod
+    def _history_line(thought: Thought) -> str:
+        actions = "; ".join(f"{a.get('capability')}({json.dumps(a.get('params', {}), separators=(',', ':'))})"
+                            for a in thought.action_plan)
+        outcome = f" -> {thought.reflection.strip()}" if thought.reflection else ""
+        return f"{thought.step}: {actions or 'no action'}{outcome}"
+
+    def _history_summary(self) -> str:
+        if not self._summarized:
+            return ""
+        first, last = self.thought_history[0].step, self.thought_history[self._summarized - 1].step
+        actions = ", ".join(f"{name} x{n}" for name, n in self._summary_actions.most_common())
+        outcomes = ", ".join(f"{n} {name}" for name, n in sorted(self._summary_outcomes.items()))
+        return f"Steps {first}-{last} (summary): {actions or 'no actions'} ({outcomes})"
+
+    def _fit_history(self, lines: List[str], limit: int) -> str:
+        # Fold the oldest steps into the summary until the rest fits, keeping the latest step verbatim
+        while len(lines) > 1 and estimate_tokens("\n".join([self._history_summary()] + lines)) > limit:
+            thought = self.thought_history[self._summarized]
+            self._summary_actions.update(a.get("capability") for a in thought.action_plan)
+            self._summary_outcomes["failed" if "Failed" in (thought.reflection or "") else "ok"] += 1
+            self._summarized += 1
+            self.prompt_sizes.compressed += 1
+            lines = lines[1:]
+        summary = self._history_summary()
+        return fit_lines("\n".join([summary] + lines if summary else lines), limit)
+
+    def _record_prompt_size(self, step: int, system_prompt: str, user_prompt: str, sections: Dict[str, str]):
+        sizes = {name: estimate_tokens(text) for name, text in sections.items()}
+        sizes["system"] = estimate_tokens(system_prompt)
+        sizes["total"] = sizes["system"] + estimate_tokens(user_prompt)
+        self.prompt_sizes.record(sizes)
+        logger.debug(f"Step {step} prompt tokens: " + ", ".join(f"{k}={v}" for k, v in sizes.items()))
+
+    # --- Model routing ---
+
+    def _escalation_reason(self, observation: Dict) -> Optional[str]:
+        """Why this step needs the large model before asking the small one, if at all"""
+        if "last_action_error" in self.working_memory:
+            return "last_action_failed"
+        recent = [t.observation.get("summary") for t in self.thought_history[-2:] if t.observation]
+        if len(recent) == 2 and all(s == observation.get("summary") for s in recent):
+            return "stagnation"
+        return None
+
+    async def _routed_chat(self, system_prompt: str, user_prompt: str, observation: Dict, step: int,
+                           on_action: Optional[Callable[[Dict], Awaitable[None]]]):
+        """Returns (decoded completion, tier that produced it)"""
+        reason = self._escalation_reason(observation) if self.small_llm else None
+        if self.small_llm and reason is None:
+            try:
+                # Not streamed: its actions must not start before its confidence is known
+                self.completions += 1
+                thought_data = await self.small_llm.complete_chat(system_prompt, user_prompt)
+                if not thought_data.get("action_plan"):
+                    reason = "claimed_done"
+                elif float(thought_data.get("confidence", 0.0)) < cfg.CONFIDENCE_THRESHOLD:
+                    reason = "low_confidence"
+                else:
+                    self.tier_counts["small"] += 1
+                    logger.info(f"Step {step} handled by the small model ({self.small_llm.model})")
+                    return thought_data, "small"
+            except (LLMError, ValueError) as e:
+                reason = "small_failed"
+                logger.warning(f"Small model failed on step {step}: {e}")
+
+        self.completions += 1
+        if on_action and cfg.LLM_STREAMING:
+            thought_data = await self.llm.stream_chat(system_prompt, user_prompt, on_action)
+        else:
+            thought_data = await self.llm.complete_chat(system_prompt, user_prompt)
+        self.tier_counts["large"] += 1
+        if reason:
+            self.escalations[reason] += 1
+        logger.info(f"Step {step} handled by the large model ({self.llm.model})"
+                    + (f", escalated: {reason}" if reason else ""))
+        return thought_data, "large"
+
+    def routing_stats(self) -> Dict[str, Any]:
+        return {
+            "small": self.tier_counts["small"],
+            "large": self.tier_counts["large"],
+            "escalations": dict(self.escalations)
+        }
+
     async def generate_summary(self, goal: str, status: str) -> str:
         """Generates a natural language summary of the mission's outcome and actions."""
         history_summary = []
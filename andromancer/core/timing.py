@@ -0,0 +1,62 @@
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Optional, Tuple
+
+Span = Tuple[float, float]
+
+def overlap(a: Optional[Span], b: Optional[Span]) -> float:
+    """Seconds during which both spans were running"""
+    if not a or not b:
+        return 0.0
+    return max(0.0, min(a[1], b[1]) - max(a[0], b[0]))
+
+class StepTimer:
+    """Wall-clock spans of each agent loop phase within one step"""
+    def __init__(self, step: int):
+        self.step = step
+        self.spans: Dict[str, Span] = {}
+        self.overlap = 0.0
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans[name] = (start, time.perf_counter())
+
+    def add(self, name: str, span: Span):
+        self.spans[name] = span
+
+    def window(self, *names: str) -> Optional[Span]:
+        """Smallest span covering the given phases"""
+        spans = [self.spans[n] for n in names if n in self.spans]
+        if not spans:
+            return None
+        return min(s[0] for s in spans), max(s[1] for s in spans)
+
+    def durations_ms(self) -> Dict[str, float]:
+        return {name: (end - start) * 1000 for name, (start, end) in self.spans.items()}
+
+class LoopTimings:
+    """Recent step timers, aggregated per phase"""
+    def __init__(self, maxlen: int = 200):
+        self.steps: Deque[StepTimer] = deque(maxlen=maxlen)
+
+    def record(self, timer: StepTimer):
+        self.steps.append(timer)
+
+    def stats(self) -> Dict[str, float]:
+        """Mean milliseconds per phase, plus the mean time hidden by overlapping phases"""
+        if not self.steps:
+            return {}
+        totals: Dict[str, float] = defaultdict(float)
+        counts: Dict[str, int] = defaultdict(int)
+        for timer in self.steps:
+            for name, ms in timer.durations_ms().items():
+                totals[name] += ms
+                counts[name] += 1
+        stats = {name: totals[name] / counts[name] for name in totals}
+        stats["overlap"] = sum(t.overlap for t in self.steps) * 1000 / len(self.steps)
+        return stats
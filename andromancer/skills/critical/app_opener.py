@@ -1,7 +1,7 @@
 import re
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from andromancer.skills.base import Skill, SkillResult, SkillPriority
-from andromancer.utils.adb import adb_manager
+from andromancer.core.app_catalog import get_app_catalog
 from andromancer.utils.apps import get_package_name
 from andromancer.utils.text import normalize_text
 
@@ -9,6 +9,9 @@ class AppOpenerSkill(Skill):
     name = "AppOpener"
     priority = SkillPriority.CRITICAL
 
+    def __init__(self, device_id: Optional[str] = None):
+        self.device_id = device_id
+
     async def evaluate(self, goal: str, observation: Dict[str, Any], history: List[Any]) -> SkillResult:
         goal_norm = normalize_text(goal)
 
@@ -77,23 +80,19 @@ class AppOpenerSkill(Skill):
                 suggestion=f"Opening known app: {app_name}"
             )
 
-        # Level 2: ADB Package search (if not a common word)
+        # Level 2: Installed app catalog (if not a common word)
         if len(app_name) > 2:
             try:
-                await adb_manager.ensure_connected()
-                result = await adb_manager._run(["adb", "shell", "pm", "list", "packages"])
-                if result.returncode == 0:
-                    packages = result.stdout.splitlines()
-                    for p in packages:
-                        p_name = p.replace("package:", "").strip()
-                        if app_name == p_name.split('.')[-1].lower() or app_name == p_name.lower():
-                            return SkillResult(
-                                can_handle=True,
-                                confidence=0.91,
-                                actions=[{"capability": "open_app", "params": {"app_name": p_name}}],
-                                override_llm=True,
-                                suggestion=f"Found package via ADB: {p_name}"
-                            )
+                catalog = await get_app_catalog(self.device_id)
+                entry = catalog.resolve(app_name, min_score=0.75)
+                if entry:
+                    return SkillResult(
+                        can_handle=True,
+                        confidence=0.91,
+                        actions=[{"capability": "open_app", "params": {"app_name": entry.package}}],
+                        override_llm=True,
+                        suggestion=f"Found installed app: {entry.package}"
+                    )
             except Exception:
                 pass
 
@@ -9,11 +9,12 @@ class PatternSkill(Skill):
         if len(history) < 3:
             return SkillResult(can_handle=False, confidence=0.0, actions=[])
 
-        # 1. Same action 3+ times
+        # 1. Same action 3+ times (planned steps are checked against their postconditions instead)
         last_actions = []
-        for thought in history[-3:]:
-            if thought.action_plan:
-                last_actions.append(thought.action_plan[0].get("capability"))
+        if not any(getattr(thought, "source", "") == "plan" for thought in history[-3:]):
+            for thought in history[-3:]:
+                if thought.action_plan:
+                    last_actions.append(thought.action_plan[0].get("capability"))
 
         if len(last_actions) == 3 and len(set(last_actions)) == 1:
             return SkillResult(
@@ -1,15 +1,21 @@
 import asyncio
+import re
 import subprocess
 import logging
 from typing import List, Optional
 from concurrent.futures import ThreadPoolExecutor
 from andromancer import config as cfg
+from andromancer.utils.adb_protocol import adb_client, ADBProtocolError
 
 logger = logging.getLogger("AndroMancer.ADB")
 
 class ADBConnectionError(Exception):
     pass
 
+def safe_serial(serial: Optional[str]) -> str:
+    """Filesystem-safe form of a device serial (wireless serials contain ':')"""
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", serial or "default")
+
 class ADBManager:
     _instance = None
 
@@ -33,18 +39,29 @@ class ADBManager:
                 )
             )
 
+    async def list_devices(self) -> List[str]:
+        """Serials of devices in the 'device' state"""
+        if cfg.ADB_NATIVE_CLIENT:
+            try:
+                return [serial for serial, state in await adb_client.devices() if state == "device"]
+            except (OSError, ADBProtocolError) as e:
+                # The CLI also starts the adb server if it is not running yet
+                logger.debug(f"adb server not reachable natively, using adb CLI: {e}")
+
+        result = await self._run(["adb", "devices"], timeout=cfg.ADB_TIMEOUT)
+        out = (result.stdout or "") + (result.stderr or "")
+        lines = [l for l in out.splitlines() if "\tdevice" in l and not l.startswith("List of devices")]
+        return [l.strip().split()[0] for l in lines]
+
     async def ensure_connected(self) -> bool:
         if getattr(self, "_initialized", False):
             return True
 
         try:
-            result = await self._run(["adb", "devices"], timeout=cfg.ADB_TIMEOUT)
-            out = (result.stdout or "") + (result.stderr or "")
-            devices = [l for l in out.splitlines() if "\tdevice" in l and not l.startswith("List of devices")]
+            devices = await self.list_devices()
             if not devices:
                 raise ADBConnectionError("No Android device connected")
-            first_device_line = devices[0].strip()
-            self.device_id = first_device_line.split()[0]
+            self.device_id = devices[0]
             self._initialized = True
             logger.info(f"ADB connected: {self.device_id}")
             return True
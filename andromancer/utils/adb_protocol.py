@@ -0,0 +1,274 @@
+import asyncio
+import logging
+import os
+import struct
+import subprocess
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from andromancer import config as cfg
+from andromancer.utils.adb_shell import ADBCommandLostError
+
+logger = logging.getLogger("AndroMancer.ADBProtocol")
+
+# shell,v2 packet ids
+SHELL_STDIN = 0
+SHELL_STDOUT = 1
+SHELL_STDERR = 2
+SHELL_EXIT = 3
+SHELL_CLOSE_STDIN = 4
+
+SYNC_CHUNK = 64 * 1024
+
+class ADBProtocolError(Exception):
+    pass
+
+class ADBServerClient:
+    """Asyncio client for the host side of the adb server protocol (TCP 5037).
+
+    Talks to the local adb server directly instead of forking the `adb` binary.
+    The server consumes one socket per service, so concurrency comes from a pool
+    of pre-connected spare sockets bounded by a semaphore.
+    """
+    def __init__(self, host: str = None, port: int = None, max_connections: int = None):
+        self.host = host or cfg.ADB_SERVER_HOST
+        self.port = port or cfg.ADB_SERVER_PORT
+        self.max_connections = max_connections or cfg.ADB_MAX_CONNECTIONS
+        self._spare: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._replenishing = False
+        self.connections_opened = 0
+        self.spare_hits = 0
+
+    # --- Connection handling ---
+
+    async def _open(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        self.connections_opened += 1
+        return reader, writer
+
+    async def _connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        while self._spare:
+            reader, writer = self._spare.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                self.spare_hits += 1
+                return reader, writer
+        return await self._open()
+
+    async def _replenish(self):
+        """Keeps a few idle sockets connected so the next request skips the handshake"""
+        if self._replenishing:
+            return
+        self._replenishing = True
+        try:
+            while len(self._spare) < min(2, self.max_connections):
+                self._spare.append(await self._open())
+        except OSError:
+            pass
+        finally:
+            self._replenishing = False
+
+    async def _session(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_connections)
+        await self._semaphore.acquire()
+        try:
+            conn = await self._connect()
+        except Exception:
+            self._semaphore.release()
+            raise
+        asyncio.ensure_future(self._replenish())
+        return conn
+
+    def _finish(self, writer: asyncio.StreamWriter):
+        writer.close()
+        self._semaphore.release()
+
+    # --- Wire format ---
+
+    @staticmethod
+    async def _send(writer: asyncio.StreamWriter, request: str):
+        data = request.encode()
+        writer.write(b"%04x" % len(data) + data)
+        await writer.drain()
+
+    @staticmethod
+    async def _read_status(reader: asyncio.StreamReader):
+        status = await reader.readexactly(4)
+        if status == b"OKAY":
+            return
+        if status == b"FAIL":
+            length = int(await reader.readexactly(4), 16)
+            message = (await reader.readexactly(length)).decode(errors="replace")
+            raise ADBProtocolError(message)
+        raise ADBProtocolError(f"Unexpected adb server status: {status!r}")
+
+    async def _read_hex_block(self, reader: asyncio.StreamReader) -> bytes:
+        length = int(await reader.readexactly(4), 16)
+        return await reader.readexactly(length)
+
+    async def _transport(self, serial: Optional[str]):
+        reader, writer = await self._session()
+        try:
+            await self._send(writer, f"host:transport:{serial}" if serial else "host:transport-any")
+            await self._read_status(reader)
+        except Exception:
+            self._finish(writer)
+            raise
+        return reader, writer
+
+    # --- Host services ---
+
+    async def devices(self) -> List[Tuple[str, str]]:
+        reader, writer = await self._session()
+        try:
+            await self._send(writer, "host:devices")
+            await self._read_status(reader)
+            payload = (await self._read_hex_block(reader)).decode()
+        finally:
+            self._finish(writer)
+        return [tuple(line.split("\t", 1)) for line in payload.splitlines() if "\t" in line]
+
+    # --- Device services ---
+
+    async def shell(self, serial: Optional[str], command: str, timeout: float = 15) -> subprocess.CompletedProcess:
+        """Runs a command with the shell v2 protocol to get separate streams and an exit code.
+
+        OSError and ADBProtocolError mean the shell service never started, so
+        the command can be retried another way. Once it has started, a timeout
+        raises subprocess.TimeoutExpired and a dropped stream ADBCommandLostError.
+        """
+        try:
+            return await asyncio.wait_for(self._shell_v2(serial, command), timeout=timeout)
+        except asyncio.TimeoutError:
+            raise subprocess.TimeoutExpired(command, timeout)
+
+    async def _shell_v2(self, serial: Optional[str], command: str) -> subprocess.CompletedProcess:
+        reader, writer = await self._transport(serial)
+        try:
+            await self._send(writer, f"shell,v2,raw:{command}")
+            await self._read_status(reader)
+        except Exception:
+            self._finish(writer)
+            raise
+
+        stdout, stderr, returncode = bytearray(), bytearray(), None
+        try:
+            writer.write(struct.pack("<BI", SHELL_CLOSE_STDIN, 0))
+            await writer.drain()
+            while returncode is None:
+                packet_id, length = struct.unpack("<BI", await reader.readexactly(5))
+                data = await reader.readexactly(length)
+                if packet_id == SHELL_STDOUT:
+                    stdout += data
+                elif packet_id == SHELL_STDERR:
+                    stderr += data
+                elif packet_id == SHELL_EXIT:
+                    returncode = data[0] if data else 0
+        except (asyncio.IncompleteReadError, OSError) as e:
+            raise ADBCommandLostError(f"adb shell stream closed before the exit status: {e!r}")
+        finally:
+            self._finish(writer)
+
+        return subprocess.CompletedProcess(
+            args=command,
+            returncode=returncode,
+            stdout=stdout.decode("utf-8", errors="replace"),
+            stderr=stderr.decode("utf-8", errors="replace")
+        )
+
+    async def exec_out(self, serial: Optional[str], command: str, timeout: float = 15) -> bytes:
+        """Raw binary stdout of a command (no pty, no line-ending translation)"""
+        async def _run():
+            reader, writer = await self._transport(serial)
+            try:
+                await self._send(writer, f"exec:{command}")
+                await self._read_status(reader)
+                return await reader.read()
+            finally:
+                self._finish(writer)
+        return await asyncio.wait_for(_run(), timeout=timeout)
+
+    # --- Sync service ---
+
+    @staticmethod
+    def _sync_request(command: bytes, length: int, data: bytes = b"") -> bytes:
+        return command + struct.pack("<I", length) + data
+
+    async def _sync_check(self, reader: asyncio.StreamReader):
+        response = await reader.readexactly(8)
+        command, length = response[:4], struct.unpack("<I", response[4:])[0]
+        if command == b"OKAY":
+            return
+        message = (await reader.readexactly(length)).decode(errors="replace")
+        raise ADBProtocolError(f"sync failed: {message}")
+
+    async def push(self, serial: Optional[str], local_path: Path, remote_path: str, mode: int = 0o644):
+        reader, writer = await self._transport(serial)
+        try:
+            await self._send(writer, "sync:")
+            await self._read_status(reader)
+            target = f"{remote_path},{mode}".encode()
+            writer.write(self._sync_request(b"SEND", len(target), target))
+            with open(local_path, "rb") as f:
+                while True:
+                    chunk = f.read(SYNC_CHUNK)
+                    if not chunk:
+                        break
+                    writer.write(self._sync_request(b"DATA", len(chunk), chunk))
+                    await writer.drain()
+            writer.write(self._sync_request(b"DONE", int(time.time())))
+            await writer.drain()
+            await self._sync_check(reader)
+            writer.write(self._sync_request(b"QUIT", 0))
+            await writer.drain()
+        finally:
+            self._finish(writer)
+
+    async def pull_bytes(self, serial: Optional[str], remote_path: str) -> bytes:
+        reader, writer = await self._transport(serial)
+        try:
+            await self._send(writer, "sync:")
+            await self._read_status(reader)
+            path = remote_path.encode()
+            writer.write(self._sync_request(b"RECV", len(path), path))
+            await writer.drain()
+
+            content = bytearray()
+            while True:
+                header = await reader.readexactly(8)
+                command, length = header[:4], struct.unpack("<I", header[4:])[0]
+                if command == b"DATA":
+                    content += await reader.readexactly(length)
+                elif command == b"DONE":
+                    break
+                elif command == b"FAIL":
+                    message = (await reader.readexactly(length)).decode(errors="replace")
+                    raise ADBProtocolError(f"pull failed: {message}")
+                else:
+                    raise ADBProtocolError(f"Unexpected sync response: {command!r}")
+            writer.write(self._sync_request(b"QUIT", 0))
+            await writer.drain()
+        finally:
+            self._finish(writer)
+        return bytes(content)
+
+    async def pull(self, serial: Optional[str], remote_path: str, local_path: Path):
+        content = await self.pull_bytes(serial, remote_path)
+        tmp_path = f"{local_path}.part"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, local_path)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "connections_opened": self.connections_opened,
+            "spare_hits": self.spare_hits
+        }
+
+    async def close(self):
+        while self._spare:
+            _, writer = self._spare.pop()
+            writer.close()
+
+adb_client = ADBServerClient()
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import subprocess
+import uuid
+from typing import Dict, List, Optional
+from andromancer import config as cfg
+
+logger = logging.getLogger("AndroMancer.ADBShell")
+
+class ADBSessionError(Exception):
+    pass
+
+class ADBCommandLostError(Exception):
+    """The command was sent but its result never came back; it may have run, so it is not retried"""
+
+class ShellSession:
+    """Long-lived `adb shell` process that runs framed commands one at a time.
+
+    Each command is wrapped so the remote shell prints a unique marker followed
+    by the exit status once it finishes, which lets us read stdout and the
+    return code back without spawning a new `adb` process per action.
+    """
+    def __init__(self, serial: Optional[str] = None):
+        self.serial = serial
+        self._proc: Optional[asyncio.subprocess.Process] = None
+        self._marker = f"__AM_{uuid.uuid4().hex}__"
+        self._lock = asyncio.Lock()
+        self.commands_run = 0
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.returncode is None
+
+    async def start(self):
+        cmd = ["adb"]
+        if self.serial:
+            cmd += ["-s", self.serial]
+        cmd += ["shell", "-T"]
+        self._proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT
+        )
+
+    async def run(self, command: str, timeout: float = 15) -> subprocess.CompletedProcess:
+        async with self._lock:
+            if not self.alive:
+                raise ADBSessionError("Shell session is not running")
+
+            # stdin is detached so the command cannot swallow the next frame, and
+            # the leading newline keeps the marker on its own line.
+            framed = f"{{ {command}\n}} </dev/null 2>&1; printf '\\n{self._marker} %d\\n' $?\n"
+            try:
+                self._proc.stdin.write(framed.encode())
+                await self._proc.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError) as e:
+                await self.close()
+                raise ADBSessionError(f"Shell session died: {e}")
+            try:
+                output, returncode = await asyncio.wait_for(self._read_frame(), timeout=timeout)
+            except asyncio.TimeoutError:
+                # The session state is unknown once a frame is abandoned
+                await self.close()
+                raise subprocess.TimeoutExpired(command, timeout)
+            except ADBCommandLostError:
+                await self.close()
+                raise
+
+            self.commands_run += 1
+            return subprocess.CompletedProcess(
+                args=command,
+                returncode=returncode,
+                stdout=output,
+                stderr="" if returncode == 0 else output
+            )
+
+    async def _read_frame(self):
+        lines: List[str] = []
+        marker = self._marker.encode()
+        while True:
+            raw = await self._proc.stdout.readline()
+            if not raw:
+                raise ADBCommandLostError("Shell session closed before the command finished")
+            if raw.startswith(marker):
+                returncode = int(raw[len(marker):].strip() or -1)
+                output = "".join(lines)
+                # Drop the newline injected in front of the marker
+                if output.endswith("\n"):
+                    output = output[:-1]
+                return output, returncode
+            lines.append(raw.decode("utf-8", errors="replace"))
+
+    async def close(self):
+        if self._proc and self._proc.returncode is None:
+            try:
+                self._proc.kill()
+                await self._proc.wait()
+            except ProcessLookupError:
+                pass
+        self._proc = None
+
+class ShellSessionPool:
+    """Per-device pool of persistent shell sessions"""
+    def __init__(self, size: int = None):
+        self.size = size or cfg.ADB_SHELL_POOL_SIZE
+        self._idle: Dict[Optional[str], asyncio.Queue] = {}
+        self._sessions: Dict[Optional[str], List[ShellSession]] = {}
+        self._spawn_lock: Optional[asyncio.Lock] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _queue(self, serial: Optional[str]) -> asyncio.Queue:
+        if self._spawn_lock is None:
+            self._spawn_lock = asyncio.Lock()
+        if serial not in self._idle:
+            self._idle[serial] = asyncio.Queue()
+            self._sessions[serial] = []
+        return self._idle[serial]
+
+    async def _acquire(self, serial: Optional[str]) -> ShellSession:
+        idle = self._queue(serial)
+        while True:
+            while not idle.empty():
+                session = idle.get_nowait()
+                if session.alive:
+                    self.hits += 1
+                    return session
+                self._sessions[serial].remove(session)
+
+            async with self._spawn_lock:
+                sessions = self._sessions[serial]
+                if len(sessions) < self.size:
+                    session = ShellSession(serial)
+                    await session.start()
+                    sessions.append(session)
+                    self.misses += 1
+                    logger.debug(f"Spawned shell session for {serial} ({len(sessions)}/{self.size})")
+                    return session
+
+            # Every session is busy, wait for one to come back. The timeout lets us
+            # respawn if a busy session dies instead of being returned.
+            try:
+                session = await asyncio.wait_for(idle.get(), timeout=1.0)
+            except asyncio.TimeoutError:
+                continue
+            if session.alive:
+                self.hits += 1
+                return session
+            self._sessions[serial].remove(session)
+
+    def _release(self, serial: Optional[str], session: ShellSession):
+        if session.alive:
+            self._queue(serial).put_nowait(session)
+        elif session in self._sessions.get(serial, []):
+            self._sessions[serial].remove(session)
+
+    async def run(self, serial: Optional[str], command: str, timeout: float = 15) -> subprocess.CompletedProcess:
+        session = await self._acquire(serial)
+        try:
+            return await session.run(command, timeout=timeout)
+        finally:
+            self._release(serial, session)
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "sessions": sum(len(s) for s in self._sessions.values())
+        }
+
+    async def close(self):
+        for sessions in self._sessions.values():
+            for session in sessions:
+                await session.close()
+        self._sessions.clear()
+        self._idle.clear()
+        self._spawn_lock = None
+
+shell_pool = ShellSessionPool()
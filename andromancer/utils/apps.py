@@ -1,3 +1,4 @@
+import re
 from andromancer.utils.text import normalize_text
 
 APP_MAP = {
@@ -36,7 +37,8 @@ APP_MAP = {
     "home": "HOME",
 }
 
-def get_package_name(app_name: str) -> str:
+def get_package_name(app_name: str, catalog=None) -> str:
+    """Maps an app name to its package: fixed map first, then the device app catalog"""
     if not app_name:
         return ""
 
@@ -45,4 +47,10 @@ def get_package_name(app_name: str) -> str:
     if norm_name in APP_MAP:
         return APP_MAP[norm_name]
 
+    looks_like_package = re.match(r"^[A-Za-z][\w]*(\.[\w]+)+$", app_name) is not None
+    if catalog is not None and not looks_like_package:
+        entry = catalog.resolve(app_name)
+        if entry:
+            return entry.package
+
     return app_name
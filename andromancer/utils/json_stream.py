@@ -0,0 +1,78 @@
+import json
+from typing import Any, Dict, List, Optional
+
+class IncrementalPlanParser:
+    """Pulls `action_plan` entries out of a JSON object while it is still streaming.
+
+    Feed it text chunks in order; each call returns the plan entries whose
+    closing brace arrived in that chunk. Only string, escape and nesting state
+    is tracked, so a chunk is scanned once no matter how the text is split.
+    """
+    def __init__(self, key: str = "action_plan"):
+        self.key = key
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        self._last_key: Optional[str] = None
+        self._array_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+        self.items: List[Dict[str, Any]] = []
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        self._text += chunk
+        completed = []
+        text = self._text
+        for i in range(self._pos, len(text)):
+            c = text[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif c == "\\":
+                    self._escaped = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        # Keys and values of the top-level object; the one before `[` is the key
+                        self._last_key = text[self._string_start + 1:i]
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c in "{[":
+                self._depth += 1
+                if c == "[" and self._depth == 2 and self._last_key == self.key:
+                    self._array_depth = 2
+                elif c == "{" and self._array_depth is not None and self._depth == self._array_depth + 1:
+                    self._item_start = i
+            elif c in "}]":
+                if c == "}" and self._item_start is not None and self._depth == self._array_depth + 1:
+                    item = self._decode(text[self._item_start:i + 1])
+                    if item is not None:
+                        self.items.append(item)
+                        completed.append(item)
+                    self._item_start = None
+                elif c == "]" and self._depth == self._array_depth:
+                    self._array_depth = None
+                self._depth -= 1
+        self._pos = len(text)
+        return completed
+
+    @staticmethod
+    def _decode(fragment: str) -> Optional[Dict[str, Any]]:
+        try:
+            item = json.loads(fragment)
+        except ValueError:
+            return None
+        return item if isinstance(item, dict) else None
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    def result(self) -> Dict[str, Any]:
+        """The complete object, once the stream has ended"""
+        return json.loads(self._text)
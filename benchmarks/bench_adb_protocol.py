@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""The native adb client (ADBServerClient) against a fake adb server.
+
+The server runs in-process on localhost and speaks the host side of the adb
+server protocol: host:devices, host:transport:<serial> / host:transport-any,
+then shell,v2 (framed stdout/stderr/exit packets), exec: (raw stream) and
+sync: (SEND/DATA/DONE for push, RECV/DATA/DONE for pull) on the chosen
+device. Its "shell" knows echo (with >&2), cat, exit and sleep, joined by
+";", so the same checks also pass against a real device. Each service is
+checked for correctness first, then timed sequentially and concurrently.
+Pass a port to hit a real adb server instead.
+
+Usage: python -m benchmarks.bench_adb_protocol [requests] [port]
+"""
+import asyncio
+import os
+import shlex
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from andromancer.utils.adb_protocol import (
+    ADBProtocolError, ADBServerClient, SHELL_CLOSE_STDIN, SHELL_EXIT, SHELL_STDERR, SHELL_STDOUT, SYNC_CHUNK
+)
+from andromancer.utils.adb_shell import ADBCommandLostError
+
+_REMOTE_DIR = "/data/local/tmp"
+
+class FakeADBServer:
+    """Just enough of the adb server protocol to stand in for `adb start-server`.
+
+    `devices` maps serials to states; every device has its own in-memory
+    file system, which sync: writes and reads and `cat` prints. `latency` is
+    added before every device service reply, roughly the USB round trip. The
+    next `drop_streams` shell streams close after their output without an
+    exit packet, as when the device disconnects mid-command.
+    """
+    def __init__(self, devices: dict = None, latency: float = 0.001):
+        self.devices = devices or {"emulator-5554": "device", "R58M123ABC": "offline"}
+        self.files = {serial: {} for serial in self.devices}
+        self.latency = latency
+        self.connections = 0
+        self.services = {}
+        self.drop_streams = 0
+        self._server = None
+
+    async def start(self) -> int:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self._server.sockets[0].getsockname()[1]
+
+    @staticmethod
+    async def _request(reader: asyncio.StreamReader) -> str:
+        length = int(await reader.readexactly(4), 16)
+        return (await reader.readexactly(length)).decode()
+
+    @staticmethod
+    def _fail(writer: asyncio.StreamWriter, message: str):
+        data = message.encode()
+        writer.write(b"FAIL%04x%s" % (len(data), data))
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        serial = None
+        try:
+            while True:
+                request = await self._request(reader)
+                service = request.split(":", 1)[0]
+                self.services[service] = self.services.get(service, 0) + 1
+                if request == "host:devices":
+                    listing = "".join(f"{s}\t{state}\n" for s, state in self.devices.items()).encode()
+                    writer.write(b"OKAY%04x%s" % (len(listing), listing))
+                    break
+                if request.startswith("host:transport"):
+                    serial = self._select(request)
+                    if serial is None:
+                        self._fail(writer, "device not found" if ":" in request[len("host:transport"):]
+                                   else "more than one device/emulator")
+                        break
+                    writer.write(b"OKAY")
+                    await writer.drain()
+                    continue
+                if serial is None:
+                    self._fail(writer, f"unknown host service '{request}'")
+                    break
+                await asyncio.sleep(self.latency)
+                if request.startswith("shell,v2,raw:"):
+                    await self._shell_v2(reader, writer, serial, request.split(":", 1)[1])
+                elif request.startswith("exec:"):
+                    writer.write(b"OKAY")
+                    stdout, _, _ = await self._run(serial, request.split(":", 1)[1])
+                    writer.write(stdout)
+                elif request == "sync:":
+                    writer.write(b"OKAY")
+                    await self._sync(reader, writer, serial)
+                else:
+                    self._fail(writer, f"unknown device service '{request}'")
+                break
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    def _select(self, request: str):
+        ready = [s for s, state in self.devices.items() if state == "device"]
+        if request == "host:transport-any":
+            return ready[0] if len(ready) == 1 else None
+        serial = request.split(":", 2)[2]
+        return serial if serial in ready else None
+
+    async def _run(self, serial: str, command: str):
+        """(stdout, stderr, exit code) of a `;`-separated list of the commands the fake shell knows"""
+        files = self.files[serial]
+        stdout, stderr, code = bytearray(), bytearray(), 0
+        for part in command.split(";"):
+            argv = shlex.split(part)
+            if not argv:
+                continue
+            name, args = argv[0], argv[1:]
+            if name == "echo":
+                to_stderr = args[-1:] == [">&2"]
+                line = " ".join(args[:-1] if to_stderr else args).encode() + b"\n"
+                (stderr if to_stderr else stdout).extend(line)
+                code = 0
+            elif name == "cat":
+                code = 0
+                for path in args:
+                    if path in files:
+                        stdout += files[path]
+                    else:
+                        stderr += f"cat: {path}: No such file or directory\n".encode()
+                        code = 1
+            elif name == "sleep":
+                await asyncio.sleep(float(args[0]))
+                code = 0
+            elif name == "exit":
+                return stdout, stderr, int(args[0]) if args else code
+            else:
+                stderr += f"/system/bin/sh: {name}: inaccessible or not found\n".encode()
+                code = 127
+        return stdout, stderr, code
+
+    async def _shell_v2(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, serial: str, command: str):
+        writer.write(b"OKAY")
+        await writer.drain()
+        # The client has no stdin for us; it closes it straight away
+        while True:
+            packet_id, length = struct.unpack("<BI", await reader.readexactly(5))
+            await reader.readexactly(length)
+            if packet_id == SHELL_CLOSE_STDIN:
+                break
+        stdout, stderr, code = await self._run(serial, command)
+        # Real adbd sends output as it is produced, so several packets per stream
+        for packet_id, data in ((SHELL_STDOUT, stdout), (SHELL_STDERR, stderr)):
+            for start in range(0, len(data), 16 * 1024):
+                chunk = data[start:start + 16 * 1024]
+                writer.write(struct.pack("<BI", packet_id, len(chunk)) + chunk)
+        if self.drop_streams:
+            self.drop_streams -= 1
+            return
+        writer.write(struct.pack("<BI", SHELL_EXIT, 1) + bytes([code & 0xFF]))
+
+    @staticmethod
+    async def _sync_request(reader: asyncio.StreamReader):
+        header = await reader.readexactly(8)
+        length = struct.unpack("<I", header[4:])[0]
+        return header[:4], length
+
+    async def _sync(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, serial: str):
+        files = self.files[serial]
+        while True:
+            await writer.drain()
+            command, length = await self._sync_request(reader)
+            if command == b"QUIT":
+                return
+            if command == b"SEND":
+                path = (await reader.readexactly(length)).decode().rsplit(",", 1)[0]
+                content = bytearray()
+                while True:
+                    command, length = await self._sync_request(reader)
+                    if command == b"DATA":
+                        content += await reader.readexactly(length)
+                    elif command == b"DONE":
+                        break
+                    else:
+                        raise ConnectionError(f"unexpected sync request {command!r} during SEND")
+                files[path] = bytes(content)
+                writer.write(b"OKAY" + struct.pack("<I", 0))
+            elif command == b"RECV":
+                path = (await reader.readexactly(length)).decode()
+                if path not in files:
+                    message = b"No such file or directory"
+                    writer.write(b"FAIL" + struct.pack("<I", len(message)) + message)
+                    continue
+                content = files[path]
+                for start in range(0, len(content), SYNC_CHUNK):
+                    chunk = content[start:start + SYNC_CHUNK]
+                    writer.write(b"DATA" + struct.pack("<I", len(chunk)) + chunk)
+                    await writer.drain()
+                writer.write(b"DONE" + struct.pack("<I", 0))
+            else:
+                raise ConnectionError(f"unexpected sync request {command!r}")
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+_failures = []
+
+def _check(label: str, ok: bool, detail: str = ""):
+    print(f"  {'ok  ' if ok else 'FAIL'} {label}{'' if ok else f': {detail}'}")
+    if not ok:
+        _failures.append(label)
+
+async def check(client: ADBServerClient, server: FakeADBServer = None):
+    print("correctness")
+    devices = await client.devices()
+    ready = [serial for serial, state in devices if state == "device"]
+    if server:
+        _check("host:devices lists every device with its state",
+               devices == [("emulator-5554", "device"), ("R58M123ABC", "offline")], repr(devices))
+    if not ready:
+        raise SystemExit("no device in the 'device' state")
+    serial = ready[0]
+
+    try:
+        await client.shell("no-such-serial", "echo hi")
+        _check("host:transport to an unknown serial fails", False, "no error raised")
+    except ADBProtocolError:
+        _check("host:transport to an unknown serial fails", True)
+
+    result = await client.shell(serial, "echo hello world")
+    _check("shell stdout and exit code 0", (result.stdout, result.stderr, result.returncode) == ("hello world\n", "", 0),
+           repr(result))
+    result = await client.shell(serial, "echo out; echo err >&2; exit 3")
+    _check("shell stderr kept apart, exit code 3",
+           (result.stdout, result.stderr, result.returncode) == ("out\n", "err\n", 3), repr(result))
+    result = await client.shell(serial, "no_such_command")
+    _check("shell exit code 127 for an unknown command", result.returncode == 127, repr(result))
+    try:
+        await client.shell(serial, "sleep 2", timeout=0.2)
+        _check("shell timeout raises TimeoutExpired", False, "no error raised")
+    except subprocess.TimeoutExpired:
+        _check("shell timeout raises TimeoutExpired", True)
+    if server:
+        server.drop_streams = 1
+        try:
+            await client.shell(serial, "echo tapped")
+            _check("shell stream dropped before the exit status raises ADBCommandLostError", False, "no error raised")
+        except ADBCommandLostError:
+            _check("shell stream dropped before the exit status raises ADBCommandLostError", True)
+
+    payload = os.urandom(3 * SYNC_CHUNK + 123)
+    text = b"".join(b"line %05d\n" % i for i in range(10000))
+    remote = f"{_REMOTE_DIR}/bench_adb_protocol.bin"
+    with tempfile.TemporaryDirectory() as tmp:
+        local = Path(tmp) / "push.bin"
+        local.write_bytes(payload)
+        await client.push(serial, local, remote)
+        pulled = Path(tmp) / "pull.bin"
+        await client.pull(serial, remote, pulled)
+        _check("sync push then pull round-trips the bytes", pulled.read_bytes() == payload,
+               f"{pulled.stat().st_size} of {len(payload)} bytes")
+        _check("exec streams raw bytes", await client.exec_out(serial, f"cat {remote}") == payload)
+        local.write_bytes(text)
+        await client.push(serial, local, remote)
+    result = await client.shell(serial, f"cat {remote}")
+    _check("shell v2 reassembles multi-packet stdout", result.stdout == text.decode() and result.returncode == 0,
+           f"{len(result.stdout)} of {len(text)} chars, exit {result.returncode}")
+    try:
+        await client.pull_bytes(serial, f"{_REMOTE_DIR}/does-not-exist")
+        _check("sync pull of a missing file fails", False, "no error raised")
+    except ADBProtocolError:
+        _check("sync pull of a missing file fails", True)
+    if server is None:
+        await client.shell(serial, f"rm -f {remote}")
+    return serial, payload
+
+async def _timed(coro):
+    start = time.perf_counter()
+    await coro
+    return (time.perf_counter() - start) * 1000
+
+async def timings(client: ADBServerClient, serial: str, payload: bytes, count: int):
+    print("timings")
+    sequential = [await _timed(client.shell(serial, "echo ping")) for _ in range(count)]
+    print(f"  shell sequential   p50 {statistics.median(sequential):6.2f} ms | mean {statistics.mean(sequential):6.2f} ms")
+
+    start = time.perf_counter()
+    concurrent = await asyncio.gather(*(_timed(client.shell(serial, "echo ping")) for _ in range(count)))
+    wall = time.perf_counter() - start
+    print(f"  shell x{count} gathered  {wall * 1000:6.1f} ms wall ({count / wall:,.0f}/s) | "
+          f"p50 {statistics.median(concurrent):6.2f} ms, max {max(concurrent):6.2f} ms "
+          f"(at most {client.max_connections} sockets at once)")
+
+    remote = f"{_REMOTE_DIR}/bench_adb_protocol.bin"
+    with tempfile.TemporaryDirectory() as tmp:
+        local = Path(tmp) / "push.bin"
+        local.write_bytes(payload * 8)
+        push_ms = await _timed(client.push(serial, local, remote))
+        pull_ms = await _timed(client.pull_bytes(serial, remote))
+    mb = len(payload) * 8 / 2 ** 20
+    print(f"  sync {mb:.1f} MB          push {push_ms:6.1f} ms ({mb / push_ms * 1000:6.1f} MB/s) | "
+          f"pull {pull_ms:6.1f} ms ({mb / pull_ms * 1000:6.1f} MB/s)")
+
+async def main(count: int, port: int = None):
+    server = None
+    if port is None:
+        server = FakeADBServer()
+        port = await server.start()
+    client = ADBServerClient(host="127.0.0.1", port=port)
+    serial, payload = await check(client, server)
+    await timings(client, serial, payload, count)
+    stats = client.stats()
+    print(f"client opened {stats['connections_opened']} sockets, {stats['spare_hits']} requests used a pre-connected spare")
+    if server:
+        print(f"server accepted {server.connections} connections; services {server.services}")
+    await client.close()
+    if server:
+        await server.stop()
+    if _failures:
+        raise SystemExit(f"{len(_failures)} check(s) failed")
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    asyncio.run(main(int(args[0]) if args else 200, int(args[1]) if len(args) > 1 else None))
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Tail latency of a single LLM provider vs a hedged pool of two.
+
+Both providers are fake OpenAI-compatible servers from bench_llm_transport.
+The primary is fast but has latency spikes and answers every Nth completion
+with a 429; the backup is steadily a bit slower.
+
+Usage: python -m benchmarks.bench_llm_hedging [requests]
+"""
+import asyncio
+import random
+import sys
+import time
+from andromancer import config as cfg
+from andromancer.core.llm_client import AsyncLLMClient
+from andromancer.core.llm_providers import Provider, ProviderPool
+from benchmarks.bench_llm_transport import FakeOpenAIServer
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+async def _run(label: str, providers, count: int):
+    pool = ProviderPool(providers, hedge_delay=0.1)
+    client = AsyncLLMClient(providers=pool)
+    await client.warm_up()
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        await client.complete_chat("system", "user")
+        timings.append((time.perf_counter() - start) * 1000)
+    for p in providers:
+        await p.transport.close()
+
+    stats = pool.stats()
+    wins = ", ".join(f"{name} {s['wins']}" for name, s in stats["providers"].items())
+    print(f"{label:<7} p50 {_percentile(timings, 0.5):7.1f} ms | p95 {_percentile(timings, 0.95):7.1f} ms | "
+          f"p99 {_percentile(timings, 0.99):7.1f} ms | max {max(timings):7.1f} ms | hedges {stats['hedges']} | wins: {wins}")
+
+async def main(count: int):
+    random.seed(7)
+    primary = FakeOpenAIServer(latency=0.01, slow_probability=0.08, slow_latency=1.0, rate_limit_every=25)
+    backup = FakeOpenAIServer(latency=0.03)
+    primary_url, backup_url = await primary.start(), await backup.start()
+
+    await _run("single", [Provider("primary", primary_url, "fake", "bench")], count)
+    await _run("hedged", [Provider("primary", primary_url, "fake", "bench"),
+                          Provider("backup", backup_url, "fake", "bench")], count)
+    await primary.stop()
+    await backup.stop()
+
+if __name__ == "__main__":
+    cfg.LLM_RATE_LIMIT = False  # Latency only; budgets are covered by bench_llm_rate_limit
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200))
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Several missions sharing one rate-limited key, with and without the client-side limiter.
+
+The fake server accepts `limit` completions per second from a refilling
+bucket and answers the rest with 429. Without the limiter every mission
+fires as soon as it can and backs off after each 429; with it, requests
+queue locally and are granted round-robin across missions.
+
+Usage: python -m benchmarks.bench_llm_rate_limit [missions] [requests_per_mission] [limit]
+"""
+import asyncio
+import logging
+import statistics
+import sys
+import time
+from andromancer import config as cfg
+from andromancer.core.llm_client import AsyncLLMClient, LLMError
+from andromancer.core.llm_providers import Provider, ProviderPool
+from andromancer.core.rate_limiter import RateLimiter, current_mission
+from benchmarks.bench_llm_transport import FakeOpenAIServer
+
+async def _mission(client: AsyncLLMClient, name: str, count: int, timings, failed):
+    current_mission.set(name)
+    start = time.perf_counter()
+    for _ in range(count):
+        call = time.perf_counter()
+        try:
+            await client.complete_chat("system", "user")
+        except LLMError:
+            failed.append(name)  # Gave up after every retry round was rate limited
+        timings.append((time.perf_counter() - call) * 1000)
+    return time.perf_counter() - start
+
+async def _run(label: str, enabled: bool, missions: int, count: int, limit: int):
+    cfg.LLM_RATE_LIMIT = enabled
+    server = FakeOpenAIServer(latency=0.01, request_limit=limit, limit_window=1.0)
+    url = await server.start()
+    # Start from a deliberately generous guess; the server's headers correct it
+    provider = Provider("bench", url, "fake", "bench", limiter=RateLimiter(requests_per_minute=limit * 600))
+    client = AsyncLLMClient(providers=ProviderPool([provider]))
+
+    timings, failed = [], []
+    start = time.perf_counter()
+    durations = await asyncio.gather(*(_mission(client, f"m{i}", count, timings, failed) for i in range(missions)))
+    total = time.perf_counter() - start
+    await provider.transport.close()
+    await server.stop()
+
+    print(f"{label:<8} {total:5.2f} s total | 429s {server.rejected:3d} | failed {len(failed):2d} | call p50 {statistics.median(timings):6.1f} ms "
+          f"max {max(timings):6.1f} ms | mission spread {max(durations) - min(durations):4.2f} s")
+
+async def main(missions: int, count: int, limit: int):
+    logging.getLogger("AndroMancer").setLevel(logging.ERROR)
+    print(f"{missions} missions x {count} calls against {limit} requests/s")
+    await _run("no limit", False, missions, count, limit)
+    await _run("limited", True, missions, count, limit)
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:4]]
+    asyncio.run(main(*(args + [4, 10, 10][len(args):])))
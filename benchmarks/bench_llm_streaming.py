@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Time to first action: streamed completion with early dispatch vs full completion.
+
+Uses the fake OpenAI-compatible server from bench_llm_transport, generating
+a typical plan (reasoning first, then actions, then next_steps) at a fixed
+per-token delay.
+
+Usage: python -m benchmarks.bench_llm_streaming [iterations] [token_delay_ms]
+"""
+import asyncio
+import statistics
+import sys
+import time
+from andromancer import config as cfg
+from andromancer.core.llm_client import AsyncLLMClient, LLMTransport
+from benchmarks.bench_llm_transport import FakeOpenAIServer
+
+_PLAN = {
+    "reasoning": "The chat list is open and the contact 'Mamá' is visible near the top, "
+                 "so I tap it, then type the message in the compose box.",
+    "action_plan": [
+        {"capability": "tap", "params": {"element_id": 4}, "expected_outcome": "chat opens", "critical": True},
+        {"capability": "type", "params": {"text": "hola"}, "expected_outcome": "text typed", "critical": False},
+        {"capability": "tap", "params": {"element_id": 9}, "expected_outcome": "message sent", "critical": False}
+    ],
+    "confidence": 0.9,
+    "next_steps": "Verify the message shows as sent, then go back to the chat list and continue with the "
+                  "next sub-task of the goal."
+}
+
+async def main(iterations: int, token_delay: float):
+    server = FakeOpenAIServer(plan=_PLAN, token_delay=token_delay)
+    transport = LLMTransport(base_url=await server.start())
+    client = AsyncLLMClient(api_key="bench", model="fake", transport=transport)
+    await client.warm_up()
+
+    full, streamed, totals = [], [], []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await client.complete_chat("system", "user")
+        full.append((time.perf_counter() - start) * 1000)
+
+        first = []
+        async def on_action(action):
+            if not first:
+                first.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        await client.stream_chat("system", "user", on_action)
+        totals.append((time.perf_counter() - start) * 1000)
+        streamed.append(first[0])
+
+    print(f"full completion   first action after {statistics.mean(full):7.1f} ms")
+    print(f"streamed          first action after {statistics.mean(streamed):7.1f} ms "
+          f"(stream complete after {statistics.mean(totals):.1f} ms)")
+    await transport.close()
+    await server.stop()
+
+if __name__ == "__main__":
+    cfg.LLM_RATE_LIMIT = False  # Latency only; budgets are covered by bench_llm_rate_limit
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    delay = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.005
+    asyncio.run(main(n, delay))
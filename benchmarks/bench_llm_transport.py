@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""Per-call client vs the pooled LLM transport against a fake OpenAI-compatible server.
+
+The server runs in-process on localhost, answers /models and /chat/completions
+with a fixed JSON plan and supports keep-alive, so connection reuse and TTFB
+can be checked without an API key. Pass a base URL to hit a real endpoint.
+
+Usage: python -m benchmarks.bench_llm_transport [requests] [base_url]
+"""
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+import httpx
+from andromancer import config as cfg
+from andromancer.core.llm_client import AsyncLLMClient, LLMTransport
+
+_PLAN = {"reasoning": "bench", "action_plan": [], "confidence": 1.0}
+
+class FakeOpenAIServer:
+    """Just enough HTTP/1.1 to stand in for an OpenAI-compatible endpoint.
+
+    `plan` is the JSON content every completion returns. With `token_delay`
+    the content is "generated" 8 characters at a time: streamed requests
+    (`"stream": true`) get SSE chunks as they are produced, others get the
+    whole body once generation is done.
+    """
+    def __init__(self, latency: float = 0.005, plan: dict = None, token_delay: float = 0.0,
+                 slow_probability: float = 0.0, slow_latency: float = 1.0, rate_limit_every: int = 0,
+                 request_limit: int = 0, limit_window: float = 1.0):
+        self.latency = latency
+        self.plan = plan or _PLAN
+        self.token_delay = token_delay
+        # Fault injection: occasional latency spikes and a 429 every Nth completion
+        self.slow_probability = slow_probability
+        self.slow_latency = slow_latency
+        self.rate_limit_every = rate_limit_every
+        # Server-side budget: a bucket of `request_limit` completions refilled every `limit_window`
+        self.request_limit = request_limit
+        self.limit_window = limit_window
+        self._budget = float(request_limit)
+        self._budget_updated = time.monotonic()
+        self.rejected = 0
+        self.connections = 0
+        self.completions = 0
+        # Prompt prefixes (system messages) seen so far, to report cached tokens like a provider would
+        self._prefixes = set()
+        self._server = None
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/v1"
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = (await reader.readline()).decode().strip()
+                    if not line:
+                        break
+                    key, _, value = line.partition(":")
+                    headers[key.lower()] = value.strip()
+                raw = await reader.readexactly(int(headers.get("content-length", 0)))
+                request = json.loads(raw) if raw else {}
+
+                limit_headers = {}
+                if b"/chat/completions" in request_line:
+                    self.completions += 1
+                    if self.rate_limit_every and self.completions % self.rate_limit_every == 0:
+                        self._reply(writer, 429, {"error": {"message": "Rate limit reached. Please try again in 0.5s."}})
+                        await writer.drain()
+                        continue
+                    if self.request_limit:
+                        limit_headers = self._take_budget()
+                        if limit_headers is None:
+                            self.rejected += 1
+                            retry = (1 - self._budget) * self.limit_window / self.request_limit
+                            self._reply(writer, 429, {"error": {"message": f"Rate limit reached. Please try again in {retry:.2f}s."}})
+                            await writer.drain()
+                            continue
+                    if random.random() < self.slow_probability:
+                        await asyncio.sleep(self.slow_latency)
+                await asyncio.sleep(self.latency)
+                content = json.dumps(self.plan)
+                tokens = [content[i:i + 8] for i in range(0, len(content), 8)]
+                if request.get("stream"):
+                    await self._stream(writer, tokens)
+                    continue
+                if b"/models" in request_line:
+                    body = {"data": [{"id": "fake-model"}]}
+                else:
+                    await asyncio.sleep(self.token_delay * len(tokens))
+                    body = {"choices": [{"message": {"content": content}}], "usage": self._usage(request)}
+                self._reply(writer, 200, body, limit_headers)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    def _usage(self, request: dict) -> dict:
+        messages = request.get("messages", [])
+        prompt = sum(len(m.get("content", "")) for m in messages) // 4
+        prefix = messages[0].get("content", "") if messages else ""
+        cached = len(prefix) // 4 if prefix in self._prefixes else 0
+        self._prefixes.add(prefix)
+        return {"prompt_tokens": prompt, "total_tokens": prompt + 50,
+                "prompt_tokens_details": {"cached_tokens": cached}}
+
+    def _take_budget(self):
+        """x-ratelimit-* headers for an accepted completion, None once the bucket is empty"""
+        rate = self.request_limit / self.limit_window
+        now = time.monotonic()
+        self._budget = min(self.request_limit, self._budget + (now - self._budget_updated) * rate)
+        self._budget_updated = now
+        if self._budget < 1:
+            return None
+        self._budget -= 1
+        return {
+            "x-ratelimit-limit-requests": self.request_limit,
+            "x-ratelimit-remaining-requests": int(self._budget),
+            "x-ratelimit-reset-requests": f"{(self.request_limit - self._budget) / rate:.3f}s"
+        }
+
+    @staticmethod
+    def _reply(writer: asyncio.StreamWriter, status: int, body: dict, headers: dict = None):
+        payload = json.dumps(body).encode()
+        reason = b"OK" if status == 200 else b"Too Many Requests"
+        extra = "".join(f"{k}: {v}\r\n" for k, v in (headers or {}).items()).encode()
+        writer.write(b"HTTP/1.1 %d %s\r\nContent-Type: application/json\r\n%s"
+                     b"Content-Length: %d\r\n\r\n%s" % (status, reason, extra, len(payload), payload))
+
+    async def _stream(self, writer: asyncio.StreamWriter, tokens):
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nTransfer-Encoding: chunked\r\n\r\n")
+        for token in tokens + [None]:
+            await asyncio.sleep(self.token_delay)
+            if token is None:
+                event = b"data: [DONE]\n\n"
+            else:
+                chunk = {"choices": [{"delta": {"content": token}}]}
+                event = b"data: %s\n\n" % json.dumps(chunk).encode()
+            writer.write(b"%x\r\n%s\r\n" % (len(event), event))
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+async def _per_call(base_url: str, count: int):
+    """Previous behaviour: a fresh AsyncClient (and connection) for every request"""
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        async with httpx.AsyncClient() as client:
+            resp = await client.post(f"{base_url}/chat/completions", json={"model": "fake"},
+                                     headers={"Authorization": "Bearer bench"})
+            resp.json()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+async def _pooled(base_url: str, count: int):
+    transport = LLMTransport(base_url=base_url)
+    client = AsyncLLMClient(api_key="bench", model="fake", transport=transport)
+    await client.warm_up()
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        await client.complete_chat("system", "user")
+        timings.append((time.perf_counter() - start) * 1000)
+    await transport.close()
+    return timings, transport.stats()
+
+def _report(label: str, timings):
+    print(f"{label:<9} mean {statistics.mean(timings):7.2f} ms | p50 {statistics.median(timings):7.2f} ms")
+
+async def main(count: int, base_url: str = None):
+    server = None
+    if base_url is None:
+        server = FakeOpenAIServer()
+        base_url = await server.start()
+
+    _report("per-call", await _per_call(base_url, count))
+    opened_before = server.connections if server else 0
+    timings, stats = await _pooled(base_url, count)
+    _report("pooled", timings)
+    print(f"pooled: {stats['requests']} requests over {stats['connections_opened']} connections "
+          f"(reuse {stats['reuse_ratio']:.0%}), avg TTFB {stats['avg_ttfb_ms']:.2f} ms {stats['http_version']}")
+    if server:
+        print(f"server accepted {opened_before} connections per-call, {server.connections - opened_before} pooled")
+        await server.stop()
+
+if __name__ == "__main__":
+    cfg.LLM_RATE_LIMIT = False  # Latency only; budgets are covered by bench_llm_rate_limit
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    url = sys.argv[2] if len(sys.argv) > 2 else None
+    asyncio.run(main(n, url))
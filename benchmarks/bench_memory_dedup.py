@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Store size and retrieval time with and without deduplicating screen memories.
+
+Replays the stores of one or more memory files (memory.jsonl, or a legacy
+memory.vec) into a fresh MemoryStore twice: once storing every summary as a
+new row, once with MEMORY_DEDUP_TYPES=screen. Without file arguments the
+files in ANDROMANCER_STATE_DIR are used if present, plus a synthetic agent
+trace where most steps land on a few hundred recurring screens.
+
+"unique top-5" is how many distinct contents the top 5 results hold, i.e.
+how much duplicates crowd the results.
+
+Usage: python -m benchmarks.bench_memory_dedup [memory files...]
+"""
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from andromancer import config as cfg
+from andromancer.core.memory import MemoryStore
+from benchmarks.bench_memory_retrieval import synthetic_summaries
+
+def read_stores(path: Path):
+    """(content, metadata) of every store the file records, repeats included"""
+    if path.suffix == ".vec":
+        with open(path) as f:
+            records = json.load(f)
+    else:
+        with open(path) as f:
+            records = [r for r in map(json.loads, f) if r.get("op") == "add"]
+    stores = []
+    for r in records:
+        missions = r.get("missions") or [r.get("metadata", {}).get("mission")]
+        for i in range(r.get("occurrences", 1)):
+            stores.append((r["content"], {**r.get("metadata", {}), "mission": missions[i % len(missions)]}))
+    return stores
+
+def synthetic_trace(steps: int, seed: int = 3):
+    rng = random.Random(seed)
+    screens = list(synthetic_summaries(300, seed=seed))
+    stores = []
+    for step in range(steps):
+        mission = f"mission-{step // 15}"
+        if rng.random() < 0.1:
+            content = next(synthetic_summaries(1, seed=rng.randint(0, 10 ** 9)))
+        else:
+            # A few screens (home, chat lists) recur far more than the rest
+            content = screens[min(int(rng.paretovariate(1.0)) - 1, len(screens) - 1)]
+        stores.append((content, {"type": "screen", "mission": mission}))
+    return stores
+
+def measure(stores, dedup: bool, queries):
+    cfg.MEMORY_DEDUP_TYPES = ["screen"] if dedup else []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "memory.jsonl"
+        store = MemoryStore(path)
+        for content, metadata in stores:
+            store.store(content, metadata)
+        store.close()
+        store = MemoryStore(path)
+        rows = len(store.memories)
+        query_ms, unique = [], []
+        for query in queries:
+            start = time.perf_counter()
+            results = store.retrieve(query, 5)
+            query_ms.append((time.perf_counter() - start) * 1000)
+            unique.append(len({m.content for m in results}))
+        size_kb = (os.path.getsize(path) + len(store._embeddings) * (store._embeddings.dim + 1) * 4) / 1024
+        store.close()
+    return rows, size_kb, statistics.median(query_ms), statistics.mean(unique)
+
+def report(name: str, stores):
+    rng = random.Random(1)
+    queries = [rng.choice(stores)[0][:60] for _ in range(30)]
+    print(f"{name}: {len(stores):,} stores")
+    for label, dedup in (("every store", False), ("deduplicated", True)):
+        rows, size_kb, query_ms, unique = measure(stores, dedup, queries)
+        print(f"  {label:<13} {rows:>7,} rows | {size_kb:9,.0f} KB (log + matrix rows) | "
+              f"retrieve p50 {query_ms:6.2f} ms | unique top-5 {unique:.1f}")
+
+if __name__ == "__main__":
+    logging.getLogger("AndroMancer").setLevel(logging.WARNING)
+    cfg.MEMORY_MAX_ENTRIES = 0
+    cfg.MEMORY_TTL = ""
+    paths = [Path(p) for p in sys.argv[1:]] or [p for p in (cfg.MEMORY_LOG_PATH, cfg.VECTOR_DB_PATH) if p.exists()]
+    for path in paths:
+        report(str(path), read_stores(path))
+    if not sys.argv[1:]:
+        report("synthetic agent trace", synthetic_trace(20000))
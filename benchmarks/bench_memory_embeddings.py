@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Embedding search: List[float] embeddings in JSON vs the memory-mapped float32 matrix.
+
+"json" is the previous fallback: memory.vec parsed with json.load, then a
+pure-Python cosine loop over every memory's 16-float hash embedding. "mmap"
+is EmbeddingMatrix: opening maps the file, a search is one matmul plus
+argpartition over MEMORY_EMBEDDING_DIM-wide rows.
+
+Usage: python -m benchmarks.bench_memory_embeddings [sizes]
+       e.g. python -m benchmarks.bench_memory_embeddings 10000,100000
+"""
+import hashlib
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+from andromancer import config as cfg
+from andromancer.core.embedding_matrix import EmbeddingMatrix, embed_text, row_key
+from benchmarks.bench_memory_retrieval import _QUERIES, synthetic_summaries
+
+def _md5_embedding(text: str):
+    hash_int = int(hashlib.md5(text.encode()).hexdigest(), 16)
+    return [((hash_int >> (i * 4)) & 0xF) / 16.0 for i in range(16)]
+
+def _cosine(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    norm_a = sum(x * x for x in a) ** 0.5
+    norm_b = sum(x * x for x in b) ** 0.5
+    return dot / (norm_a * norm_b) if norm_a * norm_b else 0
+
+def _json_search(memories, query):
+    query_vec = _md5_embedding(query)
+    scored = sorted(((_cosine(query_vec, m["embedding"]), m) for m in memories), key=lambda x: x[0], reverse=True)
+    return scored[:3]
+
+def run(size: int, tmp: Path):
+    documents = list(synthetic_summaries(size))
+    legacy = tmp / f"memory-{size}.vec"
+    with open(legacy, "w") as f:
+        json.dump([{"id": str(i), "content": d, "embedding": _md5_embedding(d), "metadata": {}}
+                   for i, d in enumerate(documents)], f)
+    matrix = EmbeddingMatrix(tmp / f"memory-{size}.f32", cfg.MEMORY_EMBEDDING_DIM)
+    matrix.append(np.stack([embed_text(d, matrix.dim) for d in documents]),
+                  np.array([row_key(str(i)) for i in range(size)], dtype=np.uint32))
+    matrix.close()
+
+    start = time.perf_counter()
+    with open(legacy) as f:
+        memories = json.load(f)
+    json_open_ms = (time.perf_counter() - start) * 1000
+    json_ms = []
+    for query in _QUERIES:
+        start = time.perf_counter()
+        _json_search(memories, query)
+        json_ms.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    opened = EmbeddingMatrix(matrix.path, cfg.MEMORY_EMBEDDING_DIM)
+    rows = len(opened)
+    mmap_open_ms = (time.perf_counter() - start) * 1000
+    mmap_ms = []
+    for step in range(30):
+        start = time.perf_counter()
+        opened.search(embed_text(_QUERIES[step % len(_QUERIES)], opened.dim), 3)
+        mmap_ms.append((time.perf_counter() - start) * 1000)
+
+    print(f"{rows:>9,} memories | open json {json_open_ms:7.1f} ms  mmap {mmap_open_ms:5.2f} ms | "
+          f"search json p50 {statistics.median(json_ms):8.1f} ms  mmap p50 {statistics.median(mmap_ms):6.2f} ms "
+          f"(first {mmap_ms[0]:6.2f} ms)")
+
+if __name__ == "__main__":
+    sizes = [int(s) for s in sys.argv[1].split(",")] if len(sys.argv) > 1 else [10000, 100000]
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            run(n, Path(tmp))
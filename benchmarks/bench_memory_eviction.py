@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Steady-state size and cost of the memory store with and without a capacity limit.
+
+One screen summary is stored per step, and every few steps the last few
+are retrieved again, the way the agent revisits screens. At the end the
+store is reopened to measure load time, log and matrix size, and retrieval
+latency.
+
+Usage: python -m benchmarks.bench_memory_eviction [stores] [max_entries] [policy]
+"""
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from andromancer import config as cfg
+from andromancer.core.memory import MemoryStore
+from andromancer.core.memory_retention import RetentionPolicy
+from benchmarks.bench_memory_retrieval import _QUERIES, synthetic_summaries
+
+def run(stores: int, max_entries: int, policy: str):
+    cfg.MEMORY_MAX_ENTRIES = max_entries
+    cfg.MEMORY_EVICTION_POLICY = policy
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "memory.jsonl"
+        store = MemoryStore(path)
+        store_ms, sweep_ms = [], []
+        for step, summary in enumerate(synthetic_summaries(stores)):
+            sweeping = store._stores_since_sweep + 1 >= store.retention.sweep_every
+            start = time.perf_counter()
+            store.store(summary, {"type": "screen"})
+            (sweep_ms if sweeping else store_ms).append((time.perf_counter() - start) * 1000)
+            if step % 10 == 0:
+                store.retrieve(summary, 3)
+        store.close()
+
+        start = time.perf_counter()
+        opened = MemoryStore(path)
+        count = len(opened.memories)
+        load_ms = (time.perf_counter() - start) * 1000
+        query_ms = []
+        for step in range(30):
+            start = time.perf_counter()
+            opened.retrieve(_QUERIES[step % len(_QUERIES)], 3)
+            query_ms.append((time.perf_counter() - start) * 1000)
+        log_mb = os.path.getsize(path) / 2 ** 20
+        matrix_mb = os.path.getsize(path.with_suffix(".f32")) / 2 ** 20
+        opened.close()
+
+    sweeps = f"sweep p50 {statistics.median(sweep_ms):6.1f} ms ({len(sweep_ms)} sweeps, {store.evicted:,} evicted)" \
+        if max_entries else "no sweeps"
+    print(f"cap {max_entries or 'none':>6} {policy} | {count:>7,} memories | log {log_mb:5.1f} MB, matrix {matrix_mb:5.1f} MB | "
+          f"load {load_ms:6.0f} ms | retrieve p50 {statistics.median(query_ms):6.2f} ms | "
+          f"store p50 {statistics.median(store_ms):5.2f} ms | {sweeps}")
+
+if __name__ == "__main__":
+    logging.getLogger("AndroMancer").setLevel(logging.WARNING)
+    cfg.MEMORY_TTL = ""
+    args = sys.argv[1:]
+    stores = int(args[0]) if args else 50000
+    cap = int(args[1]) if len(args) > 1 else 5000
+    policy = args[2] if len(args) > 2 else RetentionPolicy().policy
+    run(stores, 0, policy)
+    run(stores, cap, policy)
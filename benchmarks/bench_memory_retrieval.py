@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Memory retrieval latency: refitting TF-IDF per query vs the incremental hashed index.
+
+Memories are synthetic screen summaries shaped like the ones the agent
+stores every step. The refit path (what `retrieve` used to do) is only
+timed up to `refit_max` memories; past that a single query takes minutes.
+
+Usage: python -m benchmarks.bench_memory_retrieval [sizes] [refit_max]
+       e.g. python -m benchmarks.bench_memory_retrieval 1000,100000,1000000 100000
+"""
+import random
+import statistics
+import sys
+import time
+from andromancer.core.memory_index import HashedTfidfIndex
+
+_LABELS = ["Chats", "Settings", "Send", "Message", "Search", "Home", "Play", "Back", "Notes",
+           "Login", "Password", "Next", "Done", "Cancel", "OK", "Profile", "Camera", "Calls"]
+_QUERIES = ["Send a WhatsApp message to mom App: com.whatsapp Chats",
+            "Open settings and enable dark mode App: com.android.settings",
+            "Log in to LeetCode Password Login"]
+
+def synthetic_summaries(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    for _ in range(count):
+        items = ", ".join(f"'{rng.choice(_LABELS)} {rng.randint(0, 99)}' at ({rng.randint(0, 1080)},{rng.randint(0, 2400)})"
+                          for _ in range(rng.randint(2, 8)))
+        yield f"App: com.example.app{rng.randint(0, 40)} | Screen with: {items}"
+
+def _refit_query_ms(documents, query):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+    start = time.perf_counter()
+    vectorizer = TfidfVectorizer(analyzer="char_wb", ngram_range=(3, 5))
+    matrix = vectorizer.fit_transform(documents)
+    cosine_similarity(vectorizer.transform([query]), matrix).flatten().argsort()[::-1][:3]
+    return (time.perf_counter() - start) * 1000
+
+def run(size: int, refit_max: int):
+    documents = list(synthetic_summaries(size))
+    index = HashedTfidfIndex()
+    start = time.perf_counter()
+    # What MemoryStore does in a background thread on the first retrieve after startup
+    index.add(documents)
+    build_s = time.perf_counter() - start
+    index.background = True
+
+    # Steady state: one store then one retrieve per step
+    add_ms, query_ms = [], []
+    for step, summary in enumerate(synthetic_summaries(30, seed=size)):
+        t = time.perf_counter()
+        index.add([summary])
+        add_ms.append((time.perf_counter() - t) * 1000)
+        t = time.perf_counter()
+        index.search(_QUERIES[step % len(_QUERIES)], 3)
+        query_ms.append((time.perf_counter() - t) * 1000)
+
+    refit = f"{_refit_query_ms(documents, _QUERIES[0]):9.1f} ms" if size <= refit_max else "  skipped"
+    print(f"{size:>9,} memories | refit per query {refit} | incremental query p50 {statistics.median(query_ms):7.2f} ms "
+          f"max {max(query_ms):7.2f} ms | add p50 {statistics.median(add_ms):5.2f} ms | initial index {build_s:6.1f} s")
+
+if __name__ == "__main__":
+    sizes = [int(s) for s in sys.argv[1].split(",")] if len(sys.argv) > 1 else [1000, 100000]
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    for n in sizes:
+        run(n, limit)
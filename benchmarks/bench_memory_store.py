@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Cost of persisting one memory per step, and of opening the store, at a given size.
+
+"rewrite" is the previous behaviour: the whole store serialized to one
+JSON document on every `store`. "log" is the append-only MemoryStore.
+
+Usage: python -m benchmarks.bench_memory_store [existing_memories] [stores]
+"""
+import json
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from pathlib import Path
+from andromancer.core.memory import MemoryStore
+from benchmarks.bench_memory_retrieval import synthetic_summaries
+
+def main(existing: int, stores: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "memory.jsonl"
+        store = MemoryStore(path)
+        for summary in synthetic_summaries(existing):
+            store.store(summary, {"type": "screen"})
+        store._log.close()
+
+        rewrite_ms, log_ms = [], []
+        legacy = Path(tmp) / "memory.vec"
+        for summary in synthetic_summaries(stores, seed=1):
+            start = time.perf_counter()
+            store.store(summary, {"type": "screen"})
+            log_ms.append((time.perf_counter() - start) * 1000)
+        store._log.close()
+        for _ in range(stores):
+            start = time.perf_counter()
+            with open(legacy, "w") as f:
+                json.dump([asdict(m) for m in store.memories], f)
+            rewrite_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        opened = MemoryStore(path)
+        open_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        count = len(opened.memories)
+        replay_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        with open(legacy) as f:
+            json.load(f)
+        legacy_load_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{count:,} memories")
+    print(f"store   rewrite p50 {statistics.median(rewrite_ms):8.2f} ms | log p50 {statistics.median(log_ms):6.3f} ms "
+          f"max {max(log_ms):6.2f} ms")
+    print(f"open    log {open_ms:6.2f} ms (replayed on first use in {replay_ms:.0f} ms) | "
+          f"rewrite json.load {legacy_load_ms:.0f} ms at import")
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 20000, int(args[1]) if len(args) > 1 else 20)
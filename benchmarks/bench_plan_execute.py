@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""LLM calls and wall-clock time per mission: plain ReAct vs PLAN_EXECUTE.
+
+The device is a fake app with a linear flow of screens ("Screen 1" ...
+"Screen N"), each with a "Next" button among a few distractors. After some
+taps a rating popup covers the next screen until "Not now" is tapped. The
+model is scripted and always right, so the only difference between the
+modes is how often it is asked; each call costs `llm_latency` seconds.
+
+Usage: python -m benchmarks.bench_plan_execute [screens] [missions] [llm_latency]
+"""
+import asyncio
+import logging
+import random
+import sys
+import time
+from andromancer import config as cfg
+from andromancer.core import agent as agent_module
+from andromancer.core.agent import AndroMancerAgent
+from andromancer.core.capabilities.base import ExecutionResult
+from andromancer.core.capabilities.observation import UIScrapeCapability
+
+class FakeFlowDevice:
+    def __init__(self, screens: int, popup_probability: float, rng: random.Random):
+        self.screens = screens
+        self.popup_probability = popup_probability
+        self.rng = rng
+        self.screen = 1
+        self.popup = False
+
+    def labels(self):
+        if self.popup:
+            return ["Rate this app", "Not now"]
+        return [f"Screen {self.screen}", "Settings", "Help", "Next"] if self.screen < self.screens \
+            else [f"Screen {self.screen}", "Done"]
+
+    def dump(self) -> str:
+        nodes = "".join(
+            f'<node index="{i}" text="{label}" resource-id="" class="android.widget.Button" package="com.example" '
+            f'content-desc="" clickable="true" enabled="true" bounds="[0,{i * 100}][1080,{i * 100 + 90}]" />'
+            for i, label in enumerate(self.labels())
+        )
+        return f'<?xml version="1.0" ?><hierarchy rotation="0">{nodes}</hierarchy>'
+
+    def tap(self, label: str) -> bool:
+        if self.popup and label == "Not now":
+            self.popup = False
+        elif not self.popup and label == "Next" and self.screen < self.screens:
+            self.screen += 1
+            self.popup = self.rng.random() < self.popup_probability
+        else:
+            return label in self.labels()
+        return True
+
+class ScriptedModel:
+    """Answers like a model that reads the screen correctly"""
+    def __init__(self, device: FakeFlowDevice, latency: float):
+        self.device = device
+        self.latency = latency
+        self.calls = 0
+
+    def _step(self, screen: int, popup: bool):
+        if popup:
+            return {"capability": "tap", "params": {"label": "Not now"}, "expect": {"text": f"Screen {screen}"}}
+        return {"capability": "tap", "params": {"label": "Next"}, "expect": {"text": f"Screen {screen + 1}"}}
+
+    async def complete_chat(self, system_prompt: str, user_prompt: str, timeout: float = 30.0) -> dict:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        device = self.device
+        if device.screen == device.screens and not device.popup:
+            return {"reasoning": "Flow finished", "action_plan": [], "confidence": 0.95}
+        steps = [self._step(device.screen, device.popup)]
+        if "## Plan mode" in user_prompt:
+            # Everything up to the end, assuming no popup shows up
+            first = device.screen if device.popup else device.screen + 1
+            steps += [self._step(screen, False) for screen in range(first, device.screens)]
+        return {"reasoning": "Advance the flow", "action_plan": steps, "confidence": 0.95}
+
+async def _mission(plan_mode: bool, screens: int, latency: float, seed: int):
+    cfg.PLAN_EXECUTE = plan_mode
+    device = FakeFlowDevice(screens, popup_probability=0.2, rng=random.Random(seed))
+    model = ScriptedModel(device, latency)
+    agent = AndroMancerAgent(device_id=f"bench-{seed}")
+    agent.reasoning.llm.complete_chat = model.complete_chat
+
+    async def observe():
+        return UIScrapeCapability()._build_observation(device.dump()), False
+
+    async def execute(name, params, context=None):
+        if name == "tap":
+            return ExecutionResult(device.tap(params.get("label", "")))
+        return ExecutionResult(True)
+
+    async def summary(*args, **kwargs):
+        return "done"
+
+    async def warm_up():
+        pass
+
+    agent._observe = observe
+    agent.registry.execute = execute
+    agent.reasoning.llm.complete_text = summary
+    agent.reasoning.llm.warm_up = warm_up
+
+    start = time.perf_counter()
+    mission = await agent.run_mission("Finish the onboarding flow")
+    return time.perf_counter() - start, mission, model.calls
+
+async def main(screens: int, missions: int, latency: float):
+    logging.getLogger("AndroMancer").setLevel(logging.ERROR)
+    print(f"{missions} missions through {screens} screens, {latency * 1000:.0f} ms per LLM call")
+    for label, plan_mode in (("react", False), ("plan", True)):
+        runs = [await _mission(plan_mode, screens, latency, seed) for seed in range(missions)]
+        completed = sum(1 for _, m, _ in runs if m.status.name == "COMPLETED")
+        print(f"{label:<6} {sum(c for _, _, c in runs) / missions:5.1f} LLM calls/mission | "
+              f"{sum(t for t, _, _ in runs) / missions:5.2f} s/mission | "
+              f"{sum(m.current_step for _, m, _ in runs) / missions:5.1f} steps | {completed}/{missions} completed")
+
+if __name__ == "__main__":
+    cfg.SCREEN_CHANGE_DETECTION = False
+    cfg.DECISION_CACHE = False
+    cfg.MODEL_ROUTING = False
+    cfg.MAX_STEPS = 40
+    agent_module.STEP_DELAY = 0.05
+    args = sys.argv[1:]
+    asyncio.run(main(int(args[0]) if args else 12, int(args[1]) if len(args) > 1 else 5,
+                     float(args[2]) if len(args) > 2 else 0.4))
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Prompt construction cost and prefix-cache reuse over a run of ReAct steps.
+
+Steps go through ReActEngine against the fake OpenAI-compatible server, which
+reports a system prompt it has already seen as cached tokens, the way
+providers with prefix caching do. "rebuilt" drops the registry's capability
+schema before every step, which is what each step used to pay.
+
+Usage: python -m benchmarks.bench_prompt_prefix [steps]
+"""
+import asyncio
+import sys
+import time
+from andromancer import config as cfg
+from andromancer.core.agent import AndroMancerAgent
+from andromancer.core.capabilities.observation import UIScrapeCapability
+from andromancer.core.llm_client import AsyncLLMClient, LLMTransport
+from andromancer.core.reasoning import ReActEngine
+from benchmarks.bench_llm_transport import FakeOpenAIServer
+from benchmarks.bench_ui_parse import _synthetic_dump
+
+async def _run(label: str, steps: int, rebuild: bool):
+    server = FakeOpenAIServer()
+    url = await server.start()
+    registry = AndroMancerAgent(device_id="bench").registry
+    engine = ReActEngine(AsyncLLMClient(api_key="bench", transport=LLMTransport(base_url=url)))
+    prompts, build = set(), 0.0
+    for step in range(steps):
+        observation = UIScrapeCapability()._build_observation(_synthetic_dump(10 + step))
+        start = time.perf_counter()
+        if rebuild:
+            registry._schema = None
+        prompts.add(engine.system_prompt(registry.list_capabilities()))
+        build += time.perf_counter() - start
+        await engine.reason("bench goal", observation, step, registry.list_capabilities())
+    await engine.llm.providers.primary.transport.close()
+    await server.stop()
+
+    usage = engine.llm.stats()
+    print(f"{label:<8} system prompt build {build / steps * 1000:6.3f} ms/step | {len(prompts)} distinct prefix(es) | "
+          f"{usage['cached_prompt_tokens']} of {usage['prompt_tokens']} prompt tokens cached ({usage['prefix_cache_ratio']:.0%})")
+
+async def main(steps: int):
+    await _run("rebuilt", steps, rebuild=True)
+    await _run("cached", steps, rebuild=False)
+
+if __name__ == "__main__":
+    cfg.LLM_RATE_LIMIT = False
+    cfg.MODEL_ROUTING = False
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 30))
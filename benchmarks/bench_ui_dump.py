@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Compares the streaming exec-out UI dump with the legacy dump/pull/read path,
+and what the screen change check costs next to a dump: raw and gzipped
+screencap transfers plus a full check (focus + hash).
+
+Usage: python -m benchmarks.bench_ui_dump [iterations]
+Requires a connected device.
+"""
+import asyncio
+import statistics
+import sys
+import time
+from andromancer.core.capabilities.observation import UIScrapeCapability
+from andromancer.core.capabilities.screen_change import ScreenChangeDetector
+
+async def _measure(label: str, dump, iterations: int):
+    timings = []
+    size = 0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = await dump()
+        timings.append((time.perf_counter() - start) * 1000)
+        size = len(result) if isinstance(result, (str, bytes)) else 0
+
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"{label:<10} mean {statistics.mean(timings):8.1f} ms | "
+          f"p50 {statistics.median(timings):8.1f} ms | p95 {p95:8.1f} ms | {size} bytes")
+    return statistics.mean(timings)
+
+async def main(iterations: int):
+    cap = UIScrapeCapability()
+    # Warm up connections and the uiautomator service
+    await cap._dump_streaming()
+
+    streaming = await _measure("streaming", cap._dump_streaming, iterations)
+    legacy = await _measure("file", cap._dump_via_file, iterations)
+    print(f"speedup: {legacy / streaming:.2f}x")
+
+    detector = ScreenChangeDetector()
+    await _measure("screencap", lambda: detector._exec_out("screencap"), iterations)
+    await _measure("gzipped", lambda: detector._exec_out("screencap | gzip -1"), iterations)
+    check = await _measure("check", detector.signature, iterations)
+    ratio = check / streaming
+    print(f"a check costs {ratio:.2f} dumps; " +
+          (f"it pays off above a {ratio:.0%} unchanged-screen rate" if ratio < 1 else "it never pays off on this link"))
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10))
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Per-step CPU and allocation of parsing a large screen into UI elements.
+
+Compares the slotted UIElement model with the previous dict-per-node model
+(bounds kept as strings and re-parsed by the summary) on a synthetic dump.
+The same dump is parsed every step, like an agent staying on one screen;
+"first" is the step before the bounds cache holds the screen.
+
+Usage: python -m benchmarks.bench_ui_parse [nodes] [iterations]
+"""
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from andromancer.core.capabilities.observation import UIScrapeCapability
+from andromancer.core.capabilities.ui_element import _geometry
+
+def _synthetic_dump(nodes: int) -> str:
+    items = []
+    for i in range(nodes):
+        y = (i * 37) % 2300
+        items.append(
+            f'<node index="{i}" text="Item {i % 50}" resource-id="com.example:id/row_{i % 7}" '
+            f'class="android.widget.TextView" package="com.example" content-desc="" '
+            f'clickable="true" enabled="true" bounds="[0,{y}][1080,{y + 90}]" />'
+        )
+    return f"<?xml version='1.0' encoding='UTF-8' standalone='yes' ?><hierarchy rotation=\"0\">{''.join(items)}</hierarchy>"
+
+def _dict_step(xml_content):
+    root = ET.fromstring(xml_content)
+    elements = []
+    for node in root.iter('node'):
+        if node.get('clickable') == 'true':
+            elements.append({
+                "text": node.get('text', ''),
+                "content_desc": node.get('content-desc', ''),
+                "resource_id": node.get('resource-id', ''),
+                "class": node.get('class', ''),
+                "bounds": node.get('bounds', ''),
+                "package": node.get('package', '')
+            })
+    centers = []
+    for e in elements:
+        nums = [int(n) for n in re.findall(r"-?\d+", e['bounds'])]
+        centers.append(((nums[0] + nums[2]) // 2, (nums[1] + nums[3]) // 2))
+    return elements
+
+def _slotted_step(xml_content):
+    root = ET.fromstring(xml_content)
+    elements = UIScrapeCapability()._parse_nodes(root)
+    centers = [(e.cx, e.cy) for e in elements]
+    return elements
+
+def _measure(label, step, xml_content, iterations):
+    _geometry.cache_clear()
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        step(xml_content)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    # Retained = what the observation keeps once the parsed tree is dropped
+    tracemalloc.start()
+    kept = step(xml_content)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<8} p50 {statistics.median(timings):6.2f} ms/step (first {timings[0]:6.2f}) | retained {retained / 1024:8.1f} KiB | peak {peak / 1024:8.1f} KiB")
+    return kept
+
+def main(nodes: int, iterations: int):
+    xml_content = _synthetic_dump(nodes)
+    print(f"{nodes} clickable nodes, {iterations} iterations (XML parse included)")
+    _measure("dict", _dict_step, xml_content, iterations)
+    _measure("slotted", _slotted_step, xml_content, iterations)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 400, int(sys.argv[2]) if len(sys.argv) > 2 else 200)